@@ -1,8 +1,9 @@
 import bisect
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 from .sfSystem import *
 from .sfGraphics import *
 from .sfAudio import *
+from .Time import Profiler
 
 class Event:
     """
@@ -44,16 +45,23 @@ class Event:
             self.duration = Time.Zero()
             self.set_expired(True)
 
-    def display(self, target: RenderTarget):
+    def display(self, target: RenderTarget, states: Optional[RenderStates] = None):
         """
         Draw event.
 
         Parameters:
         - target: Render target.
+        - states: Render states, the default ones if it is None.
         """
 
         if isinstance(self.event, Sprite):
-            target.draw(self.event)
+            if states is None:
+                target.draw(self.event)
+            else:
+                target.draw(self.event, states)
+            if Profiler.enabled:
+                Profiler.count('draw_calls')
+                Profiler.count('texture_binds')
 
     def is_expired(self) -> bool:
         """
@@ -138,17 +146,18 @@ class Animation:
             self.set_expired(True)
             return
 
-    def display(self, target: RenderTarget):
+    def display(self, target: RenderTarget, states: Optional[RenderStates] = None):
         """
         Draw all non-expired events in the current animation on the specified render target.
 
         Parameters:
         - target: The render target where the events will be drawn.
+        - states: Render states, the default ones if it is None.
         """
 
         for event in self._executing_events:
             if not event.is_expired():
-                event.display(target)
+                event.display(target, states)
 
     def is_expired(self) -> bool:
         """
@@ -253,6 +262,7 @@ class AnimationMgr:
 
         return self._z_list.copy()
 
+    @Profiler.profile('AnimationMgr.update')
     def update(self, delta_time: float):
         """
         Update all animations managed by the AnimationMgr and remove expired animations.
@@ -267,7 +277,8 @@ class AnimationMgr:
                 if animation.is_expired():
                     self.remove_animation(animation)
 
-    def display(self, target: RenderTarget, z: int = None):
+    @Profiler.profile('AnimationMgr.display')
+    def display(self, target: RenderTarget, z: int = None, states: Optional[RenderStates] = None):
         """
         Draw all animations managed by the AnimationMgr on the specified render target.
         If a z - index is provided, only animations at that z - index will be drawn;
@@ -276,6 +287,7 @@ class AnimationMgr:
         Parameters:
         - target: The render target where the animations will be drawn.
         - z: The z - index of the animations to be drawn. If None, all z - indices will be considered. Defaults to None.
+        - states: Render states, the default ones if it is None.
         """
 
         if z is None:
@@ -285,4 +297,4 @@ class AnimationMgr:
 
         for z_ in z_list:
             for animation in self._animations[z_]:
-                animation.display(target)
+                animation.display(target, states)
@@ -0,0 +1,525 @@
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Union
+import numpy as np
+from .sfSystem import *
+from .sfAudio import *
+from .Time import Profiler
+
+class AudioEffect:
+    """
+    Base class of the effects of an EffectChain.
+
+    process works in place on a float32 array of shape (frames, channels), on the audio thread. Scratch buffers are created in prepare, so processing a block does not allocate sample buffers.
+    """
+
+    def __init__(self):
+        """
+        Default constructor.
+        """
+
+        self.bypass = False
+        self.channel_count = 0
+        self.sample_rate = 0
+        self.max_frames = 0
+        self._times: Deque[float] = deque(maxlen=256)
+
+    def prepare(self, channel_count: int, sample_rate: int, max_frames: int):
+        """
+        Create the scratch buffers and reset the state, called by the chain when the format of the stream changes.
+
+        Parameters:
+        - channel_count: Count of channels.
+        - sample_rate: Sample rate, in samples per second.
+        - max_frames: Maximum count of frames of a block.
+        """
+
+        self.channel_count = channel_count
+        self.sample_rate = sample_rate
+        self.max_frames = max_frames
+
+    def process(self, frames: np.ndarray):
+        """
+        Process a block in place, override it in subclasses.
+
+        Parameters:
+        - frames: Samples of shape (frames, channels).
+        """
+
+        pass
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the statistics of the processing time of the latest blocks.
+
+        Returns:
+        - Dict with the average, p50, p99 and maximum time in milliseconds.
+        """
+
+        return Profiler._stats(list(self._times))
+
+class LowPass(AudioEffect):
+    """
+    One-pole low-pass filter.
+
+    The recursion is evaluated in blocks of 32 frames with a matrix product, then the state is carried between the blocks with a second matrix product, so there is no loop over the samples.
+    """
+
+    _block = 32
+
+    def __init__(self, cutoff: float):
+        """
+        Constructor.
+
+        Parameters:
+        - cutoff: Cutoff frequency, in Hz.
+        """
+
+        super().__init__()
+        self._cutoff = cutoff
+        self._matrices = None
+
+    def set_cutoff(self, cutoff: float):
+        """
+        Set the cutoff frequency, the filter state is kept.
+
+        Parameters:
+        - cutoff: Cutoff frequency, in Hz.
+        """
+
+        self._cutoff = cutoff
+        if self.sample_rate > 0:
+            self._matrices = self._build()
+
+    def get_cutoff(self) -> float:
+        """
+        Get the cutoff frequency.
+
+        Returns:
+        - Cutoff frequency, in Hz.
+        """
+
+        return self._cutoff
+
+    def prepare(self, channel_count: int, sample_rate: int, max_frames: int):
+        super().prepare(channel_count, sample_rate, max_frames)
+        block = self._block
+        count = (max_frames + block - 1) // block
+        self._matrices = self._build()
+        self._padded = np.zeros((count * block, channel_count), dtype=np.float32)
+        self._output = np.zeros((count, block, channel_count), dtype=np.float32)
+        self._ends = np.zeros((count, channel_count), dtype=np.float32)
+        self._carry = np.zeros((count, channel_count), dtype=np.float32)
+        self._state = np.zeros(channel_count, dtype=np.float32)
+
+    def _build(self):
+        # y[n] = y[n - 1] + a * (x[n] - y[n - 1]), d = 1 - a.
+        block = self._block
+        count = (self.max_frames + block - 1) // block
+        a = 1.0 - math.exp(-2.0 * math.pi * min(self._cutoff, self.sample_rate / 2) / self.sample_rate)
+        d = 1.0 - a
+        n = np.arange(block)
+        lags = n[:, np.newaxis] - n[np.newaxis, :]
+        block_matrix = np.where(lags >= 0, a * d ** np.maximum(lags, 0), 0.0).astype(np.float32)
+        decay = (d ** np.arange(1, block + 1)).astype(np.float32)[np.newaxis, :, np.newaxis]
+        m = np.arange(count)
+        lags = m[:, np.newaxis] - m[np.newaxis, :]
+        d_block = d ** block
+        carry_matrix = np.where(lags >= 0, d_block ** np.maximum(lags, 0), 0.0).astype(np.float32)
+        carry_decay = (d_block ** np.arange(1, count + 1)).astype(np.float32)[:, np.newaxis]
+        return block_matrix, decay, carry_matrix, carry_decay
+
+    def process(self, frames: np.ndarray):
+        block_matrix, decay, carry_matrix, carry_decay = self._matrices
+        length = len(frames)
+        count = (length + self._block - 1) // self._block
+        padded = self._padded[:count * self._block]
+        padded[:length] = frames
+        padded[length:] = 0
+        blocks = padded.reshape(count, self._block, self.channel_count)
+
+        # Response of every block from a zero state.
+        output = self._output[:count]
+        np.matmul(block_matrix, blocks, out=output)
+
+        # Last output of every block with the carried state, then the state entering every block.
+        ends = self._ends[:count]
+        np.matmul(carry_matrix[:count, :count], output[:, -1, :], out=ends)
+        carry = self._carry[:count]
+        np.multiply(carry_decay[:count], self._state, out=carry)
+        ends += carry
+        carry[0] = self._state
+        carry[1:] = ends[:-1]
+
+        np.multiply(decay, carry[:, np.newaxis, :], out=blocks)
+        output += blocks
+        output = output.reshape(count * self._block, self.channel_count)
+        frames[:] = output[:length]
+        self._state[:] = output[length - 1]
+
+class _DelayLine:
+    def __init__(self, length: int, channel_count: int, feedback: float):
+        self.buffer = np.zeros((length, channel_count), dtype=np.float32)
+        self.position = 0
+        self.feedback = feedback
+
+    def comb(self, samples: np.ndarray, output: np.ndarray):
+        # output += delayed, delayed <- samples + feedback * delayed. The block must not be longer than the line.
+        start = 0
+        while start < len(samples):
+            count = min(len(samples) - start, len(self.buffer) - self.position)
+            delayed = self.buffer[self.position:self.position + count]
+            output[start:start + count] += delayed
+            delayed *= self.feedback
+            delayed += samples[start:start + count]
+            self.position = (self.position + count) % len(self.buffer)
+            start += count
+
+    def allpass(self, samples: np.ndarray, scratch: np.ndarray):
+        # samples <- delayed - samples, delayed <- samples + feedback * delayed, in place.
+        start = 0
+        while start < len(samples):
+            count = min(len(samples) - start, len(self.buffer) - self.position)
+            delayed = self.buffer[self.position:self.position + count]
+            block = samples[start:start + count]
+            result = scratch[:count]
+            np.subtract(delayed, block, out=result)
+            delayed *= self.feedback
+            delayed += block
+            block[:] = result
+            self.position = (self.position + count) % len(self.buffer)
+            start += count
+
+class Reverb(AudioEffect):
+    """
+    Schroeder reverb, 4 parallel comb filters followed by 2 all-pass filters.
+
+    Blocks are cut to the shortest delay, so every filter reads only samples written by previous blocks and works on whole arrays.
+    """
+
+    _comb_delays = (1116, 1188, 1277, 1356)
+    _allpass_delays = (556, 441)
+
+    def __init__(self, room_size: float = 0.84, wet: float = 0.3):
+        """
+        Constructor.
+
+        Parameters:
+        - room_size: Feedback of the comb filters, from 0 to 1 excluded, longer tails for higher values.
+        - wet: Level of the reverberated signal, the dry signal is kept at 1 - wet.
+        """
+
+        super().__init__()
+        if not 0 <= room_size < 1:
+            raise ValueError('Room size must be in [0, 1).')
+        self.room_size = room_size
+        self.wet = wet
+        self._combs: List[_DelayLine] = []
+        self._allpasses: List[_DelayLine] = []
+
+    def prepare(self, channel_count: int, sample_rate: int, max_frames: int):
+        super().prepare(channel_count, sample_rate, max_frames)
+        ratio = sample_rate / 44100
+        self._combs = [_DelayLine(max(1, int(delay * ratio)), channel_count, self.room_size) for delay in self._comb_delays]
+        self._allpasses = [_DelayLine(max(1, int(delay * ratio)), channel_count, 0.5) for delay in self._allpass_delays]
+        self._segment = min(len(line.buffer) for line in self._combs + self._allpasses)
+        self._input = np.zeros((self._segment, channel_count), dtype=np.float32)
+        self._wet = np.zeros((self._segment, channel_count), dtype=np.float32)
+        self._scratch = np.zeros((self._segment, channel_count), dtype=np.float32)
+
+    def process(self, frames: np.ndarray):
+        for comb in self._combs:
+            comb.feedback = self.room_size
+        wet_level = np.float32(self.wet / len(self._combs))
+        dry_level = np.float32(1 - self.wet)
+
+        for start in range(0, len(frames), self._segment):
+            block = frames[start:start + self._segment]
+            count = len(block)
+            samples = self._input[:count]
+            np.multiply(block, 0.015, out=samples)
+            wet = self._wet[:count]
+            wet[:] = 0
+            for comb in self._combs:
+                comb.comb(samples, wet)
+            for allpass in self._allpasses:
+                allpass.allpass(wet, self._scratch)
+            # The comb input is scaled down like in Freeverb, the output is scaled back up.
+            wet *= wet_level / np.float32(0.015 * 4)
+            block *= dry_level
+            block += wet
+
+class VolumeRamp(AudioEffect):
+    """
+    Volume with smooth linear changes, to fade a stream in or out without clicks.
+    """
+
+    def __init__(self, volume: float = 1.0):
+        """
+        Constructor.
+
+        Parameters:
+        - volume: Initial volume factor, 1 for unchanged samples.
+        """
+
+        super().__init__()
+        self._volume = volume
+        # Target and change per frame, replaced together so the audio thread never sees half of a change.
+        self._ramp = (volume, 0.0)
+
+    def ramp_to(self, volume: float, duration: Time):
+        """
+        Change the volume linearly.
+
+        Parameters:
+        - volume: Target volume factor.
+        - duration: Duration of the change, the change is immediate if it is zero.
+        """
+
+        seconds = duration.as_seconds()
+        if seconds <= 0 or self.sample_rate <= 0:
+            self._ramp = (volume, math.inf)
+        else:
+            self._ramp = (volume, abs(volume - self._volume) / (seconds * self.sample_rate))
+
+    def get_volume(self) -> float:
+        """
+        Get the current volume factor.
+
+        Returns:
+        - Volume factor.
+        """
+
+        return self._volume
+
+    def is_ramping(self) -> bool:
+        """
+        Check if the volume is changing.
+
+        Returns:
+        - True if the volume has not reached its target, False otherwise.
+        """
+
+        return self._volume != self._ramp[0]
+
+    def prepare(self, channel_count: int, sample_rate: int, max_frames: int):
+        super().prepare(channel_count, sample_rate, max_frames)
+        self._steps = np.arange(1, max_frames + 1, dtype=np.float32)
+        self._gains = np.zeros(max_frames, dtype=np.float32)
+
+    def process(self, frames: np.ndarray):
+        target, step = self._ramp
+        volume = self._volume
+        if volume == target:
+            if volume != 1.0:
+                frames *= np.float32(volume)
+            return
+
+        if step == math.inf:
+            frames *= np.float32(target)
+            self._volume = target
+            return
+
+        length = len(frames)
+        gains = self._gains[:length]
+        rising = target > volume
+        np.multiply(self._steps[:length], np.float32(step if rising else -step), out=gains)
+        gains += np.float32(volume)
+        if rising:
+            np.minimum(gains, np.float32(target), out=gains)
+        else:
+            np.maximum(gains, np.float32(target), out=gains)
+        frames *= gains[:, np.newaxis]
+        reached = abs(target - volume) <= step * length
+        self._volume = target if reached else float(gains[-1])
+
+class Ducking(VolumeRamp):
+    """
+    Volume lowered while something more important plays, such as music under a voice.
+
+    AudioMgr ducks the chains attached to its music while a voice plays.
+    """
+
+    def __init__(self, level: float = 0.3, attack: Time = Time.FromMilliseconds(80), release: Time = Time.FromMilliseconds(400)):
+        """
+        Constructor.
+
+        Parameters:
+        - level: Volume factor while ducked.
+        - attack: Duration of the volume decrease.
+        - release: Duration of the volume increase.
+        """
+
+        super().__init__(1.0)
+        self.level = level
+        self.attack = attack
+        self.release = release
+        self._ducked = False
+
+    def set_ducked(self, ducked: bool):
+        """
+        Lower or restore the volume.
+
+        Parameters:
+        - ducked: Whether the volume is lowered.
+        """
+
+        if ducked == self._ducked:
+            return
+
+        self._ducked = ducked
+        if ducked:
+            self.ramp_to(self.level, self.attack)
+        else:
+            self.ramp_to(1.0, self.release)
+
+    def is_ducked(self) -> bool:
+        """
+        Check if the volume is lowered.
+
+        Returns:
+        - True if ducked, False otherwise.
+        """
+
+        return self._ducked
+
+class EffectChain:
+    """
+    Chain of effects processed in order on the audio thread of a sound or music, through set_effect_processor.
+
+    The samples are wrapped in NumPy arrays without copy. Effects are prepared when the format of the stream changes, and longer blocks are cut to max_frames, so processing does not allocate sample buffers.
+    Every effect, and the whole chain, can be bypassed; processing times are recorded per effect.
+    The effects need the sample rate of the stream, given to the constructor or read by attach. Until it is known, the samples are passed through unprocessed.
+    """
+
+    def __init__(self, effects: Optional[List[AudioEffect]] = None, max_frames: int = 4096, sample_rate: int = 0):
+        """
+        Constructor.
+
+        Parameters:
+        - effects: Effects in processing order.
+        - max_frames: Maximum count of frames processed at once.
+        - sample_rate: Sample rate of the stream, 0 to read it from the source in attach.
+        """
+
+        if sample_rate < 0:
+            raise ValueError('Sample rate must not be negative.')
+
+        self.bypass = False
+        self._effects: List[AudioEffect] = [] if effects is None else list(effects)
+        self._max_frames = max_frames
+        self._sample_rate = sample_rate
+        self._channel_count = 0
+        self._times: Deque[float] = deque(maxlen=256)
+
+    def add(self, effect: AudioEffect):
+        """
+        Add an effect at the end of the chain.
+
+        Parameters:
+        - effect: The effect.
+        """
+
+        if self._sample_rate > 0 and self._channel_count > 0:
+            effect.prepare(self._channel_count, self._sample_rate, self._max_frames)
+        # The list is replaced, so the audio thread keeps iterating over a complete one.
+        self._effects = self._effects + [effect]
+
+    def remove(self, effect: AudioEffect):
+        """
+        Remove an effect.
+
+        Parameters:
+        - effect: The effect.
+        """
+
+        if effect not in self._effects:
+            raise ValueError('Effect not found.')
+        self._effects = [other for other in self._effects if other is not effect]
+
+    def get_effects(self) -> List[AudioEffect]:
+        """
+        Get the effects.
+
+        Returns:
+        - Effects in processing order.
+        """
+
+        return self._effects.copy()
+
+    def attach(self, source: Union[Sound, SoundStream]):
+        """
+        Process the samples of a sound or a music with this chain.
+
+        Parameters:
+        - source: Sound or music, its sample rate is read from it.
+        """
+
+        if isinstance(source, Sound):
+            sample_rate = source.get_buffer().get_sample_rate()
+        else:
+            sample_rate = source.get_sample_rate()
+        if sample_rate != self._sample_rate:
+            self._sample_rate = sample_rate
+            self._channel_count = 0
+        source.set_effect_processor(self)
+
+    @staticmethod
+    def detach(source: Union[Sound, SoundStream]):
+        """
+        Stop processing the samples of a sound or a music.
+
+        Parameters:
+        - source: Sound or music.
+        """
+
+        source.set_effect_processor(None)
+
+    def set_ducked(self, ducked: bool):
+        """
+        Lower or restore the volume of the Ducking effects of the chain.
+
+        Parameters:
+        - ducked: Whether the volume is lowered.
+        """
+
+        for effect in self._effects:
+            if isinstance(effect, Ducking):
+                effect.set_ducked(ducked)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the statistics of the processing time of the latest blocks by the whole chain.
+
+        Returns:
+        - Dict with the average, p50, p99 and maximum time in milliseconds.
+        """
+
+        return Profiler._stats(list(self._times))
+
+    def __call__(self, input_frames: memoryview, input_frame_count: int, output_frames: memoryview, output_frame_count: int, frame_channel_count: int):
+        start = time.perf_counter_ns()
+        effects = self._effects
+        if self._sample_rate > 0 and frame_channel_count != self._channel_count:
+            self._channel_count = frame_channel_count
+            for effect in effects:
+                effect.prepare(frame_channel_count, self._sample_rate, self._max_frames)
+
+        count = min(input_frame_count, output_frame_count)
+        samples = np.frombuffer(input_frames, dtype=np.float32, count=count * frame_channel_count)
+        output = np.frombuffer(output_frames, dtype=np.float32, count=output_frame_count * frame_channel_count)
+        output = output.reshape(output_frame_count, frame_channel_count)
+        output[:count] = samples.reshape(count, frame_channel_count)
+        output[count:] = 0
+
+        if not self.bypass and self._sample_rate > 0:
+            for effect in effects:
+                if effect.bypass or effect.channel_count != frame_channel_count:
+                    continue
+                effect_start = time.perf_counter_ns()
+                for block_start in range(0, count, self._max_frames):
+                    effect.process(output[block_start:block_start + self._max_frames])
+                effect._times.append((time.perf_counter_ns() - effect_start) / 1e6)
+
+        self._times.append((time.perf_counter_ns() - start) / 1e6)
@@ -0,0 +1,253 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .sfAudio import *
+
+_extensions = ('.wav', '.ogg', '.flac', '.mp3')
+
+class AudioConverter:
+    """
+    Offline audio converter.
+
+    It normalizes, mixes down or up, resamples and transcodes sound files. Files are streamed in chunks of fixed size through InputSoundFile and OutputSoundFile, so memory stays the same whatever the length of a file, and convert_tree spreads the files of a directory over a process pool.
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None, channel_count: Optional[int] = None,
+                 normalize: Optional[float] = None, chunk_frames: int = 65536):
+        """
+        Constructor.
+
+        Parameters:
+        - sample_rate: Sample rate of the converted files, the source one if it is None.
+        - channel_count: Count of channels of the converted files, 1 or 2, the source one if it is None. Stereo is mixed down by averaging, mono is copied to both channels.
+        - normalize: Peak level of the converted files in dBFS, such as -1.0, no normalization if it is None.
+        - chunk_frames: Count of frames read at once.
+        """
+
+        if channel_count not in (None, 1, 2):
+            raise ValueError('Count of channels must be 1 or 2.')
+        if normalize is not None and normalize > 0:
+            raise ValueError('Normalization level must not be positive.')
+        if chunk_frames <= 0:
+            raise ValueError('Count of frames per chunk must be positive.')
+
+        self.sample_rate = sample_rate
+        self.channel_count = channel_count
+        self.normalize = normalize
+        self.chunk_frames = chunk_frames
+
+    def convert_file(self, source: str, destination: str) -> int:
+        """
+        Convert a sound file, the format of the destination is given by its extension (WAV, OGG or FLAC).
+        The file is written to a temporary path next to the destination and moved to it once complete, so a failed conversion leaves no partial file.
+
+        Parameters:
+        - source: Path of the source file.
+        - destination: Path of the converted file, its directory is created if needed.
+
+        Returns:
+        - Count of written frames.
+        """
+
+        gain = 1.0
+        if self.normalize is not None:
+            peak = self._get_peak(source)
+            if peak > 0:
+                gain = 32767 * 10 ** (self.normalize / 20) / peak
+
+        input_file = self._open(source)
+        channel_count = input_file.get_channel_count()
+        sample_rate = input_file.get_sample_rate()
+        output_channels = channel_count if self.channel_count is None else self.channel_count
+        output_rate = sample_rate if self.sample_rate is None else self.sample_rate
+        channel_map = input_file.get_channel_map()
+        if output_channels != channel_count:
+            channel_map = [SoundChannel.Mono] if output_channels == 1 else [SoundChannel.FrontLeft, SoundChannel.FrontRight]
+
+        directory = os.path.dirname(destination)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The extension is kept, it gives the format of the file.
+        base, extension = os.path.splitext(destination)
+        temporary = f'{base}.part{extension}'
+        output_file = OutputSoundFile()
+        if not output_file.open_from_file(temporary, output_rate, output_channels, channel_map):
+            input_file.close()
+            raise ValueError(f'Fail to open {destination} for writing.')
+
+        # Chunk buffers, allocated once per file.
+        samples = np.zeros(self.chunk_frames * channel_count, dtype=np.int16)
+        frames = np.zeros((self.chunk_frames + 1, output_channels), dtype=np.float32)
+        resampler = _Resampler(sample_rate, output_rate, output_channels, self.chunk_frames)
+        written = 0
+        completed = False
+        try:
+            while True:
+                count = input_file.read(samples.ctypes.data, len(samples)) // channel_count
+                if count == 0:
+                    break
+
+                chunk = samples[:count * channel_count].reshape(count, channel_count)
+                block = frames[:count]
+                if output_channels == channel_count:
+                    block[:] = chunk
+                elif output_channels == 1:
+                    np.mean(chunk, axis=1, out=block[:, 0])
+                else:
+                    block[:] = chunk[:, :1]
+                if gain != 1.0:
+                    block *= np.float32(gain)
+
+                block = resampler.process(block)
+                np.clip(block, -32768, 32767, out=block)
+                output = np.rint(block).astype(np.int16)
+                output_file.write(output.tobytes(), output.size)
+                written += len(output)
+            completed = True
+        finally:
+            input_file.close()
+            output_file.close()
+            if completed:
+                os.replace(temporary, destination)
+            elif os.path.exists(temporary):
+                os.remove(temporary)
+
+        return written
+
+    def convert_tree(self, source_directory: str, destination_directory: str, extension: str = '.ogg',
+                     workers: Optional[int] = None, force: bool = False) -> Dict[str, int]:
+        """
+        Convert every sound file of a directory tree, keeping the relative paths.
+
+        Parameters:
+        - source_directory: Directory of the source files, such as 'assets/sounds'.
+        - destination_directory: Directory of the converted files.
+        - extension: Extension of the converted files, which gives their format.
+        - workers: Count of processes, the count of CPUs if it is None, 0 to convert in this process.
+        - force: Whether files are converted again even if the converted file is newer than the source.
+
+        Returns:
+        - Count of written frames for every converted file.
+        """
+
+        jobs = self._get_jobs(source_directory, destination_directory, extension, force)
+        results: Dict[str, int] = {}
+        failures: List[str] = []
+        if workers == 0:
+            for source, destination in jobs:
+                try:
+                    results[destination] = self.convert_file(source, destination)
+                except (OSError, ValueError, RuntimeError) as error:
+                    failures.append(f'{source}: {error}')
+        elif jobs:
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [(source, destination, executor.submit(self.convert_file, source, destination)) for source, destination in jobs]
+                for source, destination, future in futures:
+                    try:
+                        results[destination] = future.result()
+                    except (OSError, ValueError, RuntimeError) as error:
+                        failures.append(f'{source}: {error}')
+
+        if failures:
+            raise ValueError(f'Fail to convert {len(failures)} file(s):\n' + '\n'.join(failures))
+        return results
+
+    @staticmethod
+    def _get_jobs(source_directory: str, destination_directory: str, extension: str, force: bool) -> List[Tuple[str, str]]:
+        jobs = []
+        for root, _, names in os.walk(source_directory):
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() not in _extensions:
+                    continue
+                source = os.path.join(root, name)
+                relative = os.path.relpath(source, source_directory)
+                destination = os.path.join(destination_directory, os.path.splitext(relative)[0] + extension)
+                if not force and os.path.exists(destination) and os.path.getmtime(destination) >= os.path.getmtime(source):
+                    continue
+                jobs.append((source, destination))
+        # Longest files first, so the last busy process does not get a long one.
+        jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+        return jobs
+
+    def _get_peak(self, source: str) -> int:
+        input_file = self._open(source)
+        samples = np.zeros(self.chunk_frames * input_file.get_channel_count(), dtype=np.int16)
+        peak = 0
+        try:
+            while True:
+                count = input_file.read(samples.ctypes.data, len(samples))
+                if count == 0:
+                    break
+                chunk = samples[:count]
+                peak = max(peak, int(chunk.max()), -int(chunk.min()))
+        finally:
+            input_file.close()
+        return peak
+
+    @staticmethod
+    def _open(source: str) -> InputSoundFile:
+        input_file = InputSoundFile()
+        if not input_file.open_from_file(source):
+            raise ValueError(f'Fail to open {source}.')
+        return input_file
+
+class _Resampler:
+    # Linear interpolation, the last frame of a chunk is kept to interpolate across chunks.
+
+    def __init__(self, input_rate: int, output_rate: int, channel_count: int, chunk_frames: int):
+        self.step = input_rate / output_rate
+        self.position = 0.0
+        self.first = True
+        self.frames = np.zeros((chunk_frames + 1, channel_count), dtype=np.float32)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.step == 1.0:
+            return block
+
+        if self.first:
+            frames = self.frames[:len(block)]
+            frames[:] = block
+            self.first = False
+        else:
+            frames = self.frames[:len(block) + 1]
+            frames[1:] = block
+        last = len(frames) - 1
+
+        count = max(0, int(np.floor((last - self.position) / self.step)) + 1)
+        positions = self.position + self.step * np.arange(count)
+        indices = positions.astype(np.int64)
+        fractions = (positions - indices).astype(np.float32)[:, np.newaxis]
+        following = np.minimum(indices + 1, last)
+        output = frames[indices] * (1 - fractions) + frames[following] * fractions
+
+        self.position += self.step * count - last
+        frames[0] = frames[last]
+        return output
+
+def main(arguments: Optional[List[str]] = None):
+    """
+    Command line entry, such as python -m PySFBoost.AudioTool assets/sounds build/sounds --rate 44100 --normalize -1.
+
+    Parameters:
+    - arguments: Command line arguments, the ones of the process if it is None.
+    """
+
+    parser = argparse.ArgumentParser(description='Normalize, resample and transcode a tree of sound files.')
+    parser.add_argument('source', help='directory of the source files')
+    parser.add_argument('destination', help='directory of the converted files')
+    parser.add_argument('--format', default='ogg', choices=('ogg', 'wav', 'flac'), help='format of the converted files')
+    parser.add_argument('--rate', type=int, help='sample rate of the converted files')
+    parser.add_argument('--channels', type=int, choices=(1, 2), help='count of channels of the converted files')
+    parser.add_argument('--normalize', type=float, help='peak level in dBFS, such as -1')
+    parser.add_argument('--workers', type=int, help='count of processes, 0 to convert in this process')
+    parser.add_argument('--force', action='store_true', help='convert files which are up to date')
+    args = parser.parse_args(arguments)
+
+    converter = AudioConverter(args.rate, args.channels, args.normalize)
+    results = converter.convert_tree(args.source, args.destination, '.' + args.format, args.workers, args.force)
+    print(f'{len(results)} file(s) converted.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+import struct
+import sys
+from array import array
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Tuple, Union
+from .sfSystem import *
+from .sfGraphics import *
+from .sfNetwork import *
+
+# Fixed size field types and their struct codes. Everything is little-endian, so float arrays can be copied as they are on common hosts.
+_scalars: Dict[str, str] = {
+    'bool': '?',
+    'i8': 'b',
+    'u8': 'B',
+    'i16': 'h',
+    'u16': 'H',
+    'i32': 'i',
+    'u32': 'I',
+    'i64': 'q',
+    'u64': 'Q',
+    'f32': 'f',
+    'f64': 'd',
+}
+
+_vectors: Dict[str, Tuple[str, type]] = {
+    'vec2f': ('ff', Vector2f),
+    'vec2i': ('ii', Vector2i),
+    'vec2u': ('II', Vector2u),
+}
+
+_type_id = struct.Struct('<H')
+_length16 = struct.Struct('<H')
+_length32 = struct.Struct('<I')
+_little_endian = sys.byteorder == 'little'
+
+class Schema:
+    """
+    Layout of a message.
+
+    Consecutive fixed size fields are packed together by one precompiled struct.Struct. Strings, bytes and arrays are prefixed by their length.
+
+    Field types are bool, i8, u8, i16, u16, i32, u32, i64, u64, f32, f64, vec2f, vec2i, vec2u, color, str and bytes, and arrays of numbers or vectors such as 'u16[]' or 'vec2f[]'.
+    """
+
+    def __init__(self, name: str, type_id: int, fields: List[Tuple[str, str]]):
+        """
+        Constructor.
+
+        Parameters:
+        - name: Name of the message.
+        - type_id: Identifier written before the message, from 0 to 65535.
+        - fields: Names and types of the fields, in order.
+        """
+
+        if type_id < 0 or type_id > 0xFFFF:
+            raise ValueError('Type id must be in range [0, 65535].')
+
+        self.name = name
+        self.type_id = type_id
+        self.fields = list(fields)
+        self._ops: List[Tuple] = []
+
+        group: List[Tuple[str, str]] = []
+        for field_name, field_type in self.fields:
+            if field_type in _scalars or field_type in _vectors or field_type == 'color':
+                group.append((field_name, field_type))
+                continue
+            self._flush_group(group)
+            group = []
+            if field_type == 'str' or field_type == 'bytes':
+                self._ops.append((field_type, field_name))
+            elif field_type.endswith('[]') and field_type[:-2] in _scalars and field_type[:-2] != 'bool':
+                self._ops.append(('array', field_name, _scalars[field_type[:-2]], 1, None))
+            elif field_type.endswith('[]') and field_type[:-2] in _vectors:
+                code, vector_type = _vectors[field_type[:-2]]
+                self._ops.append(('array', field_name, code[0], 2, vector_type))
+            else:
+                raise ValueError(f'Unknown field type {field_type!r}.')
+        self._flush_group(group)
+
+    def _flush_group(self, group: List[Tuple[str, str]]):
+        """
+        Compile a group of consecutive fixed size fields into one struct.
+
+        Parameters:
+        - group: Names and types of the fields.
+        """
+
+        if len(group) == 0:
+            return
+
+        codes = []
+        for _, field_type in group:
+            if field_type in _scalars:
+                codes.append(_scalars[field_type])
+            elif field_type in _vectors:
+                codes.append(_vectors[field_type][0])
+            else:
+                codes.append('BBBB')
+        self._ops.append(('struct', struct.Struct('<' + ''.join(codes)), tuple(group)))
+
+class MessageCodec:
+    """
+    Schema-driven message encoder and decoder.
+
+    Messages are written straight into a reusable bytearray through the precompiled structs of their schema, several messages can be written one after the other, and the result is returned as a memoryview which can be sent by a Connection or turned into a Packet.
+    Arrays of vectors given as array('f') or contiguous float32 NumPy arrays of shape (n, 2) are copied in one operation.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Constructor.
+
+        Parameters:
+        - capacity: Initial size of the buffer in bytes, it grows when needed.
+        """
+
+        self._buffer = bytearray(capacity)
+        self._offset = 0
+        self._schemas: Dict[str, Schema] = {}
+        self._schemas_by_id: Dict[int, Schema] = {}
+
+    def register(self, schema: Schema):
+        """
+        Register a message schema.
+
+        Parameters:
+        - schema: The schema.
+        """
+
+        if schema.name in self._schemas or schema.type_id in self._schemas_by_id:
+            raise ValueError(f'Schema {schema.name!r} or type id {schema.type_id} already exists.')
+
+        self._schemas[schema.name] = schema
+        self._schemas_by_id[schema.type_id] = schema
+
+    def get_schema(self, name: str) -> Schema:
+        """
+        Get a registered schema.
+
+        Parameters:
+        - name: Name of the message.
+
+        Returns:
+        - The schema.
+        """
+
+        if name not in self._schemas:
+            raise ValueError(f'Schema {name!r} not found.')
+
+        return self._schemas[name]
+
+    def begin(self):
+        """
+        Start a new batch of messages, the buffer is reused.
+        """
+
+        self._offset = 0
+
+    def write(self, name: str, values: Any):
+        """
+        Append a message to the current batch.
+
+        Parameters:
+        - name: Name of the message.
+        - values: Dict of field values, or object whose attributes are the fields.
+        """
+
+        schema = self.get_schema(name)
+        get = values.__getitem__ if isinstance(values, dict) else values.__getattribute__
+
+        self._reserve(_type_id.size)
+        _type_id.pack_into(self._buffer, self._offset, schema.type_id)
+        self._offset += _type_id.size
+
+        for op in schema._ops:
+            kind = op[0]
+            if kind == 'struct':
+                layout: struct.Struct = op[1]
+                args = []
+                for field_name, field_type in op[2]:
+                    value = get(field_name)
+                    if field_type in _vectors:
+                        args.append(value.x)
+                        args.append(value.y)
+                    elif field_type == 'color':
+                        args.extend((value.r, value.g, value.b, value.a))
+                    else:
+                        args.append(value)
+                self._reserve(layout.size)
+                layout.pack_into(self._buffer, self._offset, *args)
+                self._offset += layout.size
+            elif kind == 'str' or kind == 'bytes':
+                value = get(op[1])
+                data = value.encode('utf-8') if kind == 'str' else value
+                length = _length16 if kind == 'str' else _length32
+                self._reserve(length.size + len(data))
+                length.pack_into(self._buffer, self._offset, len(data))
+                start = self._offset + length.size
+                self._buffer[start:start + len(data)] = data
+                self._offset = start + len(data)
+            else:
+                self._write_array(get(op[1]), op[2], op[3])
+
+    def get_view(self) -> memoryview:
+        """
+        Get the messages written since begin.
+
+        The view stays valid until the next begin, so it can be sent without copying it.
+
+        Returns:
+        - View of the encoded messages.
+        """
+
+        return memoryview(self._buffer)[:self._offset]
+
+    def encode(self, name: str, values: Any) -> memoryview:
+        """
+        Encode a single message.
+
+        Parameters:
+        - name: Name of the message.
+        - values: Dict of field values, or object whose attributes are the fields.
+
+        Returns:
+        - View of the encoded message, valid until the next encode or begin.
+        """
+
+        self.begin()
+        self.write(name, values)
+        return self.get_view()
+
+    def to_packet(self) -> Packet:
+        """
+        Create a packet with the messages written since begin.
+
+        Returns:
+        - The packet.
+        """
+
+        packet = Packet()
+        try:
+            packet.append(self.get_view())
+        except TypeError:
+            packet.append(bytes(self.get_view()))
+        return packet
+
+    def decode(self, data: Union[bytes, bytearray, memoryview], offset: int = 0) -> Tuple[str, Dict[str, Any], int]:
+        """
+        Decode one message.
+
+        Arrays are returned as memoryviews of the data when possible, flattened for vectors, so they can be wrapped by numpy.frombuffer without copying; they are only valid as long as the data is.
+
+        Parameters:
+        - data: Encoded messages.
+        - offset: Offset of the message in the data.
+
+        Returns:
+        - Name of the message, dict of field values and offset after the message.
+        """
+
+        view = memoryview(data)
+        type_id = _type_id.unpack_from(view, offset)[0]
+        if type_id not in self._schemas_by_id:
+            raise ValueError(f'Unknown message type id {type_id}.')
+        schema = self._schemas_by_id[type_id]
+        offset += _type_id.size
+
+        values: Dict[str, Any] = {}
+        for op in schema._ops:
+            kind = op[0]
+            if kind == 'struct':
+                layout: struct.Struct = op[1]
+                unpacked = layout.unpack_from(view, offset)
+                offset += layout.size
+                i = 0
+                for field_name, field_type in op[2]:
+                    if field_type in _vectors:
+                        values[field_name] = _vectors[field_type][1](unpacked[i], unpacked[i + 1])
+                        i += 2
+                    elif field_type == 'color':
+                        values[field_name] = Color(*unpacked[i:i + 4])
+                        i += 4
+                    else:
+                        values[field_name] = unpacked[i]
+                        i += 1
+            elif kind == 'str' or kind == 'bytes':
+                length = _length16 if kind == 'str' else _length32
+                size = length.unpack_from(view, offset)[0]
+                start = offset + length.size
+                raw = view[start:start + size]
+                values[op[1]] = str(raw, 'utf-8') if kind == 'str' else bytes(raw)
+                offset = start + size
+            else:
+                count = _length32.unpack_from(view, offset)[0] * op[3]
+                start = offset + _length32.size
+                size = count * struct.calcsize(op[2])
+                values[op[1]] = self._read_array(view[start:start + size], op[2])
+                offset = start + size
+
+        return schema.name, values, offset
+
+    def decode_all(self, data: Union[bytes, bytearray, memoryview]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Decode all messages written one after the other.
+
+        Parameters:
+        - data: Encoded messages.
+
+        Returns:
+        - Iterator of names and dicts of field values.
+        """
+
+        offset = 0
+        while offset < len(data):
+            name, values, offset = self.decode(data, offset)
+            yield name, values
+
+    def _reserve(self, size: int):
+        """
+        Make sure the buffer can hold size more bytes.
+
+        A bigger buffer is allocated instead of resizing the current one, so views returned before stay valid.
+
+        Parameters:
+        - size: Count of bytes to write.
+        """
+
+        needed = self._offset + size
+        if needed <= len(self._buffer):
+            return
+
+        buffer = bytearray(max(needed, len(self._buffer) * 2))
+        buffer[:self._offset] = self._buffer[:self._offset]
+        self._buffer = buffer
+
+    def _write_array(self, values: Any, code: str, components: int):
+        """
+        Write an array prefixed by its count of elements.
+
+        Parameters:
+        - values: Sequence of numbers or vectors, or a buffer such as array or a NumPy array.
+        - code: Struct code of a component.
+        - components: Count of components of an element.
+        """
+
+        item_size = struct.calcsize(code)
+        try:
+            data = memoryview(values)
+        except TypeError:
+            data = None
+
+        if data is not None and data.format == code and data.c_contiguous and _little_endian:
+            data = data.cast('B')
+            count = len(data) // (item_size * components)
+        else:
+            if components == 2:
+                flat = array(code, chain.from_iterable((value.x, value.y) for value in values))
+            else:
+                flat = array(code, values)
+            if not _little_endian:
+                flat.byteswap()
+            count = len(flat) // components
+            data = memoryview(flat).cast('B')
+
+        self._reserve(_length32.size + len(data))
+        _length32.pack_into(self._buffer, self._offset, count)
+        start = self._offset + _length32.size
+        self._buffer[start:start + len(data)] = data
+        self._offset = start + len(data)
+
+    def _read_array(self, data: memoryview, code: str) -> Union[memoryview, array]:
+        """
+        Read the components of an array.
+
+        Parameters:
+        - data: Bytes of the array.
+        - code: Struct code of a component.
+
+        Returns:
+        - View of the components, or a copy if the host is big-endian.
+        """
+
+        if _little_endian:
+            return data.cast(code)
+        result = array(code, data.tobytes())
+        result.byteswap()
+        return result
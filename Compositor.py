@@ -0,0 +1,381 @@
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+from .sfSystem import *
+from .sfGraphics import *
+from .Time import Profiler
+from .RenderStateMgr import RenderStateMgr
+
+class Layer:
+    """
+    Layer of a LayerCompositor.
+
+    Members are drawables, or objects with a display(target, states=None) method such as ParticleMgr and AnimationMgr.
+    Changes are detected automatically only for members with get_transform, such as sprites and shapes. Managers must be reported with LayerCompositor.notify_changed.
+    A cached layer renders its members into its own RenderTexture only when it is dirty, then it is drawn with a single sprite.
+    Members are added and removed through the LayerCompositor, which keeps track of the layer of each member.
+    """
+
+    def __init__(self, z: int, cached: bool, auto_detect: bool, area: FloatRect):
+        """
+        Constructor, layers are created by LayerCompositor.create_layer.
+
+        Parameters:
+        - z: Layer index.
+        - cached: Whether the layer is rendered into a cached texture.
+        - auto_detect: Whether the members are checked for changes at every display.
+        - area: Area of the world covered by the cached texture.
+        """
+
+        self.z = z
+        self.cached = cached
+        self.auto_detect = auto_detect
+        self.visible = True
+        self._area = area
+        self._members: List[Any] = []
+        self._signatures: List[Optional[Tuple]] = []
+        self._texture: Optional[RenderTexture] = None
+        self._sprite: Optional[Sprite] = None
+        self._dirty = True
+        self._redraw_count = 0
+
+    def _add(self, member: Any):
+        self._members.append(member)
+        self._signatures.append(None)
+        self._dirty = True
+
+    def _remove(self, member: Any):
+        for i, other in enumerate(self._members):
+            if other is member:
+                del self._members[i]
+                del self._signatures[i]
+                self._dirty = True
+                return
+        raise ValueError('Member not found.')
+
+    def _clear(self):
+        self._members.clear()
+        self._signatures.clear()
+        self._dirty = True
+
+    def get_members(self) -> List[Any]:
+        """
+        Get the members of the layer.
+
+        Returns:
+        - Members in drawing order.
+        """
+
+        return self._members.copy()
+
+    def invalidate(self):
+        """
+        Mark the layer as dirty, a cached layer is rendered again at the next display.
+        """
+
+        self._dirty = True
+
+    def is_dirty(self) -> bool:
+        """
+        Check if the layer will be rendered again at the next display.
+
+        Returns:
+        - True if the layer is dirty, False otherwise.
+        """
+
+        return self._dirty
+
+    def get_area(self) -> FloatRect:
+        """
+        Get the area of the world covered by the cached texture.
+
+        Returns:
+        - Area of the layer.
+        """
+
+        return self._area
+
+    def set_area(self, area: FloatRect):
+        """
+        Set the area of the world covered by the cached texture, the texture is created again if its size changes.
+
+        Parameters:
+        - area: Area of the layer.
+        """
+
+        self._area = area
+        self._dirty = True
+
+    def get_texture(self) -> Optional[Texture]:
+        """
+        Get the cached texture of the layer.
+
+        Returns:
+        - Cached texture, None if the layer is not cached or has never been rendered.
+        """
+
+        if self._texture is None:
+            return None
+        return self._texture.get_texture()
+
+    def get_redraw_count(self) -> int:
+        """
+        Get how many times the members were rendered into the cached texture.
+
+        Returns:
+        - Count of redraws.
+        """
+
+        return self._redraw_count
+
+    def _detect_changes(self):
+        """
+        Compare the transform and color of every member with the ones of the last render.
+        """
+
+        for i, member in enumerate(self._members):
+            signature = _signature(member)
+            if signature != self._signatures[i]:
+                self._signatures[i] = signature
+                self._dirty = True
+
+    def _render(self):
+        """
+        Render the members into the cached texture.
+        """
+
+        size = Vector2u(max(1, int(self._area.size.x)), max(1, int(self._area.size.y)))
+        if self._texture is None or self._texture.get_size() != size:
+            self._texture = RenderTexture(size)
+            self._sprite = Sprite(self._texture.get_texture())
+
+        self._texture.set_view(View(self._area))
+        self._texture.clear(Color.transparent())
+        for member in self._members:
+            _draw_member(self._texture, member, None)
+        self._texture.display()
+
+        self._sprite.set_position(self._area.position)
+        self._dirty = False
+        self._redraw_count += 1
+        if Profiler.enabled:
+            Profiler.count('layer_redraws')
+
+class LayerCompositor:
+    """
+    Layer compositor class.
+
+    It draws layers in increasing z order. Rarely changing layers, such as backgrounds or a HUD, can be cached: their members are rendered into a RenderTexture only when the layer is invalidated, and the texture is drawn with one sprite every frame.
+    A layer is invalidated by adding or removing a member, by notify_changed, by invalidate, or, when auto_detect is enabled, by a change of the transform or color of a member.
+    """
+
+    def __init__(self, size: Vector2u):
+        """
+        Constructor.
+
+        Parameters:
+        - size: Default size of the cached layers, usually the size of the window.
+        """
+
+        self._size = size
+        self._layers: Dict[int, Layer] = {}
+        self._z_list: List[int] = []
+        self._member_to_z: Dict[int, int] = {}
+        # Cached textures hold premultiplied colors, as they are rendered with alpha blending on a transparent background.
+        self._composite_states = RenderStates.default()
+        self._composite_states.blend_mode = RenderStateMgr.premultiplied_alpha()
+        # Takes the transform and shader of the states given to display, the default composite states are never modified.
+        self._custom_states = RenderStates.default()
+        self._custom_states.blend_mode = RenderStateMgr.premultiplied_alpha()
+
+    def create_layer(self, z: int, cached: bool = False, auto_detect: bool = False, area: Optional[FloatRect] = None) -> Layer:
+        """
+        Create a layer.
+
+        Parameters:
+        - z: Layer index.
+        - cached: Whether the layer is rendered into a cached texture.
+        - auto_detect: Whether the transforms and colors of the members are checked for changes at every display, so members can be moved without invalidating the layer by hand. Only members with get_transform are checked, changes of managers such as ParticleMgr must be reported with notify_changed.
+        - area: Area of the world covered by the cached texture, from (0, 0) to the size of the compositor if it is None.
+
+        Returns:
+        - The layer.
+        """
+
+        if z in self._layers:
+            raise ValueError(f'Layer {z} already exists.')
+
+        if area is None:
+            area = FloatRect(Vector2f(0, 0), Vector2f(self._size.x, self._size.y))
+        layer = Layer(z, cached, auto_detect, area)
+        self._layers[z] = layer
+        bisect.insort(self._z_list, z)
+        return layer
+
+    def get_layer(self, z: int) -> Layer:
+        """
+        Get a layer.
+
+        Parameters:
+        - z: Layer index.
+
+        Returns:
+        - The layer.
+        """
+
+        if z not in self._layers:
+            raise ValueError(f'Layer {z} not found.')
+
+        return self._layers[z]
+
+    def remove_layer(self, z: int):
+        """
+        Remove a layer and its members.
+
+        Parameters:
+        - z: Layer index.
+        """
+
+        layer = self.get_layer(z)
+        for member in layer._members:
+            del self._member_to_z[id(member)]
+        del self._layers[z]
+        self._z_list.remove(z)
+
+    def get_z_list(self) -> List[int]:
+        """
+        Get the list of layer indices.
+
+        Returns:
+        - Layer indices in drawing order.
+        """
+
+        return self._z_list.copy()
+
+    def add(self, member: Any, z: int = 0):
+        """
+        Add a member to a layer, an uncached layer is created if it does not exist.
+
+        Parameters:
+        - member: Drawable, or object with a display(target, states=None) method.
+        - z: Layer index.
+        """
+
+        if id(member) in self._member_to_z:
+            raise ValueError('Member already exists.')
+
+        if z not in self._layers:
+            self.create_layer(z)
+        self._layers[z]._add(member)
+        self._member_to_z[id(member)] = z
+
+    def remove(self, member: Any):
+        """
+        Remove a member from its layer.
+
+        Parameters:
+        - member: Member to remove.
+        """
+
+        if id(member) not in self._member_to_z:
+            raise ValueError('Member not found.')
+
+        self._layers[self._member_to_z.pop(id(member))]._remove(member)
+
+    def clear_layer(self, z: int):
+        """
+        Remove all members of a layer, the layer is kept.
+
+        Parameters:
+        - z: Layer index.
+        """
+
+        layer = self.get_layer(z)
+        for member in layer._members:
+            del self._member_to_z[id(member)]
+        layer._clear()
+
+    def notify_changed(self, member: Any):
+        """
+        Invalidate the layer of a member, call it after changing a member of a cached layer.
+
+        Parameters:
+        - member: Changed member.
+        """
+
+        if id(member) not in self._member_to_z:
+            raise ValueError('Member not found.')
+
+        self._layers[self._member_to_z[id(member)]].invalidate()
+
+    def invalidate(self, z: Optional[int] = None):
+        """
+        Invalidate a layer, or all layers.
+
+        Parameters:
+        - z: Layer index, all layers are invalidated if it is None.
+        """
+
+        if z is None:
+            for layer in self._layers.values():
+                layer.invalidate()
+        else:
+            self.get_layer(z).invalidate()
+
+    @Profiler.profile('LayerCompositor.display')
+    def display(self, target: RenderTarget, states: Optional[RenderStates] = None):
+        """
+        Draw all visible layers, cached layers are rendered again first if they are dirty.
+
+        Parameters:
+        - target: Render target.
+        - states: Render states.
+        """
+
+        draw_calls = 0
+        for z in self._z_list:
+            layer = self._layers[z]
+            if not layer.visible:
+                continue
+
+            if not layer.cached:
+                for member in layer._members:
+                    _draw_member(target, member, states)
+                continue
+
+            if layer.auto_detect:
+                layer._detect_changes()
+            if layer._dirty or layer._texture is None:
+                layer._render()
+
+            if states is None:
+                composite_states = self._composite_states
+            else:
+                composite_states = self._custom_states
+                composite_states.transform = states.transform
+                composite_states.shader = states.shader
+            target.draw(layer._sprite, composite_states)
+            draw_calls += 1
+
+        if Profiler.enabled:
+            Profiler.count('draw_calls', draw_calls)
+
+def _draw_member(target: RenderTarget, member: Any, states: Optional[RenderStates]):
+    if isinstance(member, Drawable):
+        if states is None:
+            target.draw(member)
+        else:
+            target.draw(member, states)
+    elif states is None:
+        member.display(target)
+    else:
+        member.display(target, states=states)
+
+def _signature(member: Any) -> Optional[Tuple]:
+    # Members without a transform, such as managers, have no signature and never invalidate their layer by themselves.
+    if not hasattr(member, 'get_transform'):
+        return None
+    matrix = tuple(member.get_transform().get_matrix())
+    color = member.get_color() if hasattr(member, 'get_color') else None
+    if color is None:
+        return (matrix,)
+    return (matrix, color.r, color.g, color.b, color.a)
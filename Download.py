@@ -0,0 +1,539 @@
+import ftplib
+import hashlib
+import http.client
+import http.server
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from .sfSystem import *
+from .ResourceMgr import TextureMgr
+
+HostKey = Tuple[str, str, int]
+
+class DownloadTask:
+    """
+    Handle of a download, returned by Downloader.download.
+    """
+
+    def __init__(self, url: str, path: str, checksum: Optional[str], pak: Optional[Dict[str, Any]]):
+        """
+        Constructor.
+
+        Parameters:
+        - url: URL of the file.
+        - path: Local path of the file.
+        - checksum: Expected digest as 'algorithm:hex', or a SHA-256 hex digest. None to skip the check.
+        - pak: Asset pack the content is stored into, None to only write the file.
+        """
+
+        self.url = url
+        self.path = path
+        self.checksum = checksum
+        self.pak = pak
+        self.received = 0
+        self.size = -1
+        self.resumed_from = 0
+        self._future: Optional[Future] = None
+        self._error: Optional[BaseException] = None
+
+    def wait(self, timeout: Optional[Time] = None) -> bool:
+        """
+        Wait for the download to finish.
+
+        Parameters:
+        - timeout: Maximum time to wait, None to wait until it finishes.
+
+        Returns:
+        - True if the file was downloaded and verified, False otherwise.
+        """
+
+        try:
+            self._future.result(None if timeout is None else timeout.as_seconds())
+        except BaseException:
+            return False
+        return self._error is None
+
+    def is_done(self) -> bool:
+        """
+        Check if the download is finished, successfully or not.
+
+        Returns:
+        - True if it is finished, False otherwise.
+        """
+
+        return self._future is not None and self._future.done()
+
+    def get_error(self) -> Optional[BaseException]:
+        """
+        Get the error of a failed download.
+
+        Returns:
+        - The error, None if there is none.
+        """
+
+        return self._error
+
+    def get_progress(self) -> float:
+        """
+        Get the progress of the download.
+
+        Returns:
+        - Progress in range [0, 1], 0 if the size is not known yet.
+        """
+
+        if self.size <= 0:
+            return 0.0
+        return min(1.0, self.received / self.size)
+
+class Downloader:
+    """
+    Concurrent asset downloader.
+
+    Downloads run on a pool of worker threads. HTTP connections are kept alive and reused for every file of the same host, FTP sessions too.
+    Files are written to a .part file first, so an interrupted download is resumed with a ranged request, and moved to their path once their checksum is verified. A texture already loaded by TextureMgr from that path is released by update, on the main thread, so the new file is used.
+    """
+
+    def __init__(self, directory: str = 'assets', workers: int = 8, timeout: Time = Time.FromSeconds(30), chunk_size: int = 65536, retries: int = 2):
+        """
+        Constructor.
+
+        Parameters:
+        - directory: Directory the files are written to, the assets folder used by the resource managers by default.
+        - workers: Count of worker threads, which is also the maximum count of connections per host.
+        - timeout: Timeout of the socket operations.
+        - chunk_size: Size of the chunks read from the network and written to the files.
+        - retries: Count of retries of a failed download, the transfer is resumed where it stopped.
+        """
+
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self._timeout = timeout.as_seconds()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='Downloader')
+        self._pools: Dict[HostKey, queue.SimpleQueue] = {}
+        self._pools_lock = threading.Lock()
+        self._pak_lock = threading.Lock()
+        # Paths of the installed files, whose textures are released on the main thread.
+        self._installed: queue.SimpleQueue = queue.SimpleQueue()
+        self._connections_opened = 0
+
+    def download(self, url: str, path: Optional[str] = None, checksum: Optional[str] = None, pak: Optional[Dict[str, Any]] = None) -> DownloadTask:
+        """
+        Start downloading a file.
+
+        Parameters:
+        - url: http://, https:// or ftp:// URL of the file.
+        - path: Path of the file relative to the directory, the path of the URL if it is None. It must not lead outside the directory.
+        - checksum: Expected digest as 'algorithm:hex', such as 'md5:...', or a SHA-256 hex digest. None to skip the check.
+        - pak: Asset pack dict whose nested keys are the parts of the path, the content is stored into it once verified.
+
+        Returns:
+        - Handle of the download.
+        """
+
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https', 'ftp'):
+            raise ValueError(f'Unsupported URL {url}.')
+        if path is None:
+            path = parts.path.lstrip('/')
+
+        directory = os.path.abspath(self.directory)
+        path = os.path.normpath(os.path.join(self.directory, path))
+        full_path = os.path.abspath(path)
+        if full_path == directory or os.path.commonpath([directory, full_path]) != directory:
+            raise ValueError(f'Path of {url} leads outside {self.directory}.')
+
+        task = DownloadTask(url, path, checksum, pak)
+        task._future = self._executor.submit(self._run, task)
+        return task
+
+    def download_all(self, items: List[Union[str, Tuple[str, str], Tuple[str, str, str]]], pak: Optional[Dict[str, Any]] = None) -> List[DownloadTask]:
+        """
+        Start downloading several files.
+
+        Parameters:
+        - items: URLs, or tuples of URL, relative path and optionally checksum.
+        - pak: Asset pack the contents are stored into.
+
+        Returns:
+        - Handles of the downloads.
+        """
+
+        tasks = []
+        for item in items:
+            if isinstance(item, str):
+                tasks.append(self.download(item, pak=pak))
+            else:
+                tasks.append(self.download(*item, pak=pak))
+        return tasks
+
+    def wait_all(self, tasks: List[DownloadTask]) -> bool:
+        """
+        Wait for several downloads to finish.
+
+        Parameters:
+        - tasks: Handles of the downloads.
+
+        Returns:
+        - True if all files were downloaded and verified, False otherwise.
+        """
+
+        results = [task.wait() for task in tasks]
+        self.update()
+        return all(results)
+
+    def update(self):
+        """
+        Release the textures loaded by TextureMgr from the files installed since the last call, so the new files are used.
+
+        It must be called from the main thread, such as once per frame, since TextureMgr is not thread-safe. wait_all and close call it too.
+        """
+
+        while True:
+            try:
+                path = self._installed.get_nowait()
+            except queue.Empty:
+                return
+            texture_path = path.replace(os.sep, '/')
+            if TextureMgr.has_texture(texture_path):
+                TextureMgr.release_texture(texture_path)
+
+    def get_connection_count(self) -> int:
+        """
+        Get the count of connections opened so far, lower than the count of downloads when connections are reused.
+
+        Returns:
+        - Count of connections.
+        """
+
+        return self._connections_opened
+
+    def close(self):
+        """
+        Wait for the running downloads, release the textures of the installed files and close the idle connections.
+        """
+
+        self._executor.shutdown(wait=True)
+        self.update()
+        with self._pools_lock:
+            for pool in self._pools.values():
+                while not pool.empty():
+                    self._close_connection(pool.get_nowait())
+            self._pools.clear()
+
+    def __enter__(self) -> 'Downloader':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self, task: DownloadTask):
+        """
+        Download a file with retries, then verify and install it.
+
+        Parameters:
+        - task: Handle of the download.
+        """
+
+        for _ in range(self.retries + 1):
+            try:
+                self._transfer(task)
+                self._install(task)
+                task._error = None
+                return
+            except Exception as error:
+                task._error = error
+
+    def _transfer(self, task: DownloadTask):
+        """
+        Transfer a file into its .part file, resuming it if it exists.
+
+        Parameters:
+        - task: Handle of the download.
+        """
+
+        part_path = task.path + '.part'
+        os.makedirs(os.path.dirname(part_path) or '.', exist_ok=True)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        task.resumed_from = offset
+        parts = urlsplit(task.url)
+        key = (parts.scheme, parts.hostname, parts.port or {'http': 80, 'https': 443, 'ftp': 21}[parts.scheme])
+        connection = self._acquire(key)
+        reusable = False
+        try:
+            with open(part_path, 'ab' if offset > 0 else 'wb') as file:
+                if parts.scheme == 'ftp':
+                    self._transfer_ftp(connection, parts.path, file, offset, task)
+                    reusable = True
+                else:
+                    reusable = self._transfer_http(connection, parts, file, offset, task)
+        finally:
+            if reusable:
+                self._pools[key].put(connection)
+            else:
+                self._close_connection(connection)
+
+    def _transfer_http(self, connection: http.client.HTTPConnection, parts: Any, file: Any, offset: int, task: DownloadTask) -> bool:
+        target = parts.path + ('?' + parts.query if parts.query else '')
+        headers = {'Range': f'bytes={offset}-'} if offset > 0 else {}
+        connection.request('GET', target, headers=headers)
+        response = connection.getresponse()
+
+        if response.status == 416 and offset > 0:
+            # The .part file already holds the whole file.
+            response.read()
+            task.size = task.received = offset
+            return not response.will_close
+        if response.status == 200 and offset > 0:
+            file.seek(0)
+            file.truncate()
+            task.resumed_from = offset = 0
+        elif response.status not in (200, 206):
+            response.read()
+            raise ConnectionError(f'HTTP {response.status} for {task.url}.')
+
+        length = response.getheader('Content-Length')
+        task.size = offset + int(length) if length is not None else -1
+        task.received = offset
+        while True:
+            chunk = response.read(self.chunk_size)
+            if not chunk:
+                break
+            file.write(chunk)
+            task.received += len(chunk)
+        if task.size >= 0 and task.received < task.size:
+            raise ConnectionError(f'Transfer of {task.url} was interrupted.')
+        return not response.will_close
+
+    def _transfer_ftp(self, connection: ftplib.FTP, path: str, file: Any, offset: int, task: DownloadTask):
+        try:
+            task.size = connection.size(path) or -1
+        except ftplib.Error:
+            task.size = -1
+        task.received = offset
+
+        def write(chunk: bytes):
+            file.write(chunk)
+            task.received += len(chunk)
+
+        connection.retrbinary(f'RETR {path}', write, self.chunk_size, offset if offset > 0 else None)
+
+    def _install(self, task: DownloadTask):
+        """
+        Verify the checksum of the .part file, move it to its path and store it into the asset pack.
+
+        Parameters:
+        - task: Handle of the download.
+        """
+
+        part_path = task.path + '.part'
+        if task.checksum is not None:
+            algorithm, _, expected = task.checksum.rpartition(':')
+            digest = hashlib.new(algorithm or 'sha256')
+            with open(part_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(self.chunk_size), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != expected.lower():
+                os.remove(part_path)
+                raise ValueError(f'Checksum mismatch for {task.url}.')
+
+        os.replace(part_path, task.path)
+        self._installed.put(task.path)
+
+        if task.pak is not None:
+            with open(task.path, 'rb') as file:
+                content = file.read()
+            keys = os.path.relpath(task.path, self.directory).replace(os.sep, '/').split('/')
+            with self._pak_lock:
+                ref = task.pak
+                for key in keys[:-1]:
+                    ref = ref.setdefault(key, {})
+                ref[keys[-1]] = content
+
+    def _acquire(self, key: HostKey) -> Union[http.client.HTTPConnection, ftplib.FTP]:
+        """
+        Take an idle connection to a host, or open a new one.
+
+        Parameters:
+        - key: Scheme, host and port.
+
+        Returns:
+        - The connection.
+        """
+
+        with self._pools_lock:
+            pool = self._pools.setdefault(key, queue.SimpleQueue())
+            try:
+                return pool.get_nowait()
+            except queue.Empty:
+                self._connections_opened += 1
+
+        scheme, host, port = key
+        if scheme == 'ftp':
+            connection = ftplib.FTP(timeout=self._timeout)
+            connection.connect(host, port)
+            connection.login()
+            return connection
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self._timeout)
+        return http.client.HTTPConnection(host, port, timeout=self._timeout)
+
+    def _close_connection(self, connection: Union[http.client.HTTPConnection, ftplib.FTP]):
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+class _RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Static file handler supporting keep-alive and single byte ranges.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        header = self.headers.get('Range')
+        if header is not None and header.startswith('bytes='):
+            first, _, last = header[6:].partition('-')
+            start = int(first) if first else 0
+            end = min(int(last), size - 1) if last else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        with open(path, 'rb') as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(65536, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def log_message(self, format: str, *args):
+        pass
+
+class LocalHttpServer:
+    """
+    Static HTTP server on the local host running on its own thread, standing in for an asset server in local tests and benchmarks.
+
+    It supports keep-alive connections and ranged requests.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Constructor.
+
+        Parameters:
+        - directory: Directory whose files are served.
+        """
+
+        self.directory = directory
+        self._server: Optional[http.server.ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> int:
+        """
+        Start the server thread.
+
+        Returns:
+        - Port the server listens to.
+        """
+
+        directory = self.directory
+
+        class Handler(_RangeRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=directory, **kwargs)
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.connection_count = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self.get_port()
+
+    def stop(self):
+        """
+        Stop the server thread.
+        """
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    def get_port(self) -> int:
+        """
+        Get the port the server listens to.
+
+        Returns:
+        - Port of the server, 0 if it is not started.
+        """
+
+        if self._server is None:
+            return 0
+        return self._server.server_address[1]
+
+    def get_url(self, path: str) -> str:
+        """
+        Get the URL of a served file.
+
+        Parameters:
+        - path: Path of the file relative to the directory.
+
+        Returns:
+        - URL of the file.
+        """
+
+        return f'http://127.0.0.1:{self.get_port()}/{path.lstrip("/")}'
+
+    def get_connection_count(self) -> int:
+        """
+        Get the count of connections accepted so far.
+
+        Returns:
+        - Count of connections.
+        """
+
+        if self._server is None:
+            return 0
+        return self._server.connection_count
+
+    def __enter__(self) -> 'LocalHttpServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,602 @@
+import enum
+import json
+from array import array
+from collections import namedtuple
+from typing import Any, Callable, List, Optional, Tuple
+from .sfSystem import *
+from .sfWindow import *
+
+class EventType(enum.IntEnum):
+    """
+    Index of the event subtypes, in the order of sf::Event.
+    """
+
+    Closed = 0
+    Resized = 1
+    FocusLost = 2
+    FocusGained = 3
+    TextEntered = 4
+    KeyPressed = 5
+    KeyReleased = 6
+    MouseWheelScrolled = 7
+    MouseButtonPressed = 8
+    MouseButtonReleased = 9
+    MouseMoved = 10
+    MouseMovedRaw = 11
+    MouseEntered = 12
+    MouseLeft = 13
+    JoystickButtonPressed = 14
+    JoystickButtonReleased = 15
+    JoystickMoved = 16
+    JoystickConnected = 17
+    JoystickDisconnected = 18
+    TouchBegan = 19
+    TouchMoved = 20
+    TouchEnded = 21
+    SensorChanged = 22
+
+_key_fields = (('code', Keyboard.Key), ('scancode', Keyboard.Scan), ('alt', None), ('control', None), ('shift', None), ('system', None))
+_mouse_button_fields = (('button', Mouse.Button), ('position', Vector2i))
+_joystick_button_fields = (('joystick_id', None), ('button', None))
+_touch_fields = (('finger', None), ('position', Vector2i))
+
+# Fields of every subtype with their type, used to record events and to rebuild them on replay.
+_event_fields: Tuple[Tuple[Tuple[str, Any], ...], ...] = (
+    (),
+    (('size', Vector2u),),
+    (),
+    (),
+    (('unicode', None),),
+    _key_fields,
+    _key_fields,
+    (('wheel', Mouse.Wheel), ('delta', None), ('position', Vector2i)),
+    _mouse_button_fields,
+    _mouse_button_fields,
+    (('position', Vector2i),),
+    (('delta', Vector2i),),
+    (),
+    (),
+    _joystick_button_fields,
+    _joystick_button_fields,
+    (('joystick_id', None), ('axis', Joystick.Axis), ('position', None)),
+    (('joystick_id', None),),
+    (('joystick_id', None),),
+    _touch_fields,
+    _touch_fields,
+    _touch_fields,
+    (('sensor_type', Sensor.Type), ('value', Vector3f)),
+)
+
+_replay_types = [namedtuple(event_type.name, [name for name, _ in _event_fields[event_type]]) for event_type in EventType]
+
+class InputState:
+    """
+    Snapshot of the keyboard, mouse and joystick state, updated from the events.
+
+    The state is stored in compact arrays indexed by key, button and axis codes. Pressed and released flags only last until the next poll.
+    """
+
+    key_count = 256
+    mouse_button_count = 8
+    joystick_count = 8
+    joystick_button_count = 32
+    joystick_axis_count = 8
+
+    def __init__(self):
+        """
+        Default constructor.
+        """
+
+        self.keys = bytearray(self.key_count)
+        self.keys_pressed = bytearray(self.key_count)
+        self.keys_released = bytearray(self.key_count)
+        self.mouse_buttons = bytearray(self.mouse_button_count)
+        self.mouse_pressed = bytearray(self.mouse_button_count)
+        self.mouse_released = bytearray(self.mouse_button_count)
+        self.mouse_position = array('i', (0, 0))
+        self.mouse_delta = array('i', (0, 0))
+        self.wheel_delta = 0.0
+        self.joystick_buttons = bytearray(self.joystick_count * self.joystick_button_count)
+        self.joystick_axes = array('f', bytes(4 * self.joystick_count * self.joystick_axis_count))
+        self.text: List[str] = []
+        self.closed = False
+        self.focused = True
+        # Indices of the flags set since the last poll, so clearing them does not scan the arrays.
+        self._touched_keys: List[int] = []
+        self._touched_buttons: List[int] = []
+
+    def is_key_down(self, key: Keyboard.Key) -> bool:
+        """
+        Check if a key is held.
+
+        Parameters:
+        - key: Key code.
+
+        Returns:
+        - True if the key is held, False otherwise.
+        """
+
+        return 0 <= key < self.key_count and self.keys[key] != 0
+
+    def was_key_pressed(self, key: Keyboard.Key) -> bool:
+        """
+        Check if a key was pressed since the last poll.
+
+        Parameters:
+        - key: Key code.
+
+        Returns:
+        - True if the key was pressed, False otherwise.
+        """
+
+        return 0 <= key < self.key_count and self.keys_pressed[key] != 0
+
+    def was_key_released(self, key: Keyboard.Key) -> bool:
+        """
+        Check if a key was released since the last poll.
+
+        Parameters:
+        - key: Key code.
+
+        Returns:
+        - True if the key was released, False otherwise.
+        """
+
+        return 0 <= key < self.key_count and self.keys_released[key] != 0
+
+    def is_mouse_down(self, button: Mouse.Button) -> bool:
+        """
+        Check if a mouse button is held.
+
+        Parameters:
+        - button: Mouse button.
+
+        Returns:
+        - True if the button is held, False otherwise.
+        """
+
+        return self.mouse_buttons[button] != 0
+
+    def was_mouse_pressed(self, button: Mouse.Button) -> bool:
+        """
+        Check if a mouse button was pressed since the last poll.
+
+        Parameters:
+        - button: Mouse button.
+
+        Returns:
+        - True if the button was pressed, False otherwise.
+        """
+
+        return self.mouse_pressed[button] != 0
+
+    def was_mouse_released(self, button: Mouse.Button) -> bool:
+        """
+        Check if a mouse button was released since the last poll.
+
+        Parameters:
+        - button: Mouse button.
+
+        Returns:
+        - True if the button was released, False otherwise.
+        """
+
+        return self.mouse_released[button] != 0
+
+    def get_mouse_position(self) -> Vector2i:
+        """
+        Get the mouse position relative to the window, from the latest mouse event.
+
+        Returns:
+        - Mouse position.
+        """
+
+        return Vector2i(self.mouse_position[0], self.mouse_position[1])
+
+    def get_mouse_delta(self) -> Vector2i:
+        """
+        Get the raw mouse movement since the last poll.
+
+        Returns:
+        - Sum of the raw mouse movements.
+        """
+
+        return Vector2i(self.mouse_delta[0], self.mouse_delta[1])
+
+    def is_joystick_down(self, joystick: int, button: int) -> bool:
+        """
+        Check if a joystick button is held.
+
+        Parameters:
+        - joystick: Joystick index.
+        - button: Button index.
+
+        Returns:
+        - True if the button is held, False otherwise.
+        """
+
+        return self.joystick_buttons[joystick * self.joystick_button_count + button] != 0
+
+    def get_joystick_axis(self, joystick: int, axis: Joystick.Axis) -> float:
+        """
+        Get the position of a joystick axis.
+
+        Parameters:
+        - joystick: Joystick index.
+        - axis: Axis.
+
+        Returns:
+        - Position of the axis, from -100 to 100.
+        """
+
+        return self.joystick_axes[joystick * self.joystick_axis_count + axis]
+
+    def copy(self) -> 'InputState':
+        """
+        Copy the state, such as to compare it with the one of the next frame.
+
+        Returns:
+        - The copy.
+        """
+
+        state = InputState.__new__(InputState)
+        for name, value in self.__dict__.items():
+            setattr(state, name, value[:] if isinstance(value, (bytearray, array, list)) else value)
+        return state
+
+    def _begin(self):
+        for key in self._touched_keys:
+            self.keys_pressed[key] = 0
+            self.keys_released[key] = 0
+        for button in self._touched_buttons:
+            self.mouse_pressed[button] = 0
+            self.mouse_released[button] = 0
+        self._touched_keys.clear()
+        self._touched_buttons.clear()
+        self.mouse_delta[0] = self.mouse_delta[1] = 0
+        self.wheel_delta = 0.0
+        self.text.clear()
+        self.closed = False
+
+def _on_closed(state: InputState, event):
+    state.closed = True
+
+def _on_focus_lost(state: InputState, event):
+    state.focused = False
+    # Releases are not received without focus, held keys and buttons would stay down.
+    state.keys[:] = bytes(state.key_count)
+    state.mouse_buttons[:] = bytes(state.mouse_button_count)
+
+def _on_focus_gained(state: InputState, event):
+    state.focused = True
+
+def _on_text_entered(state: InputState, event):
+    state.text.append(event.unicode)
+
+def _on_key_pressed(state: InputState, event):
+    key = int(event.code)
+    if 0 <= key < state.key_count:
+        state.keys[key] = 1
+        state.keys_pressed[key] = 1
+        state._touched_keys.append(key)
+
+def _on_key_released(state: InputState, event):
+    key = int(event.code)
+    if 0 <= key < state.key_count:
+        state.keys[key] = 0
+        state.keys_released[key] = 1
+        state._touched_keys.append(key)
+
+def _on_mouse_wheel_scrolled(state: InputState, event):
+    state.wheel_delta += event.delta
+
+def _on_mouse_button_pressed(state: InputState, event):
+    button = int(event.button)
+    state.mouse_buttons[button] = 1
+    state.mouse_pressed[button] = 1
+    state._touched_buttons.append(button)
+    _on_mouse_moved(state, event)
+
+def _on_mouse_button_released(state: InputState, event):
+    button = int(event.button)
+    state.mouse_buttons[button] = 0
+    state.mouse_released[button] = 1
+    state._touched_buttons.append(button)
+    _on_mouse_moved(state, event)
+
+def _on_mouse_moved(state: InputState, event):
+    position = event.position
+    state.mouse_position[0] = position.x
+    state.mouse_position[1] = position.y
+
+def _on_mouse_moved_raw(state: InputState, event):
+    delta = event.delta
+    state.mouse_delta[0] += delta.x
+    state.mouse_delta[1] += delta.y
+
+def _on_joystick_button_pressed(state: InputState, event):
+    state.joystick_buttons[event.joystick_id * state.joystick_button_count + event.button] = 1
+
+def _on_joystick_button_released(state: InputState, event):
+    state.joystick_buttons[event.joystick_id * state.joystick_button_count + event.button] = 0
+
+def _on_joystick_moved(state: InputState, event):
+    state.joystick_axes[event.joystick_id * state.joystick_axis_count + int(event.axis)] = event.position
+
+def _on_joystick_disconnected(state: InputState, event):
+    start = event.joystick_id * state.joystick_button_count
+    state.joystick_buttons[start:start + state.joystick_button_count] = bytes(state.joystick_button_count)
+    start = event.joystick_id * state.joystick_axis_count
+    for i in range(start, start + state.joystick_axis_count):
+        state.joystick_axes[i] = 0.0
+
+_state_updates: List[Optional[Callable[[InputState, Any], None]]] = [None] * len(EventType)
+_state_updates[EventType.Closed] = _on_closed
+_state_updates[EventType.FocusLost] = _on_focus_lost
+_state_updates[EventType.FocusGained] = _on_focus_gained
+_state_updates[EventType.TextEntered] = _on_text_entered
+_state_updates[EventType.KeyPressed] = _on_key_pressed
+_state_updates[EventType.KeyReleased] = _on_key_released
+_state_updates[EventType.MouseWheelScrolled] = _on_mouse_wheel_scrolled
+_state_updates[EventType.MouseButtonPressed] = _on_mouse_button_pressed
+_state_updates[EventType.MouseButtonReleased] = _on_mouse_button_released
+_state_updates[EventType.MouseMoved] = _on_mouse_moved
+_state_updates[EventType.MouseMovedRaw] = _on_mouse_moved_raw
+_state_updates[EventType.JoystickButtonPressed] = _on_joystick_button_pressed
+_state_updates[EventType.JoystickButtonReleased] = _on_joystick_button_released
+_state_updates[EventType.JoystickMoved] = _on_joystick_moved
+_state_updates[EventType.JoystickDisconnected] = _on_joystick_disconnected
+
+class InputMgr:
+    """
+    Input manager class.
+
+    poll drains every pending event of a window in one call. Each event is classified once into an EventType, then the input state and the handlers are reached by indexing tables with it, instead of testing every subtype in an if-chain.
+    The binding only exposes isX() tests, so the type of the previous event is tested first: high-rate mouse and joystick events come in runs of the same type.
+    Polled events can be recorded frame by frame, and a recording can be replayed instead of the window events, for deterministic tests.
+    """
+
+    _tests = [(event_type, getattr(Event, f'is{event_type.name}'), getattr(Event, f'getIf{event_type.name}')) for event_type in EventType]
+    _handlers: List[List[Callable[[Any], None]]] = [[] for _ in EventType]
+    _state = InputState()
+    _last_type = 0
+
+    _recording: Optional[List[List[list]]] = None
+    _replay: Optional[List[List[list]]] = None
+    _replay_frame = 0
+
+    @classmethod
+    def poll(cls, window: WindowBase) -> int:
+        """
+        Drain the pending events of a window, update the input state and call the handlers. Call it once per frame.
+
+        Parameters:
+        - window: The window.
+
+        Returns:
+        - Count of processed events.
+        """
+
+        state = cls._state
+        state._begin()
+        handlers = cls._handlers
+        updates = _state_updates
+        recording = cls._recording
+        replaying = cls._replay is not None
+        frame: List[list] = []
+        count = 0
+
+        while True:
+            event = window.poll_event()
+            if event is None:
+                break
+
+            event_type, data = cls._classify(event)
+            if replaying and event_type != EventType.Closed:
+                continue
+            update = updates[event_type]
+            if update is not None:
+                update(state, data)
+            for handler in handlers[event_type]:
+                handler(data)
+            if recording is not None:
+                frame.append(_encode(event_type, data))
+            count += 1
+
+        if replaying:
+            count += cls._replay_next(frame if recording is not None else None)
+        if recording is not None:
+            recording.append(frame)
+        return count
+
+    @classmethod
+    def add_handler(cls, event_type: EventType, handler: Callable[[Any], None]):
+        """
+        Add an event handler.
+
+        Parameters:
+        - event_type: Type of the handled events.
+        - handler: Function called with the event subtype, such as Event.KeyPressed, which has its fields.
+        """
+
+        cls._handlers[event_type].append(handler)
+
+    @classmethod
+    def remove_handler(cls, event_type: EventType, handler: Callable[[Any], None]):
+        """
+        Remove an event handler.
+
+        Parameters:
+        - event_type: Type of the handled events.
+        - handler: The handler.
+        """
+
+        if handler not in cls._handlers[event_type]:
+            raise ValueError('Handler not found.')
+        cls._handlers[event_type].remove(handler)
+
+    @classmethod
+    def get_state(cls) -> InputState:
+        """
+        Get the input state, it is updated in place by poll.
+
+        Returns:
+        - The input state.
+        """
+
+        return cls._state
+
+    @classmethod
+    def start_recording(cls):
+        """
+        Start recording the polled events.
+        """
+
+        cls._recording = []
+
+    @classmethod
+    def stop_recording(cls) -> List[List[list]]:
+        """
+        Stop recording.
+
+        Returns:
+        - The recording, a list of events per poll.
+        """
+
+        if cls._recording is None:
+            raise ValueError('Input is not being recorded.')
+
+        recording = cls._recording
+        cls._recording = None
+        return recording
+
+    @classmethod
+    def start_replay(cls, recording: List[List[list]]):
+        """
+        Replay a recording, one frame per poll. Window events other than Closed are ignored until the end of the replay.
+
+        Parameters:
+        - recording: Recording returned by stop_recording or load_recording.
+        """
+
+        cls._replay = recording
+        cls._replay_frame = 0
+        cls._state = InputState()
+
+    @classmethod
+    def stop_replay(cls):
+        """
+        Stop replaying.
+        """
+
+        cls._replay = None
+
+    @classmethod
+    def is_replaying(cls) -> bool:
+        """
+        Check if a recording is being replayed.
+
+        Returns:
+        - True if replaying, False otherwise.
+        """
+
+        return cls._replay is not None
+
+    @staticmethod
+    def save_recording(path: str, recording: List[List[list]]):
+        """
+        Save a recording to a JSON file.
+
+        Parameters:
+        - path: Path of the file.
+        - recording: The recording.
+        """
+
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(recording, file, separators=(',', ':'))
+
+    @staticmethod
+    def load_recording(path: str) -> List[List[list]]:
+        """
+        Load a recording from a JSON file.
+
+        Parameters:
+        - path: Path of the file.
+
+        Returns:
+        - The recording.
+        """
+
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    @classmethod
+    def clear(cls):
+        """
+        Remove all handlers, stop recording and replaying, and reset the input state.
+        """
+
+        for handlers in cls._handlers:
+            handlers.clear()
+        cls._recording = None
+        cls._replay = None
+        cls._state = InputState()
+
+    @classmethod
+    def _classify(cls, event: Event) -> Tuple[int, Any]:
+        tests = cls._tests
+        event_type, test, get = tests[cls._last_type]
+        if not test(event):
+            for event_type, test, get in tests:
+                if test(event):
+                    break
+            cls._last_type = event_type
+        return event_type, get(event)
+
+    @classmethod
+    def _replay_next(cls, frame: Optional[List[list]]) -> int:
+        if cls._replay_frame >= len(cls._replay):
+            cls._replay = None
+            return 0
+
+        state = cls._state
+        handlers = cls._handlers
+        events = cls._replay[cls._replay_frame]
+        cls._replay_frame += 1
+        for values in events:
+            event_type = values[0]
+            data = _decode(values)
+            update = _state_updates[event_type]
+            if update is not None:
+                update(state, data)
+            for handler in handlers[event_type]:
+                handler(data)
+            if frame is not None:
+                frame.append(values)
+        return len(events)
+
+def _encode(event_type: int, data: Any) -> list:
+    values: list = [int(event_type)]
+    for name, kind in _event_fields[event_type]:
+        value = getattr(data, name)
+        if kind is Vector3f:
+            values.append([value.x, value.y, value.z])
+        elif kind is Vector2i or kind is Vector2u:
+            values.append([value.x, value.y])
+        elif kind is None:
+            values.append(value)
+        else:
+            values.append(int(value))
+    return values
+
+def _decode(values: list) -> Any:
+    event_type = values[0]
+    fields = []
+    for (_, kind), value in zip(_event_fields[event_type], values[1:]):
+        if kind is None:
+            fields.append(value)
+        elif isinstance(value, list):
+            fields.append(kind(*value))
+        else:
+            fields.append(kind(value))
+    return _replay_types[event_type](*fields)
@@ -0,0 +1,615 @@
+import selectors
+import socket
+import struct
+import threading
+from typing import List, Optional, Set, Tuple, Union
+from .sfSystem import *
+from .sfNetwork import *
+from .Time import Profiler
+
+# Every message is prefixed by its size as a big-endian 32 bits integer, like the packets sent by TcpSocket.send(packet).
+_header = struct.Struct('>I')
+
+Address = Union[str, IpAddress]
+
+def _host_name(address: Address) -> str:
+    if isinstance(address, str):
+        return address
+    return address.to_string()
+
+class BufferPool:
+    """
+    Fixed pool of receive buffers.
+
+    Every connection holds one buffer while it is open, so the memory used to receive is allocated once, whatever the count of messages.
+    """
+
+    def __init__(self, count: int, size: int):
+        """
+        Constructor.
+
+        Parameters:
+        - count: Count of buffers, which is the maximum count of open connections.
+        - size: Size of a buffer in bytes.
+        """
+
+        self._size = size
+        self._count = count
+        self._free: List[bytearray] = [bytearray(size) for _ in range(count)]
+
+    def acquire(self) -> Optional[bytearray]:
+        """
+        Take a buffer from the pool.
+
+        Returns:
+        - A buffer, None if the pool is empty.
+        """
+
+        if len(self._free) == 0:
+            return None
+        return self._free.pop()
+
+    def release(self, buffer: bytearray):
+        """
+        Give a buffer back to the pool.
+
+        Parameters:
+        - buffer: Buffer taken by acquire.
+        """
+
+        self._free.append(buffer)
+
+    def get_buffer_size(self) -> int:
+        """
+        Get the size of a buffer.
+
+        Returns:
+        - Size in bytes.
+        """
+
+        return self._size
+
+    def get_count(self) -> int:
+        """
+        Get the count of buffers.
+
+        Returns:
+        - Count of buffers.
+        """
+
+        return self._count
+
+    def get_free_count(self) -> int:
+        """
+        Get the count of buffers left in the pool.
+
+        Returns:
+        - Count of free buffers.
+        """
+
+        return len(self._free)
+
+class Connection:
+    """
+    Connection of a NetServer or a NetClient.
+
+    Sent messages are queued, and all the messages queued during a poll are written with as few socket writes as possible.
+    """
+
+    def __init__(self, host: '_NetHost', sock: socket.socket, buffer: bytearray):
+        """
+        Constructor, connections are created by NetServer and NetClient.
+
+        Parameters:
+        - host: Server or client owning the connection.
+        - sock: Connected non-blocking socket.
+        - buffer: Receive buffer taken from the pool of the host.
+        """
+
+        self._host = host
+        self._socket = sock
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._start = 0
+        self._end = 0
+        self._out = bytearray()
+        self._writing = False
+        self._connected = True
+        self._address: Tuple[str, int] = sock.getpeername()
+
+    def send(self, data: Union[bytes, bytearray, memoryview, Packet]) -> bool:
+        """
+        Queue a message, it is written at the end of the current or next poll.
+
+        Parameters:
+        - data: Content of the message.
+
+        Returns:
+        - True if the message is queued, False if the connection is closed or its send queue is full, in which case it is closed.
+        """
+
+        if not self._connected:
+            return False
+
+        if isinstance(data, Packet):
+            data = data.get_data()
+        if len(data) > self._host.max_message_size:
+            raise ValueError(f'Message of {len(data)} bytes is bigger than the maximum message size.')
+        if len(self._out) + len(data) + _header.size > self._host.max_pending_bytes:
+            self.close()
+            return False
+
+        self._out += _header.pack(len(data))
+        self._out += data
+        self._host._dirty.add(self)
+        return True
+
+    def get_address(self) -> Tuple[str, int]:
+        """
+        Get the address of the remote peer.
+
+        Returns:
+        - Host and port of the peer.
+        """
+
+        return self._address
+
+    def get_pending_bytes(self) -> int:
+        """
+        Get the count of bytes waiting to be written.
+
+        Returns:
+        - Count of bytes.
+        """
+
+        return len(self._out)
+
+    def is_connected(self) -> bool:
+        """
+        Check if the connection is open.
+
+        Returns:
+        - True if the connection is open, False otherwise.
+        """
+
+        return self._connected
+
+    def close(self):
+        """
+        Close the connection, on_disconnect of the host is called at the end of the current or next poll.
+        """
+
+        if self._connected:
+            self._connected = False
+            self._host._closed.append(self)
+
+    def _receive(self) -> int:
+        """
+        Read from the socket into the receive buffer and dispatch the complete messages.
+
+        Returns:
+        - Count of bytes received.
+        """
+
+        if self._end == len(self._buffer):
+            self._compact()
+        try:
+            count = self._socket.recv_into(self._view[self._end:])
+        except (BlockingIOError, InterruptedError):
+            return 0
+        except OSError:
+            self.close()
+            return 0
+        if count == 0:
+            self.close()
+            return 0
+
+        self._end += count
+        max_size = self._host.max_message_size
+        while self._connected and self._end - self._start >= _header.size:
+            size = _header.unpack_from(self._buffer, self._start)[0]
+            if size > max_size:
+                self.close()
+                break
+            begin = self._start + _header.size
+            if begin + size > self._end:
+                break
+            self._start = begin + size
+            self._host.on_message(self, self._view[begin:begin + size])
+
+        if self._start == self._end:
+            self._start = self._end = 0
+        return count
+
+    def _compact(self):
+        """
+        Move the incomplete message at the beginning of the receive buffer.
+        """
+
+        remaining = self._end - self._start
+        self._buffer[:remaining] = self._buffer[self._start:self._end]
+        self._start = 0
+        self._end = remaining
+
+    def _flush(self) -> int:
+        """
+        Write the queued messages.
+
+        Returns:
+        - Count of bytes written.
+        """
+
+        if not self._connected or len(self._out) == 0:
+            return 0
+
+        try:
+            count = self._socket.send(self._out)
+        except (BlockingIOError, InterruptedError):
+            count = 0
+        except OSError:
+            self.close()
+            return 0
+
+        del self._out[:count]
+        writing = len(self._out) > 0
+        if writing != self._writing:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE if writing else selectors.EVENT_READ
+            self._host._selector.modify(self._socket, events, self)
+            self._writing = writing
+        return count
+
+    def _release(self):
+        """
+        Close the socket and give the receive buffer back.
+        """
+
+        self._host._pool.release(self._buffer)
+        self._socket.close()
+
+class _NetHost:
+    """
+    Event loop shared by NetServer and NetClient.
+    """
+
+    def __init__(self, buffer_count: int, buffer_size: int, max_message_size: Optional[int], max_pending_bytes: int):
+        if max_message_size is None:
+            max_message_size = buffer_size - _header.size
+        if max_message_size + _header.size > buffer_size:
+            raise ValueError('Maximum message size does not fit in a receive buffer.')
+
+        self.max_message_size = max_message_size
+        self.max_pending_bytes = max_pending_bytes
+        self._selector = selectors.DefaultSelector()
+        self._pool = BufferPool(buffer_count, buffer_size)
+        self._connections: Set[Connection] = set()
+        self._dirty: Set[Connection] = set()
+        self._closed: List[Connection] = []
+
+    def get_connections(self) -> List[Connection]:
+        """
+        Get the open connections.
+
+        Returns:
+        - List of connections.
+        """
+
+        return [connection for connection in self._connections if connection._connected]
+
+    def get_buffer_pool(self) -> BufferPool:
+        """
+        Get the pool of receive buffers.
+
+        Returns:
+        - The buffer pool.
+        """
+
+        return self._pool
+
+    def poll(self, timeout: Time = Time.Zero()) -> int:
+        """
+        Wait for socket events, dispatch the received messages and write the queued ones.
+
+        Call it once per frame or tick. The handlers on_connect, on_message and on_disconnect are called from it.
+
+        Parameters:
+        - timeout: Maximum time to wait for an event, Time.Zero() to return immediately.
+
+        Returns:
+        - Count of received bytes.
+        """
+
+        received = 0
+        for key, mask in self._selector.select(max(0.0, timeout.as_seconds())):
+            if key.data is None:
+                self._accept(key.fileobj)
+                continue
+            connection: Connection = key.data
+            if mask & selectors.EVENT_READ:
+                received += connection._receive()
+            if mask & selectors.EVENT_WRITE:
+                connection._flush()
+
+        sent = 0
+        while len(self._dirty) > 0:
+            sent += self._dirty.pop()._flush()
+        self._cleanup()
+
+        if Profiler.enabled:
+            Profiler.count('net_bytes_received', received)
+            Profiler.count('net_bytes_sent', sent)
+        return received
+
+    def close(self):
+        """
+        Close all connections and stop listening.
+        """
+
+        for connection in list(self._connections):
+            connection.close()
+        self._cleanup()
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+
+    def on_connect(self, connection: Connection):
+        """
+        Called when a connection is opened.
+
+        You can override this method to implement your own behaviour.
+
+        Parameters:
+        - connection: The new connection.
+        """
+
+    def on_message(self, connection: Connection, message: memoryview):
+        """
+        Called when a complete message is received.
+
+        You can override this method to implement your own behaviour. The message is a view of the receive buffer, which is only valid during the call; copy it with bytes(message) to keep it.
+
+        Parameters:
+        - connection: Connection which received the message.
+        - message: Content of the message.
+        """
+
+    def on_disconnect(self, connection: Connection):
+        """
+        Called when a connection is closed, by either side.
+
+        You can override this method to implement your own behaviour.
+
+        Parameters:
+        - connection: The closed connection.
+        """
+
+    def _open(self, sock: socket.socket) -> Optional[Connection]:
+        buffer = self._pool.acquire()
+        if buffer is None:
+            sock.close()
+            return None
+
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = Connection(self, sock, buffer)
+        self._connections.add(connection)
+        self._selector.register(sock, selectors.EVENT_READ, connection)
+        self.on_connect(connection)
+        return connection
+
+    def _accept(self, listener: socket.socket):
+        pass
+
+    def _cleanup(self):
+        while len(self._closed) > 0:
+            connection = self._closed.pop()
+            self._dirty.discard(connection)
+            self._connections.discard(connection)
+            self._selector.unregister(connection._socket)
+            connection._release()
+            self.on_disconnect(connection)
+
+class NetServer(_NetHost):
+    """
+    Event-driven TCP server.
+
+    All connections are served by a single selector loop in poll, without a thread per client. Messages are length-prefixed, so they are compatible with packets sent and received by TcpSocket.send(packet) and TcpSocket.receive(packet).
+    """
+
+    def __init__(self, max_connections: int = 1024, buffer_size: int = 65536, max_message_size: Optional[int] = None, max_pending_bytes: int = 1 << 20):
+        """
+        Constructor.
+
+        Parameters:
+        - max_connections: Count of receive buffers, further clients are refused.
+        - buffer_size: Size of a receive buffer in bytes.
+        - max_message_size: Maximum size of a message in bytes, the buffer size minus the 4 bytes of the header if it is None.
+        - max_pending_bytes: Maximum count of bytes queued on a connection, a slower client is disconnected.
+        """
+
+        super().__init__(max_connections, buffer_size, max_message_size, max_pending_bytes)
+        self._refused = 0
+
+    def listen(self, port: int, address: Address = '0.0.0.0', backlog: int = 128) -> int:
+        """
+        Start listening for connections.
+
+        Parameters:
+        - port: Port to listen to, 0 to let the system choose one.
+        - address: Address of the interface to listen to.
+        - backlog: Maximum count of connections waiting to be accepted.
+
+        Returns:
+        - Port the server listens to.
+        """
+
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((_host_name(address), port))
+        listener.listen(backlog)
+        listener.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ, None)
+        return listener.getsockname()[1]
+
+    def broadcast(self, data: Union[bytes, bytearray, memoryview, Packet]):
+        """
+        Queue a message on every open connection.
+
+        Parameters:
+        - data: Content of the message.
+        """
+
+        for connection in self.get_connections():
+            connection.send(data)
+
+    def get_refused_count(self) -> int:
+        """
+        Get the count of clients refused because the buffer pool was empty.
+
+        Returns:
+        - Count of refused clients.
+        """
+
+        return self._refused
+
+    def _accept(self, listener: socket.socket):
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            if self._open(sock) is None:
+                self._refused += 1
+
+class NetClient(_NetHost):
+    """
+    Event-driven TCP client, using the same framing as NetServer.
+    """
+
+    def __init__(self, buffer_size: int = 65536, max_message_size: Optional[int] = None, max_pending_bytes: int = 1 << 20):
+        """
+        Constructor.
+
+        Parameters:
+        - buffer_size: Size of the receive buffer in bytes.
+        - max_message_size: Maximum size of a message in bytes, the buffer size minus the 4 bytes of the header if it is None.
+        - max_pending_bytes: Maximum count of bytes queued on the connection.
+        """
+
+        super().__init__(1, buffer_size, max_message_size, max_pending_bytes)
+        self._connection: Optional[Connection] = None
+
+    def connect(self, address: Address, port: int, timeout: Time = Time.FromSeconds(5)) -> Connection:
+        """
+        Connect to a server, the call blocks until the connection is established.
+
+        Parameters:
+        - address: Address of the server.
+        - port: Port of the server.
+        - timeout: Maximum time to wait.
+
+        Returns:
+        - The connection.
+        """
+
+        if self._connection is not None and self._connection._connected:
+            raise ValueError('Client is already connected.')
+
+        sock = socket.create_connection((_host_name(address), port), timeout.as_seconds())
+        self._cleanup()
+        self._connection = self._open(sock)
+        return self._connection
+
+    def send(self, data: Union[bytes, bytearray, memoryview, Packet]) -> bool:
+        """
+        Queue a message to the server.
+
+        Parameters:
+        - data: Content of the message.
+
+        Returns:
+        - True if the message is queued, False otherwise.
+        """
+
+        if self._connection is None:
+            return False
+        return self._connection.send(data)
+
+    def get_connection(self) -> Optional[Connection]:
+        """
+        Get the connection to the server.
+
+        Returns:
+        - The connection, None if the client never connected.
+        """
+
+        return self._connection
+
+class LoopbackServer(NetServer):
+    """
+    Echo server listening to the local host on its own thread, for local tests and benchmarks.
+
+    Every received message is sent back to its sender.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Constructor.
+
+        Parameters:
+        - kwargs: Arguments of NetServer.
+        """
+
+        super().__init__(**kwargs)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._port = 0
+
+    def start(self) -> int:
+        """
+        Start the server thread.
+
+        Returns:
+        - Port the server listens to.
+        """
+
+        self._port = self.listen(0, '127.0.0.1')
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._port
+
+    def get_port(self) -> int:
+        """
+        Get the port the server listens to.
+
+        Returns:
+        - Port of the server, 0 if it is not started.
+        """
+
+        return self._port
+
+    def stop(self):
+        """
+        Stop the server thread and close all connections.
+        """
+
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.close()
+
+    def on_message(self, connection: Connection, message: memoryview):
+        connection.send(message)
+
+    def _run(self):
+        timeout = Time.FromMilliseconds(10)
+        while self._running:
+            self.poll(timeout)
+
+    def __enter__(self) -> 'LoopbackServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
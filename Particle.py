@@ -2,12 +2,15 @@ import bisect
 from typing import Dict, List, Optional
 from .sfGraphics import *
 from .sfSystem import *
+from .Time import Profiler
+from .RenderStateMgr import RenderStateMgr
 
 class Particle(Sprite):
     """
     Particle class, inherits from Sprite.
 
     It's a basic particle class. You can inherit from it to create your own particle class.
+    Particles are drawn with the shared render states of their texture, unless render_state is accessed, which gives the particle states of its own.
     """
 
     def __init__(self, texture: Texture, velocity: Vector2f, duration: Optional[Time], rectangle: IntRect = None):
@@ -23,8 +26,8 @@ class Particle(Sprite):
 
         self.velocity = velocity
         self.duration = duration
-        self.render_state = RenderStates.default()
-        self.render_state.texture = texture
+        self._texture = texture
+        self._render_state: Optional[RenderStates] = None
         self._is_expired = False
 
         if rectangle is not None:
@@ -32,6 +35,24 @@ class Particle(Sprite):
         else:
             super().__init__(texture)
 
+    @property
+    def render_state(self) -> RenderStates:
+        """
+        Render states of this particle only, created on first access, so they can be modified.
+
+        Returns:
+        - The render states.
+        """
+
+        if self._render_state is None:
+            self._render_state = RenderStates.default()
+            self._render_state.texture = self._texture
+        return self._render_state
+
+    @render_state.setter
+    def render_state(self, render_state: RenderStates):
+        self._render_state = render_state
+
     def update(self, delta_time: Time):
         """
         Update particle.
@@ -176,6 +197,7 @@ class ParticleMgr:
 
         return self._z_list.copy()
 
+    @Profiler.profile('ParticleMgr.update')
     def update(self, delta_time: Time):
         """
         Update all particles.
@@ -191,13 +213,15 @@ class ParticleMgr:
                     if particle.is_expired():
                         self.remove_particle(particle)
 
-    def display(self, target: RenderTarget, z: int = None):
+    @Profiler.profile('ParticleMgr.display')
+    def display(self, target: RenderTarget, z: int = None, states: Optional[RenderStates] = None):
         """
         Draw all particles.
 
         Parameters:
         - target: Render target.
-        - states: Render states.
+        - z: Layer to draw, all layers if it is None.
+        - states: Render states, the texture of each particle is used. The transform is combined with the one of the particles with their own render states.
         """
         if z is None:
             z_list = self.get_z_list()
@@ -205,6 +229,25 @@ class ParticleMgr:
             z_list = [z]
 
         for z_ in z_list:
-            for particle_list in self._particles[z_].values():
+            for texture, particle_list in self._particles[z_].items():
+                if states is None:
+                    group_states = RenderStateMgr.get_states(texture)
+                else:
+                    group_states = RenderStates(states.blend_mode, states.stencil_mode, states.transform, states.coordinate_type, texture, states.shader)
                 for particle in particle_list:
-                    target.draw(particle, particle.render_state)
+                    if particle._render_state is None:
+                        target.draw(particle, group_states)
+                    elif states is None:
+                        target.draw(particle, particle._render_state)
+                    else:
+                        target.draw(particle, _combine_states(states, particle._render_state))
+                if Profiler.enabled:
+                    Profiler.count('draw_calls', len(particle_list))
+                    Profiler.count('texture_binds')
+
+def _combine_states(states: RenderStates, particle_states: RenderStates) -> RenderStates:
+    transform = Transform()
+    transform.combine(states.transform)
+    transform.combine(particle_states.transform)
+    return RenderStates(particle_states.blend_mode, particle_states.stencil_mode, transform, particle_states.coordinate_type,
+                        particle_states.texture, particle_states.shader)
@@ -0,0 +1,282 @@
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+from .sfGraphics import *
+from .Time import Profiler
+
+BlendKey = Tuple[int, int, int, int, int, int]
+StateKey = Tuple[int, int, int, int]
+
+class RenderStateMgr:
+    """
+    Render state manager class.
+
+    It interns RenderStates and BlendMode instances, so objects drawn with the same texture, blend mode, shader and transform share one RenderStates instead of allocating their own.
+    Shared render states must not be modified. Their keys can be used to sort draws and group the ones with identical states, see RenderQueue.
+    """
+
+    _blend_modes: Dict[BlendKey, BlendMode] = {}
+    _blend_ids: Dict[int, int] = {}
+    _states: Dict[StateKey, RenderStates] = {}
+    _state_keys: Dict[int, StateKey] = {}
+    # Blend modes and shaders referenced by the keys are kept alive, so their ids cannot be reused while their states are cached.
+    _refs: Dict[int, Any] = {}
+    # Textures are referenced weakly, their states are dropped when they are destroyed, before their ids can be reused.
+    _texture_refs: Dict[int, weakref.ref] = {}
+    _transforms: Dict[int, Transform] = {}
+
+    @classmethod
+    def get_blend_mode(cls, color_src: BlendMode.Factor, color_dst: BlendMode.Factor, color_equation: BlendMode.Equation = BlendMode.Equation.Add,
+                       alpha_src: Optional[BlendMode.Factor] = None, alpha_dst: Optional[BlendMode.Factor] = None,
+                       alpha_equation: Optional[BlendMode.Equation] = None) -> BlendMode:
+        """
+        Get a shared blend mode.
+
+        Parameters:
+        - color_src: Source factor of the color channels.
+        - color_dst: Destination factor of the color channels.
+        - color_equation: Blend equation of the color channels.
+        - alpha_src: Source factor of the alpha channel, the color one if it is None.
+        - alpha_dst: Destination factor of the alpha channel, the color one if it is None.
+        - alpha_equation: Blend equation of the alpha channel, the color one if it is None.
+
+        Returns:
+        - The blend mode.
+        """
+
+        key = (int(color_src), int(color_dst), int(color_equation),
+               int(color_src if alpha_src is None else alpha_src),
+               int(color_dst if alpha_dst is None else alpha_dst),
+               int(color_equation if alpha_equation is None else alpha_equation))
+        blend_mode = cls._blend_modes.get(key)
+        if blend_mode is None:
+            blend_mode = BlendMode(BlendMode.Factor(key[0]), BlendMode.Factor(key[1]), BlendMode.Equation(key[2]),
+                                   BlendMode.Factor(key[3]), BlendMode.Factor(key[4]), BlendMode.Equation(key[5]))
+            cls._blend_modes[key] = blend_mode
+            cls._blend_ids[id(blend_mode)] = len(cls._blend_ids) + 1
+        return blend_mode
+
+    @classmethod
+    def alpha(cls) -> BlendMode:
+        """
+        Get the shared alpha blend mode, the default one.
+
+        Returns:
+        - The blend mode.
+        """
+
+        return cls.get_blend_mode(BlendMode.Factor.SrcAlpha, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add,
+                                  BlendMode.Factor.One, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add)
+
+    @classmethod
+    def premultiplied_alpha(cls) -> BlendMode:
+        """
+        Get the shared blend mode for textures with premultiplied alpha, such as the ones rendered on a transparent RenderTexture.
+
+        Returns:
+        - The blend mode.
+        """
+
+        return cls.get_blend_mode(BlendMode.Factor.One, BlendMode.Factor.OneMinusSrcAlpha)
+
+    @classmethod
+    def additive(cls) -> BlendMode:
+        """
+        Get the shared additive blend mode.
+
+        Returns:
+        - The blend mode.
+        """
+
+        return cls.get_blend_mode(BlendMode.Factor.SrcAlpha, BlendMode.Factor.One, BlendMode.Equation.Add,
+                                  BlendMode.Factor.One, BlendMode.Factor.One, BlendMode.Equation.Add)
+
+    @classmethod
+    def set_transform(cls, transform_id: int, transform: Transform):
+        """
+        Register or change a shared transform, such as the one of a camera layer. The states using it are updated.
+
+        Parameters:
+        - transform_id: Identifier of the transform, 0 is reserved for the identity.
+        - transform: The transform.
+        """
+
+        if transform_id == 0:
+            raise ValueError('Transform id 0 is reserved for the identity.')
+
+        cls._transforms[transform_id] = transform
+        for key, states in cls._states.items():
+            if key[3] == transform_id:
+                states.transform = transform
+
+    @classmethod
+    def get_states(cls, texture: Optional[Texture] = None, blend_mode: Optional[BlendMode] = None,
+                   shader: Optional[Shader] = None, transform_id: int = 0) -> RenderStates:
+        """
+        Get shared render states, they must not be modified.
+
+        The texture is referenced weakly, the states using it are dropped when it is destroyed or released by TextureMgr. The shader is kept alive until clear is called.
+
+        Parameters:
+        - texture: Texture, None for no texture.
+        - blend_mode: Blend mode, preferably one returned by get_blend_mode. The alpha blend mode if it is None.
+        - shader: Shader, None for no shader.
+        - transform_id: Identifier of a transform registered by set_transform, 0 for the identity.
+
+        Returns:
+        - The render states.
+        """
+
+        if blend_mode is None:
+            blend_mode = cls.alpha()
+        blend_id = cls._blend_ids.get(id(blend_mode))
+        if blend_id is None:
+            # A blend mode not created by get_blend_mode is kept and identified by its object.
+            cls._blend_ids[id(blend_mode)] = blend_id = len(cls._blend_ids) + 1
+            cls._refs[id(blend_mode)] = blend_mode
+
+        key = (0 if shader is None else id(shader), 0 if texture is None else id(texture), blend_id, transform_id)
+        states = cls._states.get(key)
+        if states is not None:
+            return states
+
+        if transform_id != 0 and transform_id not in cls._transforms:
+            raise ValueError(f'Transform {transform_id} is not registered.')
+
+        states = RenderStates.default()
+        states.blend_mode = blend_mode
+        if texture is not None:
+            states.texture = texture
+            texture_id = id(texture)
+            if texture_id not in cls._texture_refs:
+                cls._texture_refs[texture_id] = weakref.ref(texture, lambda _, texture_id=texture_id: cls._drop_texture(texture_id))
+        if shader is not None:
+            states.shader = shader
+            cls._refs[id(shader)] = shader
+        if transform_id != 0:
+            states.transform = cls._transforms[transform_id]
+        cls._states[key] = states
+        cls._state_keys[id(states)] = key
+        if Profiler.enabled:
+            Profiler.count('render_states_created')
+        return states
+
+    @classmethod
+    def get_sort_key(cls, states: RenderStates) -> StateKey:
+        """
+        Get the key of render states, draws sorted by this key change shader, then texture, then blend mode as rarely as possible.
+
+        Parameters:
+        - states: Render states returned by get_states, other ones get a key of their own.
+
+        Returns:
+        - Shader, texture, blend mode and transform identifiers.
+        """
+
+        key = cls._state_keys.get(id(states))
+        if key is None:
+            return (0, 0, 0, id(states))
+        return key
+
+    @classmethod
+    def get_state_count(cls) -> int:
+        """
+        Get the count of shared render states.
+
+        Returns:
+        - Count of render states.
+        """
+
+        return len(cls._states)
+
+    @classmethod
+    def release_texture(cls, texture: Texture):
+        """
+        Drop the shared render states using a texture, called when the texture is released.
+
+        Parameters:
+        - texture: The texture.
+        """
+
+        cls._drop_texture(id(texture))
+
+    @classmethod
+    def clear(cls):
+        """
+        Drop all shared render states. Blend modes are kept.
+        """
+
+        cls._states.clear()
+        cls._state_keys.clear()
+        cls._transforms.clear()
+        cls._texture_refs.clear()
+        blend_refs = {key: ref for key, ref in cls._refs.items() if isinstance(ref, BlendMode)}
+        cls._refs = blend_refs
+
+    @classmethod
+    def _drop_texture(cls, texture_id: int):
+        if cls._texture_refs.pop(texture_id, None) is None:
+            return
+        for key in [key for key in cls._states if key[1] == texture_id]:
+            cls._state_keys.pop(id(cls._states.pop(key)), None)
+
+class RenderQueue:
+    """
+    Draw queue sorted by z and render states.
+
+    Draws of the same z are sorted by shader, texture and blend mode, so consecutive draws share states and the state changes are minimal.
+    """
+
+    def __init__(self):
+        """
+        Default constructor.
+        """
+
+        self._draws: List[Tuple[int, StateKey, int, Drawable, RenderStates]] = []
+
+    def submit(self, drawable: Drawable, states: RenderStates, z: int = 0):
+        """
+        Queue a draw.
+
+        Parameters:
+        - drawable: Object to draw.
+        - states: Render states, preferably from RenderStateMgr.get_states.
+        - z: Layer of the draw.
+        """
+
+        self._draws.append((z, RenderStateMgr.get_sort_key(states), len(self._draws), drawable, states))
+
+    def get_draw_count(self) -> int:
+        """
+        Get the count of queued draws.
+
+        Returns:
+        - Count of draws.
+        """
+
+        return len(self._draws)
+
+    def flush(self, target: RenderTarget) -> int:
+        """
+        Draw and remove the queued draws.
+
+        Parameters:
+        - target: Render target.
+
+        Returns:
+        - Count of state changes.
+        """
+
+        self._draws.sort(key=lambda draw: (draw[0], draw[1], draw[2]))
+        changes = 0
+        previous = None
+        for _, key, _, drawable, states in self._draws:
+            if key != previous:
+                changes += 1
+                previous = key
+            target.draw(drawable, states)
+
+        if Profiler.enabled:
+            Profiler.count('draw_calls', len(self._draws))
+            Profiler.count('state_changes', changes)
+        self._draws.clear()
+        return changes
@@ -0,0 +1,672 @@
+import random
+import selectors
+import socket
+import struct
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from .sfSystem import *
+from .Network import Address, _host_name
+from .Time import Profiler
+
+_fragment_header = struct.Struct('<BIBB')
+_ack = struct.Struct('<BI')
+_baseline = struct.Struct('<I')
+
+_SNAPSHOT = 0
+_ACK = 1
+_HELLO = 2
+_NO_BASELINE = 0xFFFFFFFF
+
+State = Tuple[int, ...]
+Snapshot = Dict[int, State]
+
+class BitWriter:
+    """
+    Writer of values using an exact count of bits.
+    """
+
+    def __init__(self):
+        """
+        Default constructor.
+        """
+
+        self._data = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        """
+        Write an unsigned value.
+
+        Parameters:
+        - value: Value to write, only its lowest bits are kept.
+        - bits: Count of bits, from 1 to 32.
+        """
+
+        self._acc |= (value & ((1 << bits) - 1)) << self._bits
+        self._bits += bits
+        if self._bits >= 32:
+            self._data += (self._acc & 0xFFFFFFFF).to_bytes(4, 'little')
+            self._acc >>= 32
+            self._bits -= 32
+
+    def write_varint(self, value: int):
+        """
+        Write an unsigned value with 7 bits groups, small values use fewer bits.
+
+        Parameters:
+        - value: Value to write.
+        """
+
+        while value >= 0x80:
+            self.write((value & 0x7F) | 0x80, 8)
+            value >>= 7
+        self.write(value, 8)
+
+    def get_bytes(self) -> bytearray:
+        """
+        Get the written data, padded to a whole count of bytes.
+
+        Returns:
+        - The data.
+        """
+
+        return self._data + self._acc.to_bytes((self._bits + 7) // 8, 'little')
+
+class BitReader:
+    """
+    Reader of values written by BitWriter.
+    """
+
+    def __init__(self, data: bytes, offset: int = 0):
+        """
+        Constructor.
+
+        Parameters:
+        - data: Data written by BitWriter.
+        - offset: Offset of the first byte.
+        """
+
+        self._data = data
+        self._position = offset
+        self._acc = 0
+        self._bits = 0
+
+    def read(self, bits: int) -> int:
+        """
+        Read an unsigned value.
+
+        Parameters:
+        - bits: Count of bits, from 1 to 32.
+
+        Returns:
+        - The value.
+        """
+
+        if self._bits < bits:
+            chunk = self._data[self._position:self._position + 4]
+            self._acc |= int.from_bytes(chunk, 'little') << self._bits
+            self._bits += 32
+            self._position += 4
+        value = self._acc & ((1 << bits) - 1)
+        self._acc >>= bits
+        self._bits -= bits
+        return value
+
+    def read_varint(self) -> int:
+        """
+        Read a value written by BitWriter.write_varint.
+
+        Returns:
+        - The value.
+        """
+
+        value = 0
+        shift = 0
+        while True:
+            group = self.read(8)
+            value |= (group & 0x7F) << shift
+            if group < 0x80:
+                return value
+            shift += 7
+
+class ReplicationSchema:
+    """
+    Quantized layout of the state of a replicated entity.
+
+    Fields are tuples of a name, a type and its parameters:
+    - (name, 'vec2f', min, max, bits): Vector2f whose components are in [min, max], quantized on bits.
+    - (name, 'float', min, max, bits): float in [min, max], quantized on bits.
+    - (name, 'uint', bits): unsigned integer, such as an animation id.
+    - (name, 'bool'): boolean, such as the state of a particle emitter.
+    """
+
+    def __init__(self, fields: List[Tuple]):
+        """
+        Constructor.
+
+        Parameters:
+        - fields: Fields of the entity state.
+        """
+
+        self.fields = list(fields)
+        self._groups: List[Tuple[str, str, int, int, float, float]] = []
+        self._bits: List[int] = []
+        for field in self.fields:
+            name, kind = field[0], field[1]
+            if kind == 'vec2f' or kind == 'float':
+                low, high, bits = field[2], field[3], field[4]
+                if high <= low or bits < 1 or bits > 32:
+                    raise ValueError(f'Invalid range or bits of field {name!r}.')
+                scale = ((1 << bits) - 1) / (high - low)
+                components = 2 if kind == 'vec2f' else 1
+            elif kind == 'uint':
+                low, scale, bits, components = 0.0, 1.0, field[2], 1
+            elif kind == 'bool':
+                low, scale, bits, components = 0.0, 1.0, 1, 1
+            else:
+                raise ValueError(f'Unknown field type {kind!r}.')
+            self._groups.append((name, kind, len(self._bits), components, low, scale))
+            self._bits.extend([bits] * components)
+
+    def quantize(self, values: Any) -> State:
+        """
+        Quantize the state of an entity.
+
+        Parameters:
+        - values: Dict of field values, or object whose attributes are the fields.
+
+        Returns:
+        - Quantized state.
+        """
+
+        get = values.__getitem__ if isinstance(values, dict) else values.__getattribute__
+        state = []
+        for name, kind, start, _, low, scale in self._groups:
+            value = get(name)
+            limit = (1 << self._bits[start]) - 1
+            if kind == 'vec2f':
+                state.append(min(limit, max(0, int(round((value.x - low) * scale)))))
+                state.append(min(limit, max(0, int(round((value.y - low) * scale)))))
+            elif kind == 'float':
+                state.append(min(limit, max(0, int(round((value - low) * scale)))))
+            elif kind == 'uint':
+                state.append(min(limit, int(value)))
+            else:
+                state.append(1 if value else 0)
+        return tuple(state)
+
+    def dequantize(self, state: State) -> Dict[str, Any]:
+        """
+        Restore the field values of a quantized state.
+
+        Parameters:
+        - state: Quantized state.
+
+        Returns:
+        - Dict of field values.
+        """
+
+        values: Dict[str, Any] = {}
+        for name, kind, start, _, low, scale in self._groups:
+            if kind == 'vec2f':
+                values[name] = Vector2f(low + state[start] / scale, low + state[start + 1] / scale)
+            elif kind == 'float':
+                values[name] = low + state[start] / scale
+            elif kind == 'uint':
+                values[name] = state[start]
+            else:
+                values[name] = state[start] == 1
+        return values
+
+    def encode(self, snapshot: Snapshot, baseline: Optional[Snapshot]) -> bytearray:
+        """
+        Encode the difference between a snapshot and a baseline.
+
+        Only new entities, changed fields and removed entity ids are written. Every entity is written if there is no baseline.
+
+        Parameters:
+        - snapshot: Quantized states of the entities by id.
+        - baseline: Snapshot known by the receiver, None if there is none.
+
+        Returns:
+        - Bit-packed data.
+        """
+
+        if baseline is None:
+            baseline = {}
+
+        changed = [(entity_id, state) for entity_id, state in sorted(snapshot.items()) if baseline.get(entity_id) != state]
+        removed = sorted(entity_id for entity_id in baseline if entity_id not in snapshot)
+
+        writer = BitWriter()
+        writer.write_varint(len(changed))
+        previous = -1
+        for entity_id, state in changed:
+            writer.write_varint(entity_id - previous - 1)
+            previous = entity_id
+            base = baseline.get(entity_id)
+            writer.write(1 if base is None else 0, 1)
+            for _, _, start, components, _, _ in self._groups:
+                end = start + components
+                if base is not None:
+                    if state[start:end] == base[start:end]:
+                        writer.write(0, 1)
+                        continue
+                    writer.write(1, 1)
+                for i in range(start, end):
+                    writer.write(state[i], self._bits[i])
+
+        writer.write_varint(len(removed))
+        previous = -1
+        for entity_id in removed:
+            writer.write_varint(entity_id - previous - 1)
+            previous = entity_id
+        return writer.get_bytes()
+
+    def decode(self, data: bytes, offset: int, baseline: Optional[Snapshot]) -> Snapshot:
+        """
+        Apply encoded differences to a baseline.
+
+        Parameters:
+        - data: Data written by encode.
+        - offset: Offset of the encoded data.
+        - baseline: Snapshot used by the sender, None if there was none.
+
+        Returns:
+        - The new snapshot.
+        """
+
+        snapshot: Snapshot = dict(baseline) if baseline is not None else {}
+        reader = BitReader(data, offset)
+        previous = -1
+        for _ in range(reader.read_varint()):
+            entity_id = previous + 1 + reader.read_varint()
+            previous = entity_id
+            full = reader.read(1) == 1
+            base = None if full else snapshot[entity_id]
+            state = []
+            for _, _, start, components, _, _ in self._groups:
+                end = start + components
+                if base is not None and reader.read(1) == 0:
+                    state.extend(base[start:end])
+                    continue
+                for i in range(start, end):
+                    state.append(reader.read(self._bits[i]))
+            snapshot[entity_id] = tuple(state)
+
+        previous = -1
+        for _ in range(reader.read_varint()):
+            entity_id = previous + 1 + reader.read_varint()
+            previous = entity_id
+            snapshot.pop(entity_id, None)
+        return snapshot
+
+class LossSimulator:
+    """
+    Drops and duplicates outgoing datagrams, to test replication locally.
+    """
+
+    def __init__(self, loss: float = 0.0, duplicate: float = 0.0, seed: Optional[int] = None):
+        """
+        Constructor.
+
+        Parameters:
+        - loss: Probability to drop a datagram.
+        - duplicate: Probability to send a datagram twice.
+        - seed: Seed of the random generator.
+        """
+
+        self.loss = loss
+        self.duplicate = duplicate
+        self._random = random.Random(seed)
+        self._dropped = 0
+
+    def get_copies(self) -> int:
+        """
+        Draw how many times the next datagram is sent.
+
+        Returns:
+        - 0, 1 or 2.
+        """
+
+        if self._random.random() < self.loss:
+            self._dropped += 1
+            return 0
+        return 2 if self._random.random() < self.duplicate else 1
+
+    def get_dropped_count(self) -> int:
+        """
+        Get the count of dropped datagrams.
+
+        Returns:
+        - Count of dropped datagrams.
+        """
+
+        return self._dropped
+
+class _Endpoint:
+    """
+    UDP socket shared by ReplicationServer and ReplicationClient.
+    """
+
+    def __init__(self, max_datagram_size: int):
+        self.simulator: Optional[LossSimulator] = None
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ)
+        self._receive_buffer = bytearray(65536)
+        self._max_datagram_size = max_datagram_size
+        self._bytes_sent = 0
+
+    def get_local_port(self) -> int:
+        """
+        Get the port the socket is bound to.
+
+        Returns:
+        - Local port, 0 if the socket is not bound.
+        """
+
+        return self._socket.getsockname()[1]
+
+    def get_bytes_sent(self) -> int:
+        """
+        Get the count of bytes sent, including the dropped datagrams.
+
+        Returns:
+        - Count of bytes.
+        """
+
+        return self._bytes_sent
+
+    def close(self):
+        """
+        Close the socket.
+        """
+
+        self._selector.close()
+        self._socket.close()
+
+    def _send(self, data: bytes, address: Tuple[str, int]):
+        copies = 1 if self.simulator is None else self.simulator.get_copies()
+        self._bytes_sent += len(data)
+        for _ in range(copies):
+            try:
+                self._socket.sendto(data, address)
+            except (BlockingIOError, InterruptedError):
+                pass
+
+    def _receive_all(self, timeout: Time) -> List[Tuple[bytes, Tuple[str, int]]]:
+        datagrams = []
+        if not self._selector.select(max(0.0, timeout.as_seconds())):
+            return datagrams
+        view = memoryview(self._receive_buffer)
+        while True:
+            try:
+                count, address = self._socket.recvfrom_into(self._receive_buffer)
+            except (BlockingIOError, InterruptedError):
+                return datagrams
+            except OSError:
+                # Such as an ICMP error of a previous send, the next poll reads the remaining datagrams.
+                return datagrams
+            datagrams.append((bytes(view[:count]), address))
+
+class ReplicationServer(_Endpoint):
+    """
+    Sends delta-compressed snapshots of entity states to clients over UDP.
+
+    Every snapshot is encoded against the last snapshot acknowledged by each client, so only new entities, changed fields and removed ids are sent. Clients acknowledging the same snapshot share one encoding. Snapshots bigger than a datagram are fragmented.
+    """
+
+    def __init__(self, schema: ReplicationSchema, history_size: int = 64, max_datagram_size: int = 1200):
+        """
+        Constructor.
+
+        Parameters:
+        - schema: Layout of the entity states.
+        - history_size: Count of past snapshots kept as baselines, a client acknowledging an older one receives a full snapshot.
+        - max_datagram_size: Maximum size of a datagram in bytes.
+        """
+
+        super().__init__(max_datagram_size)
+        self.schema = schema
+        self._history: 'OrderedDict[int, Snapshot]' = OrderedDict()
+        self._history_size = history_size
+        self._sequence = 0
+        self._clients: Dict[Tuple[str, int], int] = {}
+
+    def bind(self, port: int, address: Address = '0.0.0.0') -> int:
+        """
+        Bind the socket.
+
+        Parameters:
+        - port: Port to bind to, 0 to let the system choose one.
+        - address: Address of the interface to bind to.
+
+        Returns:
+        - Bound port.
+        """
+
+        self._socket.bind((_host_name(address), port))
+        return self.get_local_port()
+
+    def get_clients(self) -> List[Tuple[str, int]]:
+        """
+        Get the addresses of the clients.
+
+        Returns:
+        - List of addresses.
+        """
+
+        return list(self._clients)
+
+    def get_acknowledged(self, address: Tuple[str, int]) -> int:
+        """
+        Get the last snapshot acknowledged by a client.
+
+        Parameters:
+        - address: Address of the client.
+
+        Returns:
+        - Sequence of the snapshot, -1 if none was acknowledged.
+        """
+
+        if address not in self._clients:
+            raise ValueError('Client not found.')
+
+        return self._clients[address]
+
+    def remove_client(self, address: Tuple[str, int]):
+        """
+        Stop sending snapshots to a client.
+
+        Parameters:
+        - address: Address of the client.
+        """
+
+        if address not in self._clients:
+            raise ValueError('Client not found.')
+
+        del self._clients[address]
+
+    def poll(self, timeout: Time = Time.Zero()):
+        """
+        Handle the hello and acknowledgement datagrams of the clients.
+
+        Parameters:
+        - timeout: Maximum time to wait for a datagram.
+        """
+
+        for data, address in self._receive_all(timeout):
+            if len(data) == 1 and data[0] == _HELLO:
+                self._clients.setdefault(address, -1)
+            elif len(data) == _ack.size and data[0] == _ACK and address in self._clients:
+                sequence = _ack.unpack(data)[1]
+                if sequence > self._clients[address]:
+                    self._clients[address] = sequence
+
+    @Profiler.profile('ReplicationServer.send_snapshot')
+    def send_snapshot(self, entities: Dict[int, Any]) -> int:
+        """
+        Send the current states of the entities to every client.
+
+        Parameters:
+        - entities: Dict of entity ids and dicts of field values, or objects whose attributes are the fields.
+
+        Returns:
+        - Sequence of the snapshot.
+        """
+
+        quantize = self.schema.quantize
+        snapshot: Snapshot = {entity_id: quantize(values) for entity_id, values in entities.items()}
+        sequence = self._sequence
+        self._sequence += 1
+        self._history[sequence] = snapshot
+        while len(self._history) > self._history_size:
+            self._history.popitem(last=False)
+
+        encoded: Dict[int, List[bytes]] = {}
+        for address, acknowledged in self._clients.items():
+            if acknowledged not in self._history:
+                acknowledged = _NO_BASELINE
+            if acknowledged not in encoded:
+                baseline = self._history.get(acknowledged)
+                payload = _baseline.pack(acknowledged) + self.schema.encode(snapshot, baseline)
+                encoded[acknowledged] = self._fragment(sequence, payload)
+            for datagram in encoded[acknowledged]:
+                self._send(datagram, address)
+
+        return sequence
+
+    def _fragment(self, sequence: int, payload: bytes) -> List[bytes]:
+        size = self._max_datagram_size - _fragment_header.size
+        count = (len(payload) + size - 1) // size
+        if count > 255:
+            raise ValueError('Snapshot is too big to be fragmented.')
+
+        return [_fragment_header.pack(_SNAPSHOT, sequence, i, count) + payload[i * size:(i + 1) * size] for i in range(count)]
+
+class ReplicationClient(_Endpoint):
+    """
+    Receives the snapshots of a ReplicationServer, reassembles their fragments and acknowledges them.
+
+    Snapshots older than the last applied one are ignored.
+    The hello datagram may be lost, so it is sent again by poll until the first snapshot is applied.
+    """
+
+    def __init__(self, schema: ReplicationSchema, history_size: int = 64, max_datagram_size: int = 1200,
+                 hello_interval: Time = Time.FromMilliseconds(250)):
+        """
+        Constructor.
+
+        Parameters:
+        - schema: Layout of the entity states, the same as the server.
+        - history_size: Count of past snapshots kept as baselines, it should match the server.
+        - max_datagram_size: Maximum size of a datagram in bytes.
+        - hello_interval: Interval between two hello datagrams until the first snapshot is applied.
+        """
+
+        super().__init__(max_datagram_size)
+        self.schema = schema
+        self._history: 'OrderedDict[int, Snapshot]' = OrderedDict()
+        self._history_size = history_size
+        self._fragments: Dict[int, List[Optional[bytes]]] = {}
+        self._sequence = -1
+        self._server: Optional[Tuple[str, int]] = None
+        self.hello_interval = hello_interval
+        self._hello_clock = Clock()
+
+    def connect(self, address: Address, port: int):
+        """
+        Register to a server, the snapshots are sent to the port of this client from now on.
+
+        Parameters:
+        - address: Address or host name of the server, resolved once.
+        - port: Port of the server.
+        """
+
+        # Resolved once, since the senders of the received datagrams are numeric addresses.
+        self._server = (socket.gethostbyname(_host_name(address)), port)
+        self._send_hello()
+
+    def get_sequence(self) -> int:
+        """
+        Get the sequence of the last applied snapshot.
+
+        Returns:
+        - Sequence of the snapshot, -1 if none was applied.
+        """
+
+        return self._sequence
+
+    def get_entities(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Get the entity states of the last applied snapshot.
+
+        Returns:
+        - Dict of entity ids and dicts of field values.
+        """
+
+        if self._sequence not in self._history:
+            return {}
+        dequantize = self.schema.dequantize
+        return {entity_id: dequantize(state) for entity_id, state in self._history[self._sequence].items()}
+
+    def poll(self, timeout: Time = Time.Zero()) -> bool:
+        """
+        Receive the pending datagrams, apply the complete snapshots and acknowledge them.
+        The hello datagram is sent again if no snapshot was applied within hello_interval.
+
+        Parameters:
+        - timeout: Maximum time to wait for a datagram.
+
+        Returns:
+        - True if a new snapshot was applied, False otherwise.
+        """
+
+        if self._server is not None and self._sequence < 0 and self._hello_clock.get_elapsed_time() >= self.hello_interval:
+            self._send_hello()
+
+        applied = False
+        for data, address in self._receive_all(timeout):
+            if address != self._server or len(data) < _fragment_header.size or data[0] != _SNAPSHOT:
+                continue
+            _, sequence, index, count = _fragment_header.unpack_from(data)
+            if sequence <= self._sequence or index >= count:
+                continue
+
+            fragments = self._fragments.setdefault(sequence, [None] * count)
+            if len(fragments) != count:
+                continue
+            fragments[index] = data[_fragment_header.size:]
+            if any(fragment is None for fragment in fragments):
+                continue
+
+            del self._fragments[sequence]
+            if self._apply(sequence, b''.join(fragments)):
+                applied = True
+
+        for sequence in [sequence for sequence in self._fragments if sequence <= self._sequence]:
+            del self._fragments[sequence]
+        return applied
+
+    def _send_hello(self):
+        self._send(bytes((_HELLO,)), self._server)
+        self._hello_clock.restart()
+
+    def _apply(self, sequence: int, payload: bytes) -> bool:
+        baseline_sequence = _baseline.unpack_from(payload)[0]
+        if baseline_sequence == _NO_BASELINE:
+            baseline = None
+        elif baseline_sequence in self._history:
+            baseline = self._history[baseline_sequence]
+        else:
+            return False
+
+        self._history[sequence] = self.schema.decode(payload, _baseline.size, baseline)
+        while len(self._history) > self._history_size:
+            self._history.popitem(last=False)
+        self._sequence = sequence
+        self._send(_ack.pack(_ACK, sequence), self._server)
+        return True
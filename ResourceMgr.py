@@ -1,9 +1,14 @@
 import os
-from typing import Dict, List, Optional, Union, Tuple
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Union, Tuple
 
 from .sfSystem import *
 from .sfGraphics import *
 from .sfAudio import *
+from .Time import Profiler
+from .RenderStateMgr import RenderStateMgr
 
 class TextureMgr:
     """
@@ -29,9 +34,10 @@ class TextureMgr:
 
         if os.path.exists(path):
             if path not in cls._textures:
-                cls._textures[path] = Texture()
-                if not cls._textures[path].load_from_file(path):
-                    raise ValueError(f'Failed to load texture from {path}.')
+                with Profiler.scope('TextureMgr.load'):
+                    cls._textures[path] = Texture()
+                    if not cls._textures[path].load_from_file(path):
+                        raise ValueError(f'Failed to load texture from {path}.')
         else:
             path_parts = path.split('/')
             if len(path_parts) < 2:
@@ -48,9 +54,10 @@ class TextureMgr:
                 else:
                     raise ValueError(f'Failed to load texture from {path}.')
             if isinstance(ref, bytes):
-                texture = Texture()
-                if not texture.load_from_memory(ref):
-                    raise ValueError(f'Failed to load texture from {path}.')
+                with Profiler.scope('TextureMgr.load'):
+                    texture = Texture()
+                    if not texture.load_from_memory(ref):
+                        raise ValueError(f'Failed to load texture from {path}.')
                 cls._textures[path] = texture
 
         return cls._textures[path]
@@ -90,7 +97,7 @@ class TextureMgr:
         """
 
         if path in cls._textures:
-            cls._textures.pop(path)
+            RenderStateMgr.release_texture(cls._textures.pop(path))
         else:
             raise ValueError(f'Failed to release texture from {path}.')
 
@@ -100,6 +107,8 @@ class TextureMgr:
         Clear all textures.
         """
 
+        for texture in cls._textures.values():
+            RenderStateMgr.release_texture(texture)
         cls._textures.clear()
 
     @classmethod
@@ -283,23 +292,62 @@ class AudioMgr:
         def __init__(self, buffer):
             super().__init__(buffer)
             self.started = False
+            self.spatialized = False
+            # Index in the active sound list, -1 if the sound is in the free list of its pool.
+            self.index = -1
 
         def play(self):
             self.started = True
             super().play()
 
+    class _SoundPool:
+        def __init__(self, buffer: SoundBuffer, capacity: int):
+            self.buffer = buffer
+            self.capacity = capacity
+            self.sounds: List[AudioMgr._SoundExt] = []
+            self.free: List[AudioMgr._SoundExt] = []
+            self.steal = 0
+
+        def allocate(self, count: int):
+            while len(self.sounds) < count:
+                sound = AudioMgr._SoundExt(self.buffer)
+                self.sounds.append(sound)
+                self.free.append(sound)
+
     _sounds_cache: Dict[str, SoundBuffer] = {}
     _voice: Tuple[SoundBuffer, _SoundExt] = None
 
     _music: Dict[str, Music] = {}
+    _music_effects: Dict[str, Callable[[memoryview, int, memoryview, int, int], None]] = {}
+    _ducked: bool = False
     _sound_list: List[_SoundExt] = []
 
-    _sound_pool: Dict[SoundBuffer, List[Sound]] = {}
+    _sound_pool: Dict[SoundBuffer, _SoundPool] = {}
+    _last_poll: int = 0
+
+    # Encoded bytes of the sounds kept compressed, they are decoded again on demand after an eviction.
+    _compressed: Dict[str, bytes] = {}
+    _pcm_sizes: Dict[str, int] = {}
+    _pcm_bytes: int = 0
+    _loading: Dict[str, Future] = {}
+    # Token of the current background load of each sound, a load whose token was dropped by clear or release_sound stores nothing.
+    _load_tokens: Dict[str, object] = {}
+    _loader: Optional[ThreadPoolExecutor] = None
+    _cache_lock = threading.Lock()
 
     sound_on: bool = True
     music_on: bool = True
     voice_on: bool = True
 
+    # Maximum count of simultaneous instances of a sound buffer, the oldest instance is restarted when it is reached.
+    pool_capacity: int = 16
+    # Minimum interval between two status polls of the playing sounds, in milliseconds.
+    poll_interval: int = 0
+    # Maximum size of the decoded samples of the compressed sounds, in bytes, 0 for no limit.
+    pcm_budget: int = 0
+    # Count of threads decoding sounds in the background.
+    loader_workers: int = 4
+
     @classmethod
     def get_music(cls, name: str) -> Music:
         """
@@ -330,12 +378,154 @@ class AudioMgr:
         - The sound from path.
         """
 
-        if name not in cls._sounds_cache:
-            cls._sounds_cache[name] = SoundBuffer()
-            if not cls._sounds_cache[name].load_from_file(f'assets/sounds/{name}'):
+        future = cls._loading.get(name)
+        if future is not None:
+            future.result()
+
+        sound_buffer = cls._sounds_cache.get(name)
+        if sound_buffer is not None:
+            if name in cls._compressed:
+                # Moved to the end, the first compressed sounds of the cache are the least recently used.
+                with cls._cache_lock:
+                    cls._sounds_cache[name] = cls._sounds_cache.pop(name)
+            return sound_buffer
+
+        sound_buffer = SoundBuffer()
+        if name in cls._compressed:
+            cls._trim_sounds(cls._pcm_sizes.get(name, 0))
+            if not sound_buffer.load_from_memory(cls._compressed[name]):
+                raise ValueError(f'Fail to decode sound {name}.')
+            cls._store_sound(name, sound_buffer)
+        else:
+            if not sound_buffer.load_from_file(f'assets/sounds/{name}'):
+                raise ValueError(f'Fail to load sound from {name}.')
+            cls._store_sound(name, sound_buffer)
+
+        return sound_buffer
+
+    @classmethod
+    def load_sounds(cls, names: Iterable[str], compressed: bool = False) -> List[Future]:
+        """
+        Load sounds in the background, get_sound waits for a sound which is still loading.
+
+        Parameters:
+        - names: Names of sounds.
+        - compressed: Whether the encoded bytes are kept in memory instead of the decoded samples. A compressed sound is decoded by get_sound, and its samples can be evicted again to stay within pcm_budget.
+
+        Returns:
+        - Futures of the loads, their result is the sound buffer, or None for a compressed sound.
+        """
+
+        if cls._loader is None:
+            cls._loader = ThreadPoolExecutor(cls.loader_workers, thread_name_prefix='AudioMgr')
+
+        futures = []
+        for name in names:
+            future = cls._loading.get(name)
+            if future is None:
+                token = object()
+                with cls._cache_lock:
+                    cls._load_tokens[name] = token
+                future = cls._loader.submit(cls._load_sound, name, compressed, token)
+                cls._loading[name] = future
+                future.add_done_callback(lambda _, name=name, token=token: cls._end_load(name, token))
+            futures.append(future)
+        return futures
+
+    @classmethod
+    def _end_load(cls, name: str, token: object):
+        with cls._cache_lock:
+            if cls._load_tokens.get(name) is not token:
+                return
+            del cls._load_tokens[name]
+            cls._loading.pop(name, None)
+
+    @classmethod
+    def get_loading_count(cls) -> int:
+        """
+        Get the count of sounds loading in the background.
+
+        Returns:
+        - Count of sounds.
+        """
+
+        return len(cls._loading)
+
+    @classmethod
+    def get_pcm_bytes(cls) -> int:
+        """
+        Get the size of the decoded samples of the compressed sounds, the ones counted against pcm_budget.
+
+        Returns:
+        - Size in bytes.
+        """
+
+        return cls._pcm_bytes
+
+    @classmethod
+    def _load_sound(cls, name: str, compressed: bool, token: object) -> Optional[SoundBuffer]:
+        try:
+            with open(f'assets/sounds/{name}', 'rb') as file:
+                data = file.read()
+        except OSError as error:
+            raise ValueError(f'Fail to load sound from {name}.') from error
+
+        if compressed:
+            # Only the header is read, to know the size of the samples without decoding them.
+            sound_file = InputSoundFile()
+            if not sound_file.open_from_memory(data):
                 raise ValueError(f'Fail to load sound from {name}.')
+            with cls._cache_lock:
+                if cls._load_tokens.get(name) is not token:
+                    sound_file.close()
+                    return None
+                if name in cls._sounds_cache and name not in cls._compressed:
+                    # Already decoded, its samples are counted from now on since they can be evicted.
+                    cls._pcm_bytes += cls._pcm_sizes[name]
+                cls._compressed[name] = data
+                cls._pcm_sizes[name] = sound_file.get_sample_count() * 2
+            sound_file.close()
+            return None
+
+        sound_buffer = SoundBuffer()
+        if not sound_buffer.load_from_memory(data):
+            raise ValueError(f'Fail to load sound from {name}.')
+        cls._store_sound(name, sound_buffer, token)
+        return sound_buffer
+
+    @classmethod
+    def _store_sound(cls, name: str, sound_buffer: SoundBuffer, token: Optional[object] = None):
+        # Only the compressed sounds count toward pcm_budget, the other ones cannot be evicted.
+        size = sound_buffer.get_sample_count() * 2
+        with cls._cache_lock:
+            if token is not None and cls._load_tokens.get(name) is not token:
+                return
+            counted = name in cls._compressed
+            previous = cls._sounds_cache.pop(name, None)
+            if previous is not None and counted:
+                cls._pcm_bytes -= previous.get_sample_count() * 2
+            cls._sounds_cache[name] = sound_buffer
+            cls._pcm_sizes[name] = size
+            if counted:
+                cls._pcm_bytes += size
+
+    @classmethod
+    def _trim_sounds(cls, needed: int):
+        # Evict the least recently used compressed sounds which are not playing, until the needed bytes fit in pcm_budget.
+        if cls.pcm_budget <= 0 or cls._pcm_bytes + needed <= cls.pcm_budget:
+            return
 
-        return cls._sounds_cache[name]
+        with cls._cache_lock:
+            for name in [name for name in cls._sounds_cache if name in cls._compressed]:
+                if cls._pcm_bytes + needed <= cls.pcm_budget:
+                    break
+                sound_buffer = cls._sounds_cache[name]
+                pool = cls._sound_pool.get(sound_buffer)
+                if pool is not None and len(pool.free) < len(pool.sounds):
+                    continue
+                cls._sound_pool.pop(sound_buffer, None)
+                del cls._sounds_cache[name]
+                cls._pcm_bytes -= sound_buffer.get_sample_count() * 2
 
     @classmethod
     def get_voice(cls, name: str) -> SoundBuffer:
@@ -372,45 +562,135 @@ class AudioMgr:
     @classmethod
     def release_sound(cls, name: str):
         """
-        Release sound from name.
+        Release sound from name, a background load of it is discarded.
 
         Parameters:
         - name: Name of sound.
         """
 
+        with cls._cache_lock:
+            loading = cls._load_tokens.pop(name, None) is not None
+            future = cls._loading.pop(name, None)
+        if future is not None:
+            future.cancel()
+
         if name in cls._sounds_cache:
-            cls._sounds_cache[name].stop()
-            cls._sounds_cache.pop(name)
-        else:
+            sound_buffer = cls._sounds_cache.pop(name)
+            if name in cls._compressed:
+                cls._pcm_bytes -= sound_buffer.get_sample_count() * 2
+            pool = cls._sound_pool.pop(sound_buffer, None)
+            if pool is not None:
+                for sound in pool.sounds:
+                    if sound.index >= 0:
+                        sound.stop()
+                        cls._deactivate(sound)
+        elif name not in cls._compressed and not loading:
             raise ValueError(f'Fail to release sound from {name}.')
 
+        cls._compressed.pop(name, None)
+        cls._pcm_sizes.pop(name, None)
+
     @classmethod
-    def play_sound(cls, para: Union[str, SoundBuffer], position: Vector3f = None):
+    def preload_sound(cls, para: Union[str, SoundBuffer], count: int) -> SoundBuffer:
         """
-        Play sound from name or sound buffer.
+        Load a sound and create its pool of sound instances, so playing it does not allocate.
 
         Parameters:
         - para: Name of sound or sound buffer.
+        - count: Count of instances to create, the capacity of the pool is raised to it if needed.
+
+        Returns:
+        - The sound buffer.
         """
 
-        sound: Optional[AudioMgr._SoundExt] = None
+        if count <= 0:
+            raise ValueError('Count of instances must be positive.')
 
         sound_buffer = para
         if isinstance(para, str):
             sound_buffer = cls.get_sound(para)
 
-        if sound_buffer in cls._sound_pool:
-            if len(cls._sound_pool[sound_buffer]) > 0:
-                sound = cls._sound_pool[sound_buffer].pop()
+        pool = cls._get_pool(sound_buffer)
+        pool.capacity = max(pool.capacity, count)
+        pool.allocate(count)
+        return sound_buffer
+
+    @classmethod
+    def get_playing_count(cls) -> int:
+        """
+        Get the count of sounds waiting to start or playing.
+
+        Returns:
+        - Count of sounds.
+        """
+
+        return len(cls._sound_list)
+
+    @classmethod
+    def _get_pool(cls, sound_buffer: SoundBuffer) -> 'AudioMgr._SoundPool':
+        pool = cls._sound_pool.get(sound_buffer)
+        if pool is None:
+            pool = cls._SoundPool(sound_buffer, cls.pool_capacity)
+            cls._sound_pool[sound_buffer] = pool
+        return pool
+
+    @classmethod
+    def _activate(cls, sound: 'AudioMgr._SoundExt'):
+        sound.index = len(cls._sound_list)
+        cls._sound_list.append(sound)
+
+    @classmethod
+    def _deactivate(cls, sound: 'AudioMgr._SoundExt'):
+        # Swap-remove: the last active sound takes the slot of the removed one.
+        last = cls._sound_list.pop()
+        if last is not sound:
+            cls._sound_list[sound.index] = last
+            last.index = sound.index
+        sound.index = -1
+        sound.started = False
+        if sound.spatialized:
+            sound.set_spatialization_enabled(False)
+            sound.set_position(Vector3f(0, 0, 0))
+            sound.spatialized = False
+        pool = cls._sound_pool.get(sound.get_buffer())
+        if pool is not None:
+            pool.free.append(sound)
+
+    @classmethod
+    def play_sound(cls, para: Union[str, SoundBuffer], position: Vector3f = None):
+        """
+        Play sound from name or sound buffer.
 
-        if sound is None:
+        Parameters:
+        - para: Name of sound or sound buffer.
+        """
+
+        sound_buffer = para
+        if isinstance(para, str):
+            sound_buffer = cls.get_sound(para)
+
+        pool = cls._get_pool(sound_buffer)
+        if pool.free:
+            sound = pool.free.pop()
+            cls._activate(sound)
+        elif len(pool.sounds) < pool.capacity:
             sound = cls._SoundExt(sound_buffer)
+            pool.sounds.append(sound)
+            cls._activate(sound)
+        else:
+            # Every instance is playing, the instances are restarted in turn so the oldest one is reused.
+            sound = pool.sounds[pool.steal]
+            pool.steal = (pool.steal + 1) % len(pool.sounds)
+            sound.stop()
+            sound.started = False
 
         if position is not None:
             sound.set_spatialization_enabled(True)
             sound.set_position(position)
-
-        cls._sound_list.append(sound)
+            sound.spatialized = True
+        elif sound.spatialized:
+            sound.set_spatialization_enabled(False)
+            sound.spatialized = False
 
     @classmethod
     def play_voice(cls, para: Union[str, SoundBuffer], position: Vector3f = None):
@@ -458,33 +738,74 @@ class AudioMgr:
         else:
             music.set_spatialization_enabled(False)
 
+        if keyword in cls._music_effects:
+            cls._attach_effects(music, cls._music_effects[keyword])
+
         cls._music[keyword] = music
 
         cls._music[keyword].play()
 
     @classmethod
+    def set_music_effects(cls, keyword: str, effects: Optional[Callable[[memoryview, int, memoryview, int, int], None]]):
+        """
+        Set the effect processor of a music keyword, such as an AudioEffect.EffectChain. It is kept for the next musics played with the keyword, and the chains with a Ducking effect are ducked while a voice plays.
+
+        Parameters:
+        - keyword: Keyword of music, such as 'bgm' or 'bgs'.
+        - effects: Effect processor, None to remove it.
+        """
+
+        if effects is None:
+            cls._music_effects.pop(keyword, None)
+            if keyword in cls._music:
+                cls._music[keyword].set_effect_processor(None)
+            return
+
+        cls._music_effects[keyword] = effects
+        if keyword in cls._music:
+            cls._attach_effects(cls._music[keyword], effects)
+
+    @staticmethod
+    def _attach_effects(music: Music, effects: Callable[[memoryview, int, memoryview, int, int], None]):
+        if hasattr(effects, 'attach'):
+            effects.attach(music)
+        else:
+            music.set_effect_processor(effects)
+
+    @classmethod
+    @Profiler.profile('AudioMgr.update')
     def update(cls):
         """
         Update all audios.
         """
 
         if not cls.sound_on:
-            cls._sound_list.clear()
-        for sound in cls._sound_list[:]:
+            while cls._sound_list:
+                sound = cls._sound_list[-1]
+                sound.stop()
+                cls._deactivate(sound)
+
+        now = time.perf_counter_ns()
+        poll = now - cls._last_poll >= cls.poll_interval * 1000000
+        if poll:
+            cls._last_poll = now
+        # Iterating backwards, a swap-remove only moves an already visited sound into the current slot.
+        i = len(cls._sound_list) - 1
+        while i >= 0:
+            sound = cls._sound_list[i]
             if not sound.started:
                 sound.play()
-                continue
-            if sound.get_status() == Sound.Status.Stopped:
-                if not sound.get_buffer() in cls._sound_pool:
-                    cls._sound_pool[sound.get_buffer()] = []
-                sound.started = False
-                sound.set_spatialization_enabled(False)
-                sound.set_position(Vector3f(0, 0, 0))
-                cls._sound_pool[sound.get_buffer()].append(sound)
-                cls._sound_list.remove(sound)
+            elif poll and sound.get_status() == Sound.Status.Stopped:
+                cls._deactivate(sound)
+            i -= 1
 
         if not cls.voice_on:
             cls._voice = None
+        if cls._ducked != (cls._voice is not None):
+            cls._ducked = cls._voice is not None
+            for effects in cls._music_effects.values():
+                if hasattr(effects, 'set_ducked'):
+                    effects.set_ducked(cls._ducked)
         if cls._voice is not None:
             _, voice = cls._voice
             if not voice.started:
@@ -508,7 +829,18 @@ class AudioMgr:
         for value in cls._sound_list:
             value.stop()
         cls._sound_list.clear()
+        cls._sound_pool.clear()
+        # Running loads cannot be cancelled, dropping their tokens makes them store nothing.
+        with cls._cache_lock:
+            cls._load_tokens.clear()
+            futures = list(cls._loading.values())
+            cls._loading.clear()
+        for future in futures:
+            future.cancel()
         cls._sounds_cache.clear()
+        cls._compressed.clear()
+        cls._pcm_sizes.clear()
+        cls._pcm_bytes = 0
         for value in cls._music.values():
             value.stop()
         cls._music.clear()
@@ -0,0 +1,544 @@
+import math
+from typing import List, Optional
+import numpy as np
+from .sfSystem import *
+from .sfGraphics import *
+from .SpriteBatch import SpriteBatch
+from .Time import Profiler
+
+class SceneNode:
+    """
+    Handle of a node of a SceneGraph.
+
+    Its position, rotation, scale and origin are stored in the arrays of the graph, and work like the ones of Transformable, relative to the parent node.
+    """
+
+    __slots__ = ('_graph', '_index')
+
+    def __init__(self, graph: 'SceneGraph', index: int):
+        """
+        Constructor, nodes are created by SceneGraph.create_node.
+
+        Parameters:
+        - graph: Graph owning the node.
+        - index: Index of the node in the arrays of the graph.
+        """
+
+        self._graph = graph
+        self._index = index
+
+    def set_position(self, position: Vector2f):
+        """
+        Set the position relative to the parent.
+
+        Parameters:
+        - position: New position.
+        """
+
+        self._graph._positions[self._index] = (position.x, position.y)
+        self._graph._touch(self._index)
+
+    def get_position(self) -> Vector2f:
+        """
+        Get the position relative to the parent.
+
+        Returns:
+        - Current position.
+        """
+
+        x, y = self._graph._positions[self._index].tolist()
+        return Vector2f(x, y)
+
+    def move(self, offset: Vector2f):
+        """
+        Move the node relatively to its current position.
+
+        Parameters:
+        - offset: Offset.
+        """
+
+        self._graph._positions[self._index] += (offset.x, offset.y)
+        self._graph._touch(self._index)
+
+    def set_rotation(self, angle: float):
+        """
+        Set the rotation relative to the parent.
+
+        Parameters:
+        - angle: New rotation, in degrees.
+        """
+
+        self._graph._rotations[self._index] = math.radians(angle)
+        self._graph._touch(self._index)
+
+    def get_rotation(self) -> float:
+        """
+        Get the rotation relative to the parent.
+
+        Returns:
+        - Current rotation, in degrees.
+        """
+
+        return math.degrees(float(self._graph._rotations[self._index]))
+
+    def rotate(self, angle: float):
+        """
+        Rotate the node relatively to its current rotation.
+
+        Parameters:
+        - angle: Angle to add, in degrees.
+        """
+
+        self._graph._rotations[self._index] += math.radians(angle)
+        self._graph._touch(self._index)
+
+    def set_scale(self, factors: Vector2f):
+        """
+        Set the scale relative to the parent.
+
+        Parameters:
+        - factors: New scale factors.
+        """
+
+        self._graph._scales[self._index] = (factors.x, factors.y)
+        self._graph._touch(self._index)
+
+    def get_scale(self) -> Vector2f:
+        """
+        Get the scale relative to the parent.
+
+        Returns:
+        - Current scale factors.
+        """
+
+        x, y = self._graph._scales[self._index].tolist()
+        return Vector2f(x, y)
+
+    def set_origin(self, origin: Vector2f):
+        """
+        Set the local origin, the center of the position, rotation and scale.
+
+        Parameters:
+        - origin: New origin.
+        """
+
+        self._graph._origins[self._index] = (origin.x, origin.y)
+        self._graph._touch(self._index)
+
+    def get_origin(self) -> Vector2f:
+        """
+        Get the local origin.
+
+        Returns:
+        - Current origin.
+        """
+
+        x, y = self._graph._origins[self._index].tolist()
+        return Vector2f(x, y)
+
+    def get_parent(self) -> Optional['SceneNode']:
+        """
+        Get the parent node.
+
+        Returns:
+        - The parent, None for a root node.
+        """
+
+        parent = int(self._graph._parents[self._index])
+        return None if parent < 0 else self._graph._nodes[parent]
+
+    def get_children(self) -> List['SceneNode']:
+        """
+        Get the child nodes.
+
+        Returns:
+        - List of children.
+        """
+
+        return [self._graph._nodes[child] for child in self._graph._children[self._index]]
+
+    def set_parent(self, parent: Optional['SceneNode']):
+        """
+        Attach the node to another parent, or make it a root node.
+
+        Parameters:
+        - parent: New parent, None for a root node.
+        """
+
+        self._graph._set_parent(self._index, -1 if parent is None else parent._index)
+
+    def add_child(self, child: 'SceneNode'):
+        """
+        Attach a node as a child of this node.
+
+        Parameters:
+        - child: Node to attach.
+        """
+
+        child.set_parent(self)
+
+    def set_sprite(self, sprite: Optional[Sprite]):
+        """
+        Set the sprite drawn at this node by SceneGraph.submit. The texture, texture rectangle and color of the sprite are used, its own transform is ignored.
+
+        Parameters:
+        - sprite: The sprite, None to draw nothing.
+        """
+
+        self._graph._sprites[self._index] = sprite
+
+    def get_sprite(self) -> Optional[Sprite]:
+        """
+        Get the sprite drawn at this node.
+
+        Returns:
+        - The sprite, None if there is none.
+        """
+
+        return self._graph._sprites[self._index]
+
+    def attach(self, transformable: Transformable):
+        """
+        Attach an object, such as a sprite of an animation, which follows the node: its position, rotation and scale are set from the world transform of the node after every update where the node moved.
+
+        Parameters:
+        - transformable: Object to attach.
+        """
+
+        self._graph._attachments[self._index].append(transformable)
+        self._graph._world_dirty[self._index] = True
+        self._graph._has_changes = True
+
+    def detach(self, transformable: Transformable):
+        """
+        Detach an object attached by attach.
+
+        Parameters:
+        - transformable: Attached object.
+        """
+
+        self._graph._attachments[self._index].remove(transformable)
+
+    def get_world_position(self) -> Vector2f:
+        """
+        Get the position of the local origin in world space, as of the last update.
+
+        Returns:
+        - World position.
+        """
+
+        m = self._graph._world[self._index]
+        return Vector2f(float(m[0, 2]), float(m[1, 2]))
+
+    def get_world_transform(self) -> Transform:
+        """
+        Get the world transform, as of the last update.
+
+        Returns:
+        - World transform.
+        """
+
+        m = self._graph._world[self._index].tolist()
+        return Transform(m[0][0], m[0][1], m[0][2], m[1][0], m[1][1], m[1][2], 0.0, 0.0, 1.0)
+
+class SceneGraph:
+    """
+    Transform hierarchy with cached world matrices.
+
+    Local position, rotation, scale and origin of every node are stored in NumPy arrays. An update rebuilds the local matrices of the changed nodes, then the world matrices of their subtrees one depth level at a time, each level in one vectorized operation. Unchanged subtrees are not touched.
+    """
+
+    def __init__(self, capacity: int = 256):
+        """
+        Constructor.
+
+        Parameters:
+        - capacity: Initial count of nodes the arrays can hold, they grow when needed.
+        """
+
+        self._capacity = 0
+        self._count = 0
+        self._free: List[int] = []
+        self._nodes: List[Optional[SceneNode]] = []
+        self._children: List[List[int]] = []
+        self._sprites: List[Optional[Sprite]] = []
+        self._attachments: List[List[Transformable]] = []
+        self._max_depth = 0
+        self._has_changes = False
+        self._grow(max(1, capacity))
+
+    def create_node(self, parent: Optional[SceneNode] = None, sprite: Optional[Sprite] = None) -> SceneNode:
+        """
+        Create a node.
+
+        Parameters:
+        - parent: Parent node, None for a root node.
+        - sprite: Sprite drawn at the node by submit.
+
+        Returns:
+        - The node.
+        """
+
+        if len(self._free) > 0:
+            index = self._free.pop()
+        else:
+            if self._count == self._capacity:
+                self._grow(self._capacity * 2)
+            index = self._count
+            self._count += 1
+
+        self._positions[index] = 0.0
+        self._origins[index] = 0.0
+        self._scales[index] = 1.0
+        self._rotations[index] = 0.0
+        self._parents[index] = -1
+        self._depths[index] = 0
+        self._alive[index] = True
+        node = SceneNode(self, index)
+        self._nodes[index] = node
+        self._children[index] = []
+        self._sprites[index] = sprite
+        self._attachments[index] = []
+        self._touch(index)
+
+        if parent is not None:
+            self._set_parent(index, parent._index)
+        return node
+
+    def remove_node(self, node: SceneNode):
+        """
+        Remove a node and its subtree, their handles must not be used anymore.
+
+        Parameters:
+        - node: Node to remove.
+        """
+
+        index = node._index
+        if self._nodes[index] is not node:
+            raise ValueError('Node not found.')
+
+        parent = int(self._parents[index])
+        if parent >= 0:
+            self._children[parent].remove(index)
+
+        stack = [index]
+        while len(stack) > 0:
+            current = stack.pop()
+            stack.extend(self._children[current])
+            self._alive[current] = False
+            self._local_dirty[current] = False
+            self._world_dirty[current] = False
+            self._nodes[current] = None
+            self._children[current] = []
+            self._sprites[current] = None
+            self._attachments[current] = []
+            self._free.append(current)
+
+    def get_node_count(self) -> int:
+        """
+        Get the count of nodes.
+
+        Returns:
+        - Count of nodes.
+        """
+
+        return self._count - len(self._free)
+
+    def get_world_matrices(self) -> np.ndarray:
+        """
+        Get the world matrices of all node slots, as of the last update. Slots of removed nodes hold stale values.
+
+        Returns:
+        - Array of shape (capacity, 2, 3), the rows (a, b, tx) and (c, d, ty) of each affine matrix.
+        """
+
+        return self._world[:self._count]
+
+    @Profiler.profile('SceneGraph.update')
+    def update(self) -> int:
+        """
+        Rebuild the matrices of the changed nodes and of their subtrees, and move the attached objects.
+
+        Returns:
+        - Count of world matrices rebuilt.
+        """
+
+        if not self._has_changes:
+            return 0
+        self._has_changes = False
+
+        count = self._count
+        local_dirty = self._local_dirty[:count]
+        changed = np.flatnonzero(local_dirty)
+        if len(changed) > 0:
+            self._build_local(changed)
+            self._world_dirty[changed] = True
+            local_dirty[:] = False
+
+        world_dirty = self._world_dirty[:count]
+        parents = self._parents[:count]
+        depths = self._depths[:count]
+        alive = self._alive[:count]
+        has_parent = parents >= 0
+        parent_indices = np.where(has_parent, parents, 0)
+
+        rebuilt = 0
+        for depth in range(self._max_depth + 1):
+            level = alive & (depths == depth)
+            if depth > 0:
+                # A node is dirty if its parent was rebuilt on the previous level.
+                world_dirty |= level & has_parent & world_dirty[parent_indices]
+            indices = np.flatnonzero(level & world_dirty)
+            if len(indices) == 0:
+                continue
+            rebuilt += len(indices)
+            if depth == 0:
+                self._world[indices] = self._local[indices]
+            else:
+                parent_world = self._world[parents[indices]]
+                local = self._local[indices]
+                world = self._world
+                # Product of the 2x3 affine matrices, with the implicit (0, 0, 1) row.
+                world[indices, :, :2] = np.matmul(parent_world[:, :, :2], local[:, :, :2])
+                world[indices, :, 2] = np.einsum('nij,nj->ni', parent_world[:, :, :2], local[:, :, 2]) + parent_world[:, :, 2]
+
+        for index in np.flatnonzero(world_dirty).tolist():
+            if len(self._attachments[index]) > 0:
+                self._apply_attachments(index)
+        world_dirty[:] = False
+        return rebuilt
+
+    def submit(self, batch: SpriteBatch, z: int = 0):
+        """
+        Add the sprites of the nodes to a sprite batch, transformed by the world matrices of their nodes.
+
+        Parameters:
+        - batch: The sprite batch.
+        - z: Layer of the quads.
+        """
+
+        world = self._world[:self._count].tolist()
+        for index, sprite in enumerate(self._sprites):
+            if sprite is None:
+                continue
+            (a, b, tx), (c, d, ty) = world[index]
+            batch.add_affine(sprite.get_texture(), sprite.get_texture_rect(), (a, b, tx, c, d, ty), sprite.get_color(), z)
+
+    def _touch(self, index: int):
+        self._local_dirty[index] = True
+        self._has_changes = True
+
+    def _grow(self, capacity: int):
+        """
+        Grow the arrays, keeping their content.
+
+        Parameters:
+        - capacity: New count of node slots.
+        """
+
+        def grow(array: Optional[np.ndarray], shape: tuple, dtype: type, fill: float) -> np.ndarray:
+            result = np.full((capacity,) + shape, fill, dtype=dtype)
+            if array is not None:
+                result[:self._capacity] = array
+            return result
+
+        first = self._capacity == 0
+        self._positions = grow(None if first else self._positions, (2,), np.float32, 0.0)
+        self._origins = grow(None if first else self._origins, (2,), np.float32, 0.0)
+        self._scales = grow(None if first else self._scales, (2,), np.float32, 1.0)
+        self._rotations = grow(None if first else self._rotations, (), np.float32, 0.0)
+        self._parents = grow(None if first else self._parents, (), np.int32, -1)
+        self._depths = grow(None if first else self._depths, (), np.int32, 0)
+        self._alive = grow(None if first else self._alive, (), np.bool_, False)
+        self._local_dirty = grow(None if first else self._local_dirty, (), np.bool_, False)
+        self._world_dirty = grow(None if first else self._world_dirty, (), np.bool_, False)
+        self._local = grow(None if first else self._local, (2, 3), np.float32, 0.0)
+        self._world = grow(None if first else self._world, (2, 3), np.float32, 0.0)
+
+        extra = capacity - self._capacity
+        self._nodes.extend([None] * extra)
+        self._children.extend([] for _ in range(extra))
+        self._sprites.extend([None] * extra)
+        self._attachments.extend([] for _ in range(extra))
+        self._capacity = capacity
+
+    def _set_parent(self, index: int, parent: int):
+        """
+        Change the parent of a node and update the depths of its subtree.
+
+        Parameters:
+        - index: Index of the node.
+        - parent: Index of the new parent, -1 for a root node.
+        """
+
+        ancestor = parent
+        while ancestor >= 0:
+            if ancestor == index:
+                raise ValueError('A node cannot be attached to its own subtree.')
+            ancestor = int(self._parents[ancestor])
+
+        old_parent = int(self._parents[index])
+        if old_parent >= 0:
+            self._children[old_parent].remove(index)
+        if parent >= 0:
+            self._children[parent].append(index)
+        self._parents[index] = parent
+
+        stack = [(index, 0 if parent < 0 else int(self._depths[parent]) + 1)]
+        while len(stack) > 0:
+            current, depth = stack.pop()
+            self._depths[current] = depth
+            self._max_depth = max(self._max_depth, depth)
+            stack.extend((child, depth + 1) for child in self._children[current])
+
+        self._world_dirty[index] = True
+        self._has_changes = True
+
+    def _build_local(self, indices: np.ndarray):
+        """
+        Build the local matrices of nodes, like Transformable.get_transform.
+
+        Parameters:
+        - indices: Indices of the nodes.
+        """
+
+        angles = self._rotations[indices]
+        cos = np.cos(angles)
+        sin = np.sin(angles)
+        sx = self._scales[indices, 0]
+        sy = self._scales[indices, 1]
+        ox = self._origins[indices, 0]
+        oy = self._origins[indices, 1]
+
+        a = sx * cos
+        b = -sy * sin
+        c = sx * sin
+        d = sy * cos
+        local = self._local
+        local[indices, 0, 0] = a
+        local[indices, 0, 1] = b
+        local[indices, 0, 2] = self._positions[indices, 0] - ox * a - oy * b
+        local[indices, 1, 0] = c
+        local[indices, 1, 1] = d
+        local[indices, 1, 2] = self._positions[indices, 1] - ox * c - oy * d
+
+    def _apply_attachments(self, index: int):
+        """
+        Set the position, rotation and scale of the objects attached to a node from its world matrix.
+
+        Parameters:
+        - index: Index of the node.
+        """
+
+        (a, b, tx), (c, d, ty) = self._world[index].tolist()
+        scale_x = math.hypot(a, c)
+        scale_y = math.hypot(b, d)
+        if a * d - b * c < 0:
+            scale_y = -scale_y
+        position = Vector2f(tx, ty)
+        rotation = math.degrees(math.atan2(c, a))
+        scale = Vector2f(scale_x, scale_y)
+        for transformable in self._attachments[index]:
+            transformable.set_position(position)
+            transformable.set_rotation(rotation)
+            transformable.set_scale(scale)
@@ -0,0 +1,398 @@
+import heapq
+import itertools
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from .sfSystem import *
+from .sfGraphics import *
+from .Time import TimeMgr
+
+def _lerp_float(start: float, end: float, t: float) -> float:
+    return start + (end - start) * t
+
+def _lerp_vector(start: Vector2f, end: Vector2f, t: float) -> Vector2f:
+    return Vector2f(start.x + (end.x - start.x) * t, start.y + (end.y - start.y) * t)
+
+def _lerp_color(start: Color, end: Color, t: float) -> Color:
+    return Color(int(start.r + (end.r - start.r) * t), int(start.g + (end.g - start.g) * t),
+                 int(start.b + (end.b - start.b) * t), int(start.a + (end.a - start.a) * t))
+
+class Easing:
+    """
+    Easing functions used by tweens.
+
+    Every function maps a progress in the range [0, 1] to an eased progress.
+    """
+
+    @staticmethod
+    def linear(t: float) -> float:
+        return t
+
+    @staticmethod
+    def in_quad(t: float) -> float:
+        return t * t
+
+    @staticmethod
+    def out_quad(t: float) -> float:
+        return t * (2 - t)
+
+    @staticmethod
+    def in_out_quad(t: float) -> float:
+        return 2 * t * t if t < 0.5 else -1 + (4 - 2 * t) * t
+
+    @staticmethod
+    def in_cubic(t: float) -> float:
+        return t * t * t
+
+    @staticmethod
+    def out_cubic(t: float) -> float:
+        t -= 1
+        return t * t * t + 1
+
+    @staticmethod
+    def in_out_sine(t: float) -> float:
+        return -(math.cos(math.pi * t) - 1) / 2
+
+class Timer:
+    """
+    Handle of a delayed or repeating callback, returned by Scheduler.after and Scheduler.every.
+    """
+
+    __slots__ = ('callback', 'interval', 'remaining', '_active')
+
+    def __init__(self, callback: Callable[[], Any], interval: float, remaining: int):
+        """
+        Constructor.
+
+        Parameters:
+        - callback: Function called when the timer is due.
+        - interval: Interval in seconds between two calls.
+        - remaining: Count of calls left, -1 for endless.
+        """
+
+        self.callback = callback
+        self.interval = interval
+        self.remaining = remaining
+        self._active = True
+
+    def cancel(self):
+        """
+        Cancel the timer, it will not be called anymore.
+        """
+
+        self._active = False
+
+    def is_active(self) -> bool:
+        """
+        Check if the timer is still scheduled.
+
+        Returns:
+        - True if the timer is active, False otherwise.
+        """
+
+        return self._active
+
+class Tween:
+    """
+    Handle of a property tween, returned by Scheduler.tween.
+
+    The property is set through the target's set_<property> method, such as set_position, set_color, set_scale or set_rotation.
+    """
+
+    __slots__ = ('_setter', '_getter', 'start', 'end', 'duration', 'easing', 'on_complete', '_lerp', '_elapsed', '_active')
+
+    _setters: Dict[str, Tuple[str, str]] = {
+        'position': ('set_position', 'get_position'),
+        'scale': ('set_scale', 'get_scale'),
+        'origin': ('set_origin', 'get_origin'),
+        'rotation': ('set_rotation', 'get_rotation'),
+        'color': ('set_color', 'get_color'),
+        'fill_color': ('set_fill_color', 'get_fill_color'),
+        'volume': ('set_volume', 'get_volume'),
+    }
+
+    def __init__(self, target: Any, prop: str, end: Union[float, Vector2f, Color], duration: float,
+                 easing: Callable[[float], float], start: Union[float, Vector2f, Color, None], on_complete: Optional[Callable[[], Any]]):
+        """
+        Constructor.
+
+        Parameters:
+        - target: Object whose property is tweened.
+        - prop: Name of the property, such as 'position', 'scale', 'rotation' or 'color'.
+        - end: Final value.
+        - duration: Duration in seconds.
+        - easing: Easing function.
+        - start: Initial value. The current value is read when the tween starts if it is None.
+        - on_complete: Function called when the tween is finished.
+        """
+
+        setter, getter = Tween._setters.get(prop, (f'set_{prop}', f'get_{prop}'))
+        if not hasattr(target, setter):
+            raise ValueError(f'Target has no {setter} method to tween {prop}.')
+        self._getter = getattr(target, getter, None)
+        if start is None and self._getter is None:
+            raise ValueError(f'Target has no {getter} method, a start value is required to tween {prop}.')
+        if duration < 0:
+            raise ValueError('Duration must not be negative.')
+
+        if isinstance(end, Color):
+            value_type, self._lerp = Color, _lerp_color
+        elif isinstance(end, (int, float)):
+            value_type, self._lerp = (int, float), _lerp_float
+        elif isinstance(end, Vector2f):
+            value_type, self._lerp = Vector2f, _lerp_vector
+        else:
+            raise ValueError('End value must be a float, a Vector2f or a Color.')
+        if start is not None and not isinstance(start, value_type):
+            raise ValueError('Start value must have the type of the end value.')
+
+        self._setter = getattr(target, setter)
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.on_complete = on_complete
+        self._elapsed = 0.0
+        self._active = True
+
+    def cancel(self):
+        """
+        Cancel the tween, the property keeps its current value.
+        """
+
+        self._active = False
+
+    def is_active(self) -> bool:
+        """
+        Check if the tween is still running or waiting to start.
+
+        Returns:
+        - True if the tween is active, False otherwise.
+        """
+
+        return self._active
+
+class Scheduler:
+    """
+    Timer and tween scheduler.
+
+    Timers are kept in a min-heap ordered by due time, so a tick only touches the timers which are due.
+    Running tweens are advanced together in one pass, and finished ones are removed by swap-remove.
+    Schedulers can have children with their own time scale and pause state, such as a game scheduler which is paused while the UI scheduler keeps running.
+    """
+
+    def __init__(self):
+        """
+        Default constructor.
+        """
+
+        self.time_scale = 1.0
+        self.paused = False
+        self._time = 0.0
+        self._heap: List[Tuple[float, int, Union[Timer, Tween]]] = []
+        self._counter = itertools.count()
+        self._tweens: List[Tween] = []
+        self._children: List[Scheduler] = []
+
+    def after(self, delay: Time, callback: Callable[[], Any]) -> Timer:
+        """
+        Call a function once after a delay.
+
+        Parameters:
+        - delay: Delay before the call.
+        - callback: Function to call.
+
+        Returns:
+        - Handle of the timer.
+        """
+
+        timer = Timer(callback, 0.0, 1)
+        self._push(self._time + delay.as_seconds(), timer)
+        return timer
+
+    def every(self, interval: Time, callback: Callable[[], Any], count: int = -1, delay: Optional[Time] = None) -> Timer:
+        """
+        Call a function repeatedly.
+
+        Parameters:
+        - interval: Interval between two calls.
+        - callback: Function to call.
+        - count: Count of calls, -1 for endless.
+        - delay: Delay before the first call, the interval is used if it is None.
+
+        Returns:
+        - Handle of the timer.
+        """
+
+        if interval <= Time.Zero():
+            raise ValueError('Interval must be positive.')
+
+        timer = Timer(callback, interval.as_seconds(), count)
+        first = timer.interval if delay is None else delay.as_seconds()
+        self._push(self._time + first, timer)
+        return timer
+
+    def tween(self, target: Any, prop: str, end: Union[float, Vector2f, Color], duration: Time,
+              easing: Callable[[float], float] = Easing.linear, start: Union[float, Vector2f, Color, None] = None,
+              delay: Optional[Time] = None, on_complete: Optional[Callable[[], Any]] = None) -> Tween:
+        """
+        Tween a property of an object, such as the position, scale, rotation or color of a Sprite.
+
+        Parameters:
+        - target: Object whose property is tweened.
+        - prop: Name of the property, the target must have the set_<prop> method.
+        - end: Final value, which is a float, a Vector2f or a Color.
+        - duration: Duration of the tween.
+        - easing: Easing function, see Easing.
+        - start: Initial value. The current value is read when the tween starts if it is None.
+        - delay: Delay before the tween starts.
+        - on_complete: Function called when the tween is finished.
+
+        Returns:
+        - Handle of the tween.
+        """
+
+        tween = Tween(target, prop, end, duration.as_seconds(), easing, start, on_complete)
+        if delay is None or delay <= Time.Zero():
+            self._start_tween(tween)
+        else:
+            self._push(self._time + delay.as_seconds(), tween)
+        return tween
+
+    def create_child(self) -> 'Scheduler':
+        """
+        Create a child scheduler, which is updated with the scaled delta time of this scheduler.
+
+        Returns:
+        - The child scheduler.
+        """
+
+        child = Scheduler()
+        self._children.append(child)
+        return child
+
+    def remove_child(self, child: 'Scheduler'):
+        """
+        Remove a child scheduler.
+
+        Parameters:
+        - child: The child scheduler.
+        """
+
+        if child not in self._children:
+            raise ValueError('Child scheduler not found.')
+
+        self._children.remove(child)
+
+    def get_time(self) -> Time:
+        """
+        Get the time elapsed in this scheduler, scaled and without paused periods.
+
+        Returns:
+        - Elapsed time.
+        """
+
+        return Time.FromSeconds(self._time)
+
+    def get_timer_count(self) -> int:
+        """
+        Get the count of scheduled timers and delayed tweens, including cancelled ones not yet discarded.
+
+        Returns:
+        - Count of scheduled items.
+        """
+
+        return len(self._heap)
+
+    def get_tween_count(self) -> int:
+        """
+        Get the count of running tweens.
+
+        Returns:
+        - Count of running tweens.
+        """
+
+        return len(self._tweens)
+
+    def update(self, delta_time: Optional[Time] = None):
+        """
+        Advance the scheduler, call the due timers and advance the running tweens.
+
+        Parameters:
+        - delta_time: Time elapsed since last update. TimeMgr.get_smoothed_delta_time() is used if it is None.
+        """
+
+        if self.paused:
+            return
+
+        if delta_time is None:
+            delta_time = TimeMgr.get_smoothed_delta_time()
+        delta = delta_time.as_seconds() * self.time_scale
+        self._time += delta
+
+        heap = self._heap
+        while len(heap) > 0 and heap[0][0] <= self._time:
+            due, _, item = heapq.heappop(heap)
+            if not item._active:
+                continue
+            if isinstance(item, Tween):
+                self._start_tween(item)
+                # The delta of this tick is added by _update_tweens, only the part after the due time counts.
+                item._elapsed = self._time - due - delta
+                continue
+            item.callback()
+            if item.remaining > 0:
+                item.remaining -= 1
+            if item.remaining == 0 or item.interval <= 0:
+                item._active = False
+            elif item._active:
+                self._push(due + item.interval, item)
+
+        self._update_tweens(delta)
+
+        scaled_delta = Time.FromSeconds(delta)
+        for child in self._children:
+            child.update(scaled_delta)
+
+    def clear(self):
+        """
+        Cancel all timers and tweens, children are kept.
+        """
+
+        for _, _, item in self._heap:
+            item._active = False
+        for tween in self._tweens:
+            tween._active = False
+        self._heap.clear()
+        self._tweens.clear()
+
+    def _push(self, due: float, item: Union[Timer, Tween]):
+        heapq.heappush(self._heap, (due, next(self._counter), item))
+
+    def _start_tween(self, tween: Tween):
+        if tween.start is None:
+            tween.start = tween._getter()
+        self._tweens.append(tween)
+
+    def _update_tweens(self, delta: float):
+        tweens = self._tweens
+        finished: List[Tween] = []
+        i = 0
+        while i < len(tweens):
+            tween = tweens[i]
+            if tween._active:
+                tween._elapsed += delta
+                progress = tween._elapsed / tween.duration if tween.duration > 0 else 1.0
+                if progress >= 1.0:
+                    tween._setter(tween.end)
+                    tween._active = False
+                    finished.append(tween)
+                else:
+                    tween._setter(tween._lerp(tween.start, tween.end, tween.easing(progress)))
+                    i += 1
+                    continue
+            tweens[i] = tweens[-1]
+            tweens.pop()
+
+        for tween in finished:
+            if tween.on_complete is not None:
+                tween.on_complete()
@@ -0,0 +1,214 @@
+from typing import List, Optional, Tuple, Union
+from .sfSystem import *
+from .sfGraphics import *
+from .Time import Profiler
+from .RenderStateMgr import RenderStateMgr
+
+Quad = Tuple[Texture, IntRect, Transform, Color]
+
+class SpriteBatch:
+    """
+    Sprite batch class.
+
+    It collects sprites, or (texture, rect, transform, color) quads, sorts them by z and texture, and draws every run of quads sharing a texture with one VertexArray draw.
+    The vertex arrays, vertices, vectors and render states are kept between frames, so a frame with the same amount of quads does not allocate them again.
+    """
+
+    def __init__(self, sort_by_texture: bool = True):
+        """
+        Constructor.
+
+        Parameters:
+        - sort_by_texture: Whether to sort the quads of the same z by texture. It minimises draw calls, but quads of the same z do not keep their adding order.
+        """
+
+        self.sort_by_texture = sort_by_texture
+        self._entries: List[Tuple[int, int, int, Texture, Tuple[float, ...], Color]] = []
+        self._runs: List[Tuple[Texture, int]] = []
+        self._arrays: List[VertexArray] = []
+        self._states: List[RenderStates] = []
+        self._vertices: List[Vertex] = [Vertex() for _ in range(6)]
+        # Positions and texture coordinates of the 4 corners, vertices copy them when they are assigned.
+        self._corners: List[Vector2f] = [Vector2f() for _ in range(8)]
+        self._dirty = False
+
+    def clear(self):
+        """
+        Remove all quads, usually at the beginning of a frame.
+        """
+
+        self._entries.clear()
+        self._dirty = True
+
+    def add(self, item: Union[Sprite, Quad], z: int = 0):
+        """
+        Add a sprite or a quad.
+
+        Parameters:
+        - item: A Sprite, or a tuple of texture, texture rectangle, transform and color.
+        - z: Layer of the quad.
+        """
+
+        if isinstance(item, Sprite):
+            texture = item.get_texture()
+            rect = item.get_texture_rect()
+            transform = item.get_transform()
+            color = item.get_color()
+        else:
+            texture, rect, transform, color = item
+
+        m = transform.get_matrix()
+        self.add_affine(texture, rect, (m[0], m[4], m[12], m[1], m[5], m[13]), color, z)
+
+    def add_affine(self, texture: Texture, rect: IntRect, affine: Tuple[float, float, float, float, float, float], color: Color, z: int = 0):
+        """
+        Add a quad transformed by an affine matrix, without creating a Transform.
+
+        Parameters:
+        - texture: Texture of the quad.
+        - rect: Texture rectangle.
+        - affine: Matrix (a, b, tx, c, d, ty), which maps (x, y) to (a * x + b * y + tx, c * x + d * y + ty).
+        - color: Color of the quad.
+        - z: Layer of the quad.
+        """
+
+        a, b, tx, c, d, ty = affine
+        u, v = float(rect.position.x), float(rect.position.y)
+        tw, th = float(rect.size.x), float(rect.size.y)
+        w, h = abs(tw), abs(th)
+        # Corners of the quad in target space, followed by the texture rectangle, which is flipped when its size is negative.
+        corners = (tx, ty,
+                   a * w + tx, c * w + ty,
+                   b * h + tx, d * h + ty,
+                   a * w + b * h + tx, c * w + d * h + ty,
+                   u, v, u + tw, v + th)
+        self._entries.append((z, id(texture) if self.sort_by_texture else 0, len(self._entries), texture, corners, color))
+        self._dirty = True
+
+    def add_all(self, items: List[Union[Sprite, Quad]], z: int = 0):
+        """
+        Add several sprites or quads.
+
+        Parameters:
+        - items: Sprites, or tuples of texture, texture rectangle, transform and color.
+        - z: Layer of the quads.
+        """
+
+        for item in items:
+            self.add(item, z)
+
+    def get_quad_count(self) -> int:
+        """
+        Get the count of quads in the batch.
+
+        Returns:
+        - Count of quads.
+        """
+
+        return len(self._entries)
+
+    def get_draw_call_count(self) -> int:
+        """
+        Get the count of draw calls needed to draw the batch.
+
+        Returns:
+        - Count of draw calls.
+        """
+
+        if self._dirty:
+            self._build()
+        return len(self._runs)
+
+    def draw(self, target: RenderTarget, states: Optional[RenderStates] = None):
+        """
+        Draw all quads.
+
+        Parameters:
+        - target: Render target.
+        - states: Render states, the texture is replaced by the one of each run. If it is None, the shared states of RenderStateMgr are used.
+        """
+
+        if self._dirty:
+            self._build()
+
+        for i, (texture, _) in enumerate(self._runs):
+            if states is None:
+                target.draw(self._arrays[i], RenderStateMgr.get_states(texture))
+                continue
+            while len(self._states) <= i:
+                self._states.append(RenderStates.default())
+            run_states = self._states[i]
+            run_states.blend_mode = states.blend_mode
+            run_states.stencil_mode = states.stencil_mode
+            run_states.transform = states.transform
+            run_states.coordinate_type = states.coordinate_type
+            run_states.shader = states.shader
+            run_states.texture = texture
+            target.draw(self._arrays[i], run_states)
+
+        if Profiler.enabled:
+            Profiler.count('draw_calls', len(self._runs))
+            Profiler.count('texture_binds', len(self._runs))
+
+    def _build(self):
+        """
+        Sort the quads and fill the vertex arrays, one per run of quads sharing z and texture.
+        """
+
+        self._dirty = False
+        self._runs.clear()
+        if len(self._entries) == 0:
+            return
+
+        self._entries.sort(key=lambda entry: (entry[0], entry[1], entry[2]))
+
+        start = 0
+        for i in range(1, len(self._entries) + 1):
+            if i == len(self._entries) or self._entries[i][3] is not self._entries[start][3] or self._entries[i][0] != self._entries[start][0]:
+                self._fill(len(self._runs), start, i)
+                self._runs.append((self._entries[start][3], i - start))
+                start = i
+
+    def _fill(self, run: int, start: int, end: int):
+        """
+        Fill the vertex array of a run.
+
+        Parameters:
+        - run: Index of the run.
+        - start: Index of the first quad.
+        - end: Index after the last quad.
+        """
+
+        while len(self._arrays) <= run:
+            self._arrays.append(VertexArray(PrimitiveType.Triangles))
+
+        array = self._arrays[run]
+        vertex_count = (end - start) * 6
+        if array.get_vertex_count() != vertex_count:
+            array.resize(vertex_count)
+        v0, v1, v2, v3, v4, v5 = self._vertices
+        p0, p1, p2, p3, c0, c1, c2, c3 = self._corners
+
+        index = 0
+        for entry in self._entries[start:end]:
+            p0.x, p0.y, p1.x, p1.y, p2.x, p2.y, p3.x, p3.y, u0, t0, u1, t1 = entry[4]
+            c0.x, c0.y = u0, t0
+            c1.x, c1.y = u1, t0
+            c2.x, c2.y = u0, t1
+            c3.x, c3.y = u1, t1
+            color = entry[5]
+
+            v0.position, v0.color, v0.texCoords = p0, color, c0
+            v1.position, v1.color, v1.texCoords = p1, color, c1
+            v2.position, v2.color, v2.texCoords = p2, color, c2
+            v3.position, v3.color, v3.texCoords = p2, color, c2
+            v4.position, v4.color, v4.texCoords = p1, color, c1
+            v5.position, v5.color, v5.texCoords = p3, color, c3
+
+            array[index] = v0
+            array[index + 1] = v1
+            array[index + 2] = v2
+            array[index + 3] = v3
+            array[index + 4] = v4
+            array[index + 5] = v5
+            index += 6
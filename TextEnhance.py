@@ -7,13 +7,17 @@ The main components of this module include:
 - `EText.StyleConfig`: A class to manage the style configuration of the text, such as color, base size, letter spacing, and line spacing.
 - `EText`: The main class for handling enhanced text rendering. It parses the input text, applies styles, and renders the text on a texture.
 - `EText._TextFragment`: A helper class to represent a fragment of text with specific style and configuration.
+- `ETextCache`: A bounded, reference counted LRU cache of rendered `EText` objects, used by `EText.from_str` to share identical labels.
 
 The module uses the `sfSystem` and `sfGraphics` libraries from the `sf` framework to handle vector operations and graphics rendering.
 """
 
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 from .sfSystem import Vector2u, Vector2f
-from .sfGraphics import BlendMode, RenderStates, Sprite, Color, Font, Text, RenderTexture
+from .sfGraphics import RenderStates, Sprite, Color, Font, Text, RenderTexture
+from .Time import Profiler
+from .RenderStateMgr import RenderStateMgr
 
 class EText(Sprite):
     """
@@ -106,14 +110,18 @@ class EText(Sprite):
         self._canvas.clear(Color.transparent())
         self._parse()
 
+    @Profiler.profile('EText.render')
     def render(self):
         """
         Renders the text on the canvas.
         """
 
+        states = self.text_render_state()
         for texts in self._render_fragments:
             for text in texts:
-                self._canvas.draw(text, self.text_render_state())
+                self._canvas.draw(text, states)
+            if Profiler.enabled:
+                Profiler.count('draw_calls', len(texts))
         self._canvas.display()
 
     def render_one(self):
@@ -127,7 +135,7 @@ class EText(Sprite):
             self._canvas.display()
 
     @staticmethod
-    def from_str(text: str, font: Font, size: Vector2u, style_config: StyleConfig, text_pos: int = 0, pre_render: bool = True):
+    def from_str(text: str, font: Font, size: Vector2u, style_config: StyleConfig, text_pos: int = 0, pre_render: bool = True, cached: bool = False):
         """
         Creates an EText object from a string.
 
@@ -138,26 +146,27 @@ class EText(Sprite):
         - style_config    The style configuration for the text.
         - text_pos    The position of the text in the rendered rectangle.
         - pre_render    Whether to pre-render the text. If True, the text will be rendered immediately. If False, the text will be rendered when the render() method is called.
+        - cached    Whether to get the text from ETextCache. If True, an identical text that has already been rendered is shared instead of rendered again, and ETextCache.release() should be called when it is no longer used. A cached text is always pre-rendered and must not be modified.
         """
 
+        if cached:
+            return ETextCache.acquire(text, font, size, style_config, text_pos)
+
         text_obj = EText(font, text, size, style_config, text_pos)
         if pre_render:
             text_obj.render()
         return text_obj
 
     @staticmethod
-    def text_render_state():
+    def text_render_state() -> RenderStates:
         """
-        Returns the default render state for the text.
+        Returns the default render state for the text, shared by all texts, so it must not be modified.
 
         Returns:
         - The default render state for the text.
         """
 
-        state = RenderStates.default()
-        state.blend_mode = BlendMode(BlendMode.Factor.One, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add,
-                                     BlendMode.Factor.One, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add)
-        return state
+        return RenderStateMgr.get_states(blend_mode=RenderStateMgr.premultiplied_alpha())
 
 
     def _get_line_spacing(self, text: str, size = None):
@@ -438,3 +447,183 @@ class EText(Sprite):
         for texts in self._render_fragments:
             for text in texts:
                 text.move(delta)
+
+
+class ETextCache:
+    """
+    Rendered text cache class.
+
+    It keeps rendered EText objects keyed by font, text, size, style configuration and text position, so that identical labels share one texture.
+    Every acquire() must be paired with a release(). Texts which are no longer referenced stay in the cache and are evicted in least recently used order when the capacity is exceeded.
+    """
+
+    _capacity: int = 256
+    _texts: OrderedDict = OrderedDict()
+    _ref_counts: Dict[Tuple, int] = {}
+    _text_to_key: Dict[EText, Tuple] = {}
+
+    @staticmethod
+    def make_key(text: str, font: Font, size: Vector2u, style_config: EText.StyleConfig, text_pos: int = 0) -> Tuple:
+        """
+        Make the cache key of a text.
+
+        Parameters:
+        - text: The text to be rendered.
+        - font: The font to use for rendering the text.
+        - size: The size of the text.
+        - style_config: The style configuration for the text.
+        - text_pos: The position of the text in the rendered rectangle.
+
+        Returns:
+        - The cache key of the text.
+        """
+
+        return (font, text, size.x, size.y, style_config.color.to_integer(), style_config.base_size,
+                style_config.letter_spacing, style_config.line_spacing, text_pos)
+
+    @classmethod
+    def acquire(cls, text: str, font: Font, size: Vector2u, style_config: EText.StyleConfig, text_pos: int = 0) -> EText:
+        """
+        Get a rendered text from the cache, render it if it is not cached yet.
+
+        Parameters:
+        - text: The text to be rendered.
+        - font: The font to use for rendering the text.
+        - size: The size of the text.
+        - style_config: The style configuration for the text.
+        - text_pos: The position of the text in the rendered rectangle.
+
+        Returns:
+        - The shared rendered text. Use Sprite(text.get_texture()) if it should be drawn at several positions.
+        """
+
+        key = cls.make_key(text, font, size, style_config, text_pos)
+        if key in cls._texts:
+            cls._texts.move_to_end(key)
+        else:
+            # EText._parse() modifies the style configuration, so a copy is given.
+            text_obj = EText(font, text, size, style_config.copy(), text_pos)
+            text_obj.render()
+            cls._texts[key] = text_obj
+            cls._text_to_key[text_obj] = key
+            cls._ref_counts[key] = 0
+        cls._ref_counts[key] += 1
+        cls._evict()
+
+        return cls._texts[key]
+
+    @classmethod
+    def release(cls, text: EText):
+        """
+        Release a text acquired from the cache.
+
+        Parameters:
+        - text: The text to release.
+        """
+
+        if text not in cls._text_to_key:
+            raise ValueError('Text is not in cache.')
+
+        key = cls._text_to_key[text]
+        if cls._ref_counts[key] <= 0:
+            raise ValueError('Text is already released.')
+
+        cls._ref_counts[key] -= 1
+        cls._evict()
+
+    @classmethod
+    def has_text(cls, text: str, font: Font, size: Vector2u, style_config: EText.StyleConfig, text_pos: int = 0) -> bool:
+        """
+        Check if a text is cached.
+
+        Parameters:
+        - text: The text to be rendered.
+        - font: The font to use for rendering the text.
+        - size: The size of the text.
+        - style_config: The style configuration for the text.
+        - text_pos: The position of the text in the rendered rectangle.
+
+        Returns:
+        - True if the text is cached, False otherwise.
+        """
+
+        return cls.make_key(text, font, size, style_config, text_pos) in cls._texts
+
+    @classmethod
+    def get_ref_count(cls, text: EText) -> int:
+        """
+        Get the reference count of a cached text.
+
+        Parameters:
+        - text: The cached text.
+
+        Returns:
+        - The reference count of the text, 0 if it is not cached.
+        """
+
+        if text not in cls._text_to_key:
+            return 0
+        return cls._ref_counts[cls._text_to_key[text]]
+
+    @classmethod
+    def set_capacity(cls, capacity: int):
+        """
+        Set the maximum count of cached texts. Texts still referenced are never evicted, so the cache could exceed it temporarily.
+
+        Parameters:
+        - capacity: Maximum count of cached texts.
+        """
+
+        if capacity < 0:
+            raise ValueError('Capacity must not be negative.')
+
+        cls._capacity = capacity
+        cls._evict()
+
+    @classmethod
+    def get_capacity(cls) -> int:
+        """
+        Get the maximum count of cached texts.
+
+        Returns:
+        - Maximum count of cached texts.
+        """
+
+        return cls._capacity
+
+    @classmethod
+    def clear(cls):
+        """
+        Clear all texts which are not referenced anymore.
+        """
+
+        for key in [key for key, count in cls._ref_counts.items() if count == 0]:
+            cls._remove(key)
+
+    @classmethod
+    def _evict(cls):
+        """
+        Evict the least recently used texts which are not referenced until the capacity is respected.
+        """
+
+        if len(cls._texts) <= cls._capacity:
+            return
+
+        for key in list(cls._texts.keys()):
+            if len(cls._texts) <= cls._capacity:
+                break
+            if cls._ref_counts[key] == 0:
+                cls._remove(key)
+
+    @classmethod
+    def _remove(cls, key: Tuple):
+        """
+        Remove a text from the cache.
+
+        Parameters:
+        - key: The cache key of the text.
+        """
+
+        text_obj = cls._texts.pop(key)
+        cls._text_to_key.pop(text_obj)
+        cls._ref_counts.pop(key)
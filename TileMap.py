@@ -0,0 +1,232 @@
+import math
+from array import array
+from typing import Dict, List, Optional, Set, Tuple, Union
+from .sfSystem import *
+from .sfGraphics import *
+from .Time import Profiler
+from .ResourceMgr import TextureMgr
+
+class TileMap(Transformable):
+    """
+    Chunked tile map class, inherits from Transformable.
+
+    The map is split in square chunks of tiles for every layer. Each chunk is built once into a static VertexBuffer (or a VertexArray if vertex buffers are not available) and only rebuilt when one of its tiles changes.
+    Only the chunks inside the current view of the render target are built and drawn.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, tileset: Texture, tile_size: Vector2u, map_size: Vector2u, layer_count: int = 1, chunk_size: int = 32):
+        """
+        Constructor.
+
+        Parameters:
+        - tileset: Tileset texture, tiles are numbered from left to right and from top to bottom.
+        - tile_size: Size of a tile in pixels.
+        - map_size: Size of the map in tiles.
+        - layer_count: Count of layers, layers are drawn in increasing order.
+        - chunk_size: Width and height of a chunk in tiles.
+        """
+
+        super().__init__()
+        self._tileset = tileset
+        self._tile_w = tile_size.x
+        self._tile_h = tile_size.y
+        self._width = map_size.x
+        self._height = map_size.y
+        self._chunk_size = chunk_size
+        self._columns = max(1, tileset.get_size().x // tile_size.x)
+        self._chunks_x = (self._width + chunk_size - 1) // chunk_size
+        self._chunks_y = (self._height + chunk_size - 1) // chunk_size
+
+        self._layers: List[array] = [array('i', [TileMap.EMPTY]) * (self._width * self._height) for _ in range(layer_count)]
+        self._chunks: Dict[Tuple[int, int, int], Tuple[Union[VertexBuffer, VertexArray], int]] = {}
+        self._dirty: Set[Tuple[int, int, int]] = set()
+        self._use_buffer = VertexBuffer.is_available()
+        self._states = RenderStates.default()
+        self._states.texture = tileset
+        # Takes the blend mode and shader of the states given to draw, the default states keep their own.
+        self._custom_states = RenderStates.default()
+        self._custom_states.texture = tileset
+
+    @staticmethod
+    def from_tileset(filename: str, tile_size: Vector2u, map_size: Vector2u, layer_count: int = 1, chunk_size: int = 32) -> 'TileMap':
+        """
+        Create a tile map whose tileset is loaded from assets/tilesets folder by TextureMgr.
+
+        Parameters:
+        - filename: Name of the tileset texture.
+        - tile_size: Size of a tile in pixels.
+        - map_size: Size of the map in tiles.
+        - layer_count: Count of layers.
+        - chunk_size: Width and height of a chunk in tiles.
+
+        Returns:
+        - The tile map.
+        """
+
+        return TileMap(TextureMgr.tilesets(filename), tile_size, map_size, layer_count, chunk_size)
+
+    def get_layer_count(self) -> int:
+        """
+        Get the count of layers.
+
+        Returns:
+        - Count of layers.
+        """
+
+        return len(self._layers)
+
+    def get_map_size(self) -> Vector2u:
+        """
+        Get the size of the map in tiles.
+
+        Returns:
+        - Size of the map.
+        """
+
+        return Vector2u(self._width, self._height)
+
+    def get_tile(self, layer: int, x: int, y: int) -> int:
+        """
+        Get a tile.
+
+        Parameters:
+        - layer: Index of the layer.
+        - x: Column of the tile.
+        - y: Row of the tile.
+
+        Returns:
+        - Index of the tile in the tileset, TileMap.EMPTY if there is no tile.
+        """
+
+        return self._layers[layer][y * self._width + x]
+
+    def set_tile(self, layer: int, x: int, y: int, tile: int):
+        """
+        Set a tile, only its chunk will be rebuilt.
+
+        Parameters:
+        - layer: Index of the layer.
+        - x: Column of the tile.
+        - y: Row of the tile.
+        - tile: Index of the tile in the tileset, TileMap.EMPTY to remove it.
+        """
+
+        if x < 0 or y < 0 or x >= self._width or y >= self._height:
+            raise ValueError(f'Tile ({x}, {y}) is out of the map.')
+
+        tiles = self._layers[layer]
+        index = y * self._width + x
+        if tiles[index] != tile:
+            tiles[index] = tile
+            self._dirty.add((layer, x // self._chunk_size, y // self._chunk_size))
+
+    def set_layer(self, layer: int, tiles: List[int]):
+        """
+        Set all tiles of a layer, row by row.
+
+        Parameters:
+        - layer: Index of the layer.
+        - tiles: Indices of the tiles, its length must be the count of tiles of the map.
+        """
+
+        if len(tiles) != self._width * self._height:
+            raise ValueError('Tile count does not match the map size.')
+
+        self._layers[layer] = array('i', tiles)
+        for cy in range(self._chunks_y):
+            for cx in range(self._chunks_x):
+                self._dirty.add((layer, cx, cy))
+
+    def draw(self, target: RenderTarget, states: Optional[RenderStates] = None):
+        """
+        Draw the chunks inside the current view of the render target.
+
+        Parameters:
+        - target: Render target.
+        - states: Render states, the tileset texture is always used.
+        """
+
+        transform = Transform()
+        if states is None:
+            draw_states = self._states
+        else:
+            draw_states = self._custom_states
+            transform.combine(states.transform)
+            draw_states.blend_mode = states.blend_mode
+            draw_states.shader = states.shader
+        transform.combine(self.get_transform())
+        draw_states.transform = transform
+
+        view = target.get_view()
+        view_size = view.get_size()
+        view_center = view.get_center()
+        view_rect = FloatRect(Vector2f(view_center.x - view_size.x / 2, view_center.y - view_size.y / 2), view_size)
+        local = transform.get_inverse().transform_rect(view_rect)
+
+        chunk_w = self._chunk_size * self._tile_w
+        chunk_h = self._chunk_size * self._tile_h
+        x0 = max(0, int(math.floor(local.position.x / chunk_w)))
+        y0 = max(0, int(math.floor(local.position.y / chunk_h)))
+        x1 = min(self._chunks_x - 1, int(math.floor((local.position.x + local.size.x) / chunk_w)))
+        y1 = min(self._chunks_y - 1, int(math.floor((local.position.y + local.size.y) / chunk_h)))
+
+        draw_calls = 0
+        for layer in range(len(self._layers)):
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    key = (layer, cx, cy)
+                    if key in self._dirty or key not in self._chunks:
+                        self._build_chunk(key)
+                    vertices, count = self._chunks[key]
+                    if count == 0:
+                        continue
+                    target.draw(vertices, draw_states)
+                    draw_calls += 1
+
+        if Profiler.enabled:
+            Profiler.count('draw_calls', draw_calls)
+
+    def _build_chunk(self, key: Tuple[int, int, int]):
+        """
+        Build the vertices of a chunk.
+
+        Parameters:
+        - key: Layer, column and row of the chunk.
+        """
+
+        layer, cx, cy = key
+        tiles = self._layers[layer]
+        tw, th = self._tile_w, self._tile_h
+        vertices: List[Vertex] = []
+        white = Color.white()
+
+        for y in range(cy * self._chunk_size, min((cy + 1) * self._chunk_size, self._height)):
+            row = y * self._width
+            for x in range(cx * self._chunk_size, min((cx + 1) * self._chunk_size, self._width)):
+                tile = tiles[row + x]
+                if tile < 0:
+                    continue
+                u = (tile % self._columns) * tw
+                v = (tile // self._columns) * th
+                px, py = x * tw, y * th
+                top_left = Vertex(Vector2f(px, py), white, Vector2f(u, v))
+                top_right = Vertex(Vector2f(px + tw, py), white, Vector2f(u + tw, v))
+                bottom_left = Vertex(Vector2f(px, py + th), white, Vector2f(u, v + th))
+                bottom_right = Vertex(Vector2f(px + tw, py + th), white, Vector2f(u + tw, v + th))
+                vertices.extend((top_left, top_right, bottom_left, bottom_left, top_right, bottom_right))
+
+        if self._use_buffer:
+            buffer = self._chunks[key][0] if key in self._chunks else VertexBuffer(PrimitiveType.Triangles, VertexBuffer.Usage.Static)
+            if len(vertices) > 0:
+                if buffer.get_vertex_count() != len(vertices):
+                    buffer.create(len(vertices))
+                buffer.update(vertices)
+        else:
+            buffer = VertexArray(PrimitiveType.Triangles)
+            for vertex in vertices:
+                buffer.append(vertex)
+
+        self._chunks[key] = (buffer, len(vertices))
+        self._dirty.discard(key)
@@ -1,16 +1,259 @@
+import contextlib
+import functools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 from .sfSystem import *
 
+class Profiler:
+    """
+    Per-frame profiler class.
+
+    It records named scopes and counters, keeps the samples of the latest frames in a ring buffer, and gives percentile statistics.
+    The frames are delimited by TimeMgr.update. When it is disabled, scopes and counters cost only a flag check.
+    """
+
+    enabled: bool = False
+
+    _history: int = 300
+    _frames: Deque[Tuple[float, Dict[str, float], Dict[str, int]]] = deque(maxlen=300)
+    _scopes: Dict[str, float] = {}
+    _counters: Dict[str, int] = {}
+    _frame_start: int = 0
+    _events: Deque[Tuple[str, int, int, int]] = deque(maxlen=100000)
+    _null_scope = contextlib.nullcontext()
+
+    class _Scope:
+        """
+        Context manager recording the time spent in a named scope.
+        """
+
+        __slots__ = ('_name', '_start')
+
+        def __init__(self, name: str):
+            self._name = name
+            self._start = 0
+
+        def __enter__(self):
+            self._start = time.perf_counter_ns()
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            Profiler._record(self._name, self._start, time.perf_counter_ns())
+            return False
+
+    @classmethod
+    def enable(cls, history: int = 300, max_events: int = 100000):
+        """
+        Enable the profiler. Previous samples are cleared.
+
+        Parameters:
+        - history: Count of frames kept for statistics.
+        - max_events: Count of scope events kept for the trace export.
+        """
+
+        cls._history = history
+        cls._frames = deque(maxlen=history)
+        cls._events = deque(maxlen=max_events)
+        cls._scopes = {}
+        cls._counters = {}
+        cls._frame_start = time.perf_counter_ns()
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        """
+        Disable the profiler. Samples are kept until it is enabled again.
+        """
+
+        cls.enabled = False
+
+    @classmethod
+    def scope(cls, name: str):
+        """
+        Get a context manager timing a named scope.
+
+        Use it as `with Profiler.scope('name'): ...`.
+
+        Parameters:
+        - name: Name of the scope.
+
+        Returns:
+        - Context manager.
+        """
+
+        if not cls.enabled:
+            return cls._null_scope
+        return cls._Scope(name)
+
+    @classmethod
+    def profile(cls, name: Optional[str] = None) -> Callable:
+        """
+        Get a decorator timing every call of a function as a named scope.
+
+        Parameters:
+        - name: Name of the scope. The qualified name of the function is used if it is None.
+
+        Returns:
+        - Decorator.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            scope_name = name if name is not None else func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    cls._record(scope_name, start, time.perf_counter_ns())
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def count(cls, name: str, value: int = 1):
+        """
+        Add a value to a named counter of the current frame, such as draw calls or texture binds.
+
+        Parameters:
+        - name: Name of the counter.
+        - value: Value to add.
+        """
+
+        if not cls.enabled:
+            return
+        cls._counters[name] = cls._counters.get(name, 0) + value
+
+    @classmethod
+    def end_frame(cls):
+        """
+        End the current frame and start a new one. It is called by TimeMgr.update.
+        """
+
+        if not cls.enabled:
+            return
+
+        now = time.perf_counter_ns()
+        cls._frames.append(((now - cls._frame_start) / 1e6, cls._scopes, cls._counters))
+        cls._events.append(('Frame', cls._frame_start, now - cls._frame_start, threading.get_ident()))
+        cls._scopes = {}
+        cls._counters = {}
+        cls._frame_start = now
+
+    @classmethod
+    def get_frame_stats(cls) -> Dict[str, float]:
+        """
+        Get the statistics of the frame time over the recorded frames.
+
+        Returns:
+        - Dict with the average, p50, p99 and maximum frame time in milliseconds.
+        """
+
+        return cls._stats([frame[0] for frame in cls._frames])
+
+    @classmethod
+    def get_scope_stats(cls, name: str) -> Dict[str, float]:
+        """
+        Get the statistics of the time spent per frame in a named scope.
+
+        Parameters:
+        - name: Name of the scope.
+
+        Returns:
+        - Dict with the average, p50, p99 and maximum time in milliseconds.
+        """
+
+        return cls._stats([frame[1].get(name, 0.0) for frame in cls._frames])
+
+    @classmethod
+    def get_counter_stats(cls, name: str) -> Dict[str, float]:
+        """
+        Get the statistics of a named counter per frame.
+
+        Parameters:
+        - name: Name of the counter.
+
+        Returns:
+        - Dict with the average, p50, p99 and maximum value.
+        """
+
+        return cls._stats([frame[2].get(name, 0) for frame in cls._frames])
+
+    @classmethod
+    def get_scope_names(cls) -> List[str]:
+        """
+        Get the names of all recorded scopes.
+
+        Returns:
+        - Sorted list of scope names.
+        """
+
+        names = set()
+        for frame in cls._frames:
+            names.update(frame[1].keys())
+        return sorted(names)
+
+    @classmethod
+    def export_chrome_trace(cls, path: str):
+        """
+        Export the recorded scopes to a Chrome trace JSON file, which could be opened in chrome://tracing or Perfetto.
+
+        Parameters:
+        - path: Path of the output file.
+        """
+
+        events = [{'name': name, 'ph': 'X', 'ts': start / 1000.0, 'dur': duration / 1000.0, 'pid': 0, 'tid': tid}
+                  for name, start, duration, tid in cls._events]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    @classmethod
+    def _record(cls, name: str, start: int, end: int):
+        duration = end - start
+        cls._scopes[name] = cls._scopes.get(name, 0.0) + duration / 1e6
+        cls._events.append((name, start, duration, threading.get_ident()))
+
+    @staticmethod
+    def _stats(samples: List[float]) -> Dict[str, float]:
+        if len(samples) == 0:
+            return {'avg': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+
+        ordered = sorted(samples)
+        def percentile(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+        return {'avg': sum(ordered) / len(ordered), 'p50': percentile(0.5), 'p99': percentile(0.99), 'max': ordered[-1]}
+
 class TimeMgr:
     """
     Time manager class.
 
     You can get the current time, delta time, ... from this class.
+    It also provides a smoothed delta time, a fixed timestep accumulator, time scaling and a frame limiter.
     """
 
     _clock = Clock()
     _last_elapsed_time = Time.Zero()
     _delta_time = Time.Zero()
 
+    _max_delta: float = 0.25
+    _smoothing: float = 0.1
+    _smoothed_delta: float = 0.0
+    _time_scale: float = 1.0
+
+    _fixed_step: float = 1.0 / 60.0
+    _accumulator: float = 0.0
+
+    _frame_time: float = 0.0
+    _spin_time: float = 0.002
+    _next_frame: float = 0.0
+
     @staticmethod
     def init():
         """
@@ -18,6 +261,9 @@ class TimeMgr:
         """
 
         TimeMgr._clock.start()
+        TimeMgr._smoothed_delta = 0.0
+        TimeMgr._accumulator = 0.0
+        TimeMgr._next_frame = time.perf_counter()
         TimeMgr.update()
 
     @staticmethod
@@ -40,7 +286,160 @@ class TimeMgr:
         - Delta time.
         """
 
-        return Time.FromSeconds(TimeMgr._delta_time)
+        return TimeMgr._delta_time
+
+    @staticmethod
+    def get_smoothed_delta_time() -> Time:
+        """
+        Get the smoothed delta time.
+
+        The raw delta time is clamped to the maximum delta time, exponentially smoothed and multiplied by the time scale.
+        It is the delta time which should be given to ParticleMgr.update and AnimationMgr.update to avoid stutter.
+
+        Returns:
+        - Smoothed delta time.
+        """
+
+        return Time.FromSeconds(TimeMgr._smoothed_delta * TimeMgr._time_scale)
+
+    @staticmethod
+    def set_max_delta_time(max_delta: Time):
+        """
+        Set the maximum delta time, longer frames (such as after loading or dragging the window) are clamped to it.
+
+        Parameters:
+        - max_delta: Maximum delta time.
+        """
+
+        TimeMgr._max_delta = max_delta.as_seconds()
+
+    @staticmethod
+    def set_smoothing(smoothing: float):
+        """
+        Set the smoothing factor of the delta time.
+
+        Parameters:
+        - smoothing: Weight of the latest frame in the range (0, 1]. 1 disables smoothing.
+        """
+
+        if smoothing <= 0 or smoothing > 1:
+            raise ValueError('Smoothing must be in the range (0, 1].')
+
+        TimeMgr._smoothing = smoothing
+
+    @staticmethod
+    def set_time_scale(scale: float):
+        """
+        Set the time scale, it affects the smoothed delta time and the fixed timestep accumulator.
+
+        Parameters:
+        - scale: Time scale, 1 for normal speed, 0 to freeze the game time.
+        """
+
+        if scale < 0:
+            raise ValueError('Time scale must not be negative.')
+
+        TimeMgr._time_scale = scale
+
+    @staticmethod
+    def get_time_scale() -> float:
+        """
+        Get the time scale.
+
+        Returns:
+        - Time scale.
+        """
+
+        return TimeMgr._time_scale
+
+    @staticmethod
+    def set_fixed_step(step: Time):
+        """
+        Set the fixed timestep.
+
+        Parameters:
+        - step: Fixed timestep.
+        """
+
+        if step <= Time.Zero():
+            raise ValueError('Fixed step must be positive.')
+
+        TimeMgr._fixed_step = step.as_seconds()
+
+    @staticmethod
+    def get_fixed_step() -> Time:
+        """
+        Get the fixed timestep.
+
+        Returns:
+        - Fixed timestep.
+        """
+
+        return Time.FromSeconds(TimeMgr._fixed_step)
+
+    @staticmethod
+    def consume_fixed_step() -> bool:
+        """
+        Consume one fixed timestep from the accumulator.
+
+        Use it as `while TimeMgr.consume_fixed_step(): update(TimeMgr.get_fixed_step())`.
+
+        Returns:
+        - True if a fixed step should be simulated, False otherwise.
+        """
+
+        if TimeMgr._accumulator >= TimeMgr._fixed_step:
+            TimeMgr._accumulator -= TimeMgr._fixed_step
+            return True
+        return False
+
+    @staticmethod
+    def get_interpolation_alpha() -> float:
+        """
+        Get the interpolation factor between the previous and the current fixed step states.
+
+        Returns:
+        - Interpolation factor in the range [0, 1).
+        """
+
+        return TimeMgr._accumulator / TimeMgr._fixed_step
+
+    @staticmethod
+    def set_frame_limit(limit: int):
+        """
+        Set the frame limit used by limit_frame.
+
+        Parameters:
+        - limit: Maximum count of frames per second, 0 to disable the limit.
+        """
+
+        TimeMgr._frame_time = 1.0 / limit if limit > 0 else 0.0
+        TimeMgr._next_frame = time.perf_counter()
+
+    @staticmethod
+    def limit_frame():
+        """
+        Wait until the next frame should start.
+
+        It sleeps for most of the remaining time and spins for the last moment, which is more precise than sleeping only.
+        Call it once per frame, usually after displaying the window.
+        """
+
+        if TimeMgr._frame_time <= 0:
+            return
+
+        TimeMgr._next_frame += TimeMgr._frame_time
+        now = time.perf_counter()
+        if TimeMgr._next_frame < now - TimeMgr._frame_time:
+            # The frame is far too late, so the deadline is reset instead of rushing the following frames.
+            TimeMgr._next_frame = now
+            return
+
+        remaining = TimeMgr._next_frame - now
+        if remaining > TimeMgr._spin_time:
+            time.sleep(remaining - TimeMgr._spin_time)
+        while time.perf_counter() < TimeMgr._next_frame:
+            pass
 
     @staticmethod
     def update():
@@ -52,3 +451,11 @@ class TimeMgr:
         current_time = TimeMgr._clock.get_elapsed_time()
         TimeMgr._last_elapsed_time = current_time
         TimeMgr._delta_time = current_time - last_time
+
+        delta = min(TimeMgr._delta_time.as_seconds(), TimeMgr._max_delta)
+        if TimeMgr._smoothed_delta == 0:
+            TimeMgr._smoothed_delta = delta
+        else:
+            TimeMgr._smoothed_delta += (delta - TimeMgr._smoothed_delta) * TimeMgr._smoothing
+        TimeMgr._accumulator += delta * TimeMgr._time_scale
+        Profiler.end_frame()
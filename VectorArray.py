@@ -0,0 +1,296 @@
+from typing import Iterable, List, Optional, Sequence, Union
+import numpy as np
+from .sfSystem import *
+from .sfGraphics import *
+
+Operand = Union['Vector2fArray', Vector2f, np.ndarray, float]
+
+def _as_array(value: Operand) -> Union[np.ndarray, float]:
+    if isinstance(value, Vector2fArray):
+        return value._data
+    if isinstance(value, Vector2f):
+        return np.array((value.x, value.y), dtype=np.float32)
+    return value
+
+class Vector2fArray:
+    """
+    Array of 2D float vectors stored in a (n, 2) float32 NumPy array.
+
+    Operations work on the whole array at once and in place, so updating many positions does not create a Vector2f per element.
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Union[int, Sequence[Vector2f], np.ndarray] = 0):
+        """
+        Constructor.
+
+        Parameters:
+        - data: Count of zero vectors, a sequence of Vector2f, or an array of shape (n, 2) which is used without copy if it is float32.
+        """
+
+        if isinstance(data, int):
+            self._data = np.zeros((data, 2), dtype=np.float32)
+        elif isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[1] != 2:
+                raise ValueError('Array must have shape (n, 2).')
+            self._data = data if data.dtype == np.float32 else data.astype(np.float32)
+        else:
+            self._data = np.array([(vector.x, vector.y) for vector in data], dtype=np.float32).reshape(-1, 2)
+
+    @staticmethod
+    def from_positions(transformables: Iterable[Transformable]) -> 'Vector2fArray':
+        """
+        Create an array with the positions of transformables, such as sprites.
+
+        Parameters:
+        - transformables: Transformable objects.
+
+        Returns:
+        - The array.
+        """
+
+        return Vector2fArray([transformable.get_position() for transformable in transformables])
+
+    @staticmethod
+    def from_vertices(vertices: Union[VertexArray, Sequence[Vertex]]) -> 'Vector2fArray':
+        """
+        Create an array with the positions of vertices.
+
+        Parameters:
+        - vertices: Vertex array or sequence of vertices.
+
+        Returns:
+        - The array.
+        """
+
+        if isinstance(vertices, VertexArray):
+            vertices = [vertices[i] for i in range(vertices.get_vertex_count())]
+        return Vector2fArray([vertex.position for vertex in vertices])
+
+    def get_data(self) -> np.ndarray:
+        """
+        Get the underlying array, changes to it are changes to the vectors.
+
+        Returns:
+        - Array of shape (n, 2).
+        """
+
+        return self._data
+
+    def copy(self) -> 'Vector2fArray':
+        """
+        Copy the array.
+
+        Returns:
+        - The copy.
+        """
+
+        return Vector2fArray(self._data.copy())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[Vector2f, 'Vector2fArray']:
+        if isinstance(index, (int, np.integer)):
+            x, y = self._data[index]
+            return Vector2f(float(x), float(y))
+        return Vector2fArray(self._data[index])
+
+    def __setitem__(self, index: Union[int, slice, np.ndarray], value: Operand):
+        self._data[index] = _as_array(value)
+
+    def add(self, other: Operand) -> 'Vector2fArray':
+        """
+        Add vectors in place.
+
+        Parameters:
+        - other: Array of the same length, a single vector added to every element, or a scalar.
+
+        Returns:
+        - This array.
+        """
+
+        np.add(self._data, _as_array(other), out=self._data)
+        return self
+
+    def sub(self, other: Operand) -> 'Vector2fArray':
+        """
+        Subtract vectors in place.
+
+        Parameters:
+        - other: Array of the same length, a single vector subtracted from every element, or a scalar.
+
+        Returns:
+        - This array.
+        """
+
+        np.subtract(self._data, _as_array(other), out=self._data)
+        return self
+
+    def scale(self, factor: Union[float, Vector2f, np.ndarray]) -> 'Vector2fArray':
+        """
+        Multiply vectors in place by the same factor, use scale_each for per-element factors.
+
+        Parameters:
+        - factor: A scalar, or per-axis factors as a vector or an array of shape (2,).
+
+        Returns:
+        - This array.
+        """
+
+        factor = _as_array(factor)
+        if isinstance(factor, np.ndarray) and factor.shape not in ((), (2,)):
+            raise ValueError('Factor must be a scalar or have per-axis factors, use scale_each for per-element factors.')
+        np.multiply(self._data, factor, out=self._data)
+        return self
+
+    def scale_each(self, factors: Union[Sequence[float], np.ndarray]) -> 'Vector2fArray':
+        """
+        Multiply each vector in place by its own factor, on both axes.
+
+        Parameters:
+        - factors: Sequence or array of n factors.
+
+        Returns:
+        - This array.
+        """
+
+        factors = np.asarray(factors, dtype=np.float32)
+        if factors.shape != (len(self._data),):
+            raise ValueError('Count of factors must match the count of vectors.')
+        np.multiply(self._data, factors[:, np.newaxis], out=self._data)
+        return self
+
+    def add_scaled(self, other: 'Vector2fArray', factor: float) -> 'Vector2fArray':
+        """
+        Add other * factor in place, such as positions.add_scaled(velocities, delta_time.as_seconds()).
+
+        Parameters:
+        - other: Array of the same length.
+        - factor: Scalar factor.
+
+        Returns:
+        - This array.
+        """
+
+        self._data += other._data * np.float32(factor)
+        return self
+
+    def rotate(self, angle: float, center: Optional[Vector2f] = None) -> 'Vector2fArray':
+        """
+        Rotate vectors in place, clockwise on screen like Transformable.rotate.
+
+        Parameters:
+        - angle: Rotation angle in degrees.
+        - center: Center of the rotation, the origin if it is None.
+
+        Returns:
+        - This array.
+        """
+
+        radians = np.radians(angle)
+        c, s = np.cos(radians), np.sin(radians)
+        matrix = np.array(((c, s), (-s, c)), dtype=np.float32)
+        if center is None:
+            np.matmul(self._data, matrix, out=self._data)
+        else:
+            offset = _as_array(center)
+            self._data -= offset
+            np.matmul(self._data, matrix, out=self._data)
+            self._data += offset
+        return self
+
+    def transform(self, transform: Transform) -> 'Vector2fArray':
+        """
+        Transform points in place, like Transform.transform_point for each element.
+
+        Parameters:
+        - transform: The transform.
+
+        Returns:
+        - This array.
+        """
+
+        m = transform.get_matrix()
+        matrix = np.array(((m[0], m[1]), (m[4], m[5])), dtype=np.float32)
+        np.matmul(self._data, matrix, out=self._data)
+        self._data += np.array((m[12], m[13]), dtype=np.float32)
+        return self
+
+    def get_lengths(self) -> np.ndarray:
+        """
+        Get the length of every vector.
+
+        Returns:
+        - Array of n lengths.
+        """
+
+        return np.hypot(self._data[:, 0], self._data[:, 1])
+
+    def normalize(self) -> 'Vector2fArray':
+        """
+        Scale every non-zero vector to a length of 1, in place.
+
+        Returns:
+        - This array.
+        """
+
+        lengths = self.get_lengths()
+        np.divide(self._data, lengths[:, np.newaxis], out=self._data, where=lengths[:, np.newaxis] > 0)
+        return self
+
+    def get_bounds(self) -> FloatRect:
+        """
+        Get the smallest rectangle containing every point.
+
+        Returns:
+        - Bounding rectangle, empty if the array is empty.
+        """
+
+        if len(self._data) == 0:
+            return FloatRect(Vector2f(0, 0), Vector2f(0, 0))
+        low = self._data.min(axis=0)
+        high = self._data.max(axis=0)
+        return FloatRect(Vector2f(float(low[0]), float(low[1])), Vector2f(float(high[0] - low[0]), float(high[1] - low[1])))
+
+    def to_vectors(self) -> List[Vector2f]:
+        """
+        Convert to a list of Vector2f.
+
+        Returns:
+        - List of vectors.
+        """
+
+        return [Vector2f(x, y) for x, y in self._data.tolist()]
+
+    def apply_positions(self, transformables: Sequence[Transformable]):
+        """
+        Set the position of transformables, such as sprites, from the vectors.
+
+        Parameters:
+        - transformables: Transformable objects, as many as vectors.
+        """
+
+        if len(transformables) != len(self._data):
+            raise ValueError('Count of transformables does not match the array length.')
+
+        for transformable, (x, y) in zip(transformables, self._data.tolist()):
+            transformable.set_position(Vector2f(x, y))
+
+    def apply_vertices(self, vertices: VertexArray, offset: int = 0):
+        """
+        Set the positions of vertices from the vectors.
+
+        Parameters:
+        - vertices: Vertex array, it is resized if it is too small.
+        - offset: Index of the first vertex to set.
+        """
+
+        if vertices.get_vertex_count() < offset + len(self._data):
+            vertices.resize(offset + len(self._data))
+
+        for i, (x, y) in enumerate(self._data.tolist(), offset):
+            vertex = vertices[i]
+            vertex.position = Vector2f(x, y)
+            vertices[i] = vertex
@@ -1,106 +1,535 @@
-have_require = True
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
+from typing import Callable, Deque, List, Optional, Tuple
 from .sfSystem import *
 from .sfGraphics import *
 from .sfAudio import *
 from .Time import *
 
-try:
-    import cv2
-    import av
-except ImportError as e:
-    have_require = False
+have_require: Optional[bool] = None
+cv2 = None
+av = None
 
-class Video:
+def _require() -> bool:
     """
-    Video class for playing videos in a loop.
+    Import opencv-python and av on first use, they are heavy and only needed for video playback.
 
-    This class allows you to play a video in a loop using OpenCV, av and SFML.
+    Returns:
+    - True if both are available, False otherwise.
+    """
+
+    global have_require, cv2, av
+    if have_require is None:
+        try:
+            import cv2 as cv2_module
+            import av as av_module
+        except ImportError:
+            have_require = False
+        else:
+            cv2 = cv2_module
+            av = av_module
+            have_require = True
+    return have_require
+
+class _FrameDecoder:
+    """
+    Frame decoder of a video, run as jobs on a shared thread pool.
+
+    It reads frames ahead of the render thread, converts them to RGBA and keeps them with their timestamps in a bounded ring buffer.
+    Frames which are already late according to the clock are skipped without being decoded.
+    The RGBA buffers are allocated once and recycled, frames are converted into them in place. Uploading a frame to the texture still copies its pixels, as Texture.update takes them as nested lists.
+    A decoding job never blocks a worker: it stops when the ring buffer is full and is scheduled again once frames are consumed.
+    If a job fails, decoding finishes and the error is kept until take_error is called.
     """
 
-    def __init__(self, video_path: str, window: RenderWindow, mute: bool = False):
+    def __init__(self, cap, fps: float, clock: Callable[[], float], pool: ThreadPoolExecutor, capacity: int = 8):
         """
-        Initialize a Video object.
+        Constructor.
 
         Parameters:
-        - video_path: Path to the video file.
-        - window: RenderWindow object.
-        - mute:  Judge whether to mute the video.
+        - cap: Opened cv2.VideoCapture object. It must not be used by other threads after the decoder is scheduled.
+        - fps: Frame rate of the video.
+        - clock: Function returning the current playing time in seconds.
+        - pool: Thread pool running the decoding jobs.
+        - capacity: Maximum count of decoded frames kept in the ring buffer.
         """
 
-        if not have_require:
-            print('Require not found. Video playback will not be available.')
-            return
+        self._cap = cap
+        self._frame_duration = 1.0 / fps
+        self._clock = clock
+        self._pool = pool
+        self._capacity = capacity
+        self._frames: Deque[Tuple[float, object]] = deque()
+        self._free_buffers: List[object] = []
+        self._buffer_count = 0
+        self._condition = threading.Condition()
+        self._job: Optional[Future] = None
+        self._next_index = 0
+        self._seek_target: Optional[float] = None
+        self._generation = 0
+        self._stopped = False
+        self._error: Optional[BaseException] = None
+        self.finished = False
+        self.dropped_frames = 0
 
-        self.cap = cv2.VideoCapture(video_path)
-        self.cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
+    def schedule(self):
+        """
+        Schedule a decoding job if there is room in the ring buffer and no job is running.
+        """
+
+        with self._condition:
+            if self._stopped or self._job is not None:
+                return
+            if self.finished and self._seek_target is None:
+                return
+            if not self._has_room():
+                return
+            self._job = self._pool.submit(self._decode)
+
+    def seek(self, seconds: float):
+        """
+        Seek to the given time. Decoded frames are discarded and decoding restarts from the keyframe before the target, frames before the target are skipped without being converted.
+
+        Parameters:
+        - seconds: Target time in seconds.
+        """
+
+        with self._condition:
+            self._generation += 1
+            self._seek_target = max(0.0, seconds)
+            while len(self._frames) > 0:
+                self._free_buffers.append(self._frames.popleft()[1])
+            self.finished = False
+            self._condition.notify_all()
+        self.schedule()
+
+    def pop_frame(self, current_time: float) -> Optional[Tuple[float, object]]:
+        """
+        Pop the latest frame which should be shown at the current time, the older ones are dropped.
 
+        Parameters:
+        - current_time: Current playing time in seconds.
+
+        Returns:
+        - Tuple of timestamp and RGBA frame, None if no frame is due. The frame must be given back by recycle() after being used.
+        """
+
+        with self._condition:
+            frame = None
+            while len(self._frames) > 0 and self._frames[0][0] <= current_time:
+                if frame is not None:
+                    self.dropped_frames += 1
+                    self._free_buffers.append(frame[1])
+                frame = self._frames.popleft()
+            return frame
+
+    def recycle(self, frame_data):
+        """
+        Give back a frame buffer once it has been uploaded, so that the next frames are converted into it.
+
+        Parameters:
+        - frame_data: RGBA frame returned by pop_frame.
+        """
+
+        with self._condition:
+            self._free_buffers.append(frame_data)
+        self.schedule()
+
+    def is_exhausted(self) -> bool:
+        """
+        Check if all frames have been decoded and consumed.
+
+        Returns:
+        - True if there is no frame left, False otherwise.
+        """
+
+        with self._condition:
+            return self.finished and self._seek_target is None and len(self._frames) == 0
+
+    def take_error(self) -> Optional[BaseException]:
+        """
+        Take the error of a failed decoding job, it is returned only once.
+
+        Returns:
+        - The error, None if there is none.
+        """
+
+        with self._condition:
+            error = self._error
+            self._error = None
+            return error
+
+    def stop(self):
+        """
+        Stop decoding and wait for the running job.
+        """
+
+        with self._condition:
+            self._stopped = True
+            job = self._job
+            self._condition.notify_all()
+        if job is not None:
+            job.result()
+
+    def _has_room(self) -> bool:
+        return len(self._frames) < self._capacity and (len(self._free_buffers) > 0 or self._buffer_count < self._capacity)
+
+    def _decode(self):
+        failed = True
         try:
-            audio_data, sample_rate, channels = self._extract_audio_with_av(video_path)
-            self._sb = SoundBuffer()
-            self._sb.load_from_memory(audio_data)
-            self._sound = Sound(self._sb)
-        except Exception as e:
-            print(f'Failed to extract audio: {e}')
-            self._sound = None
+            self._decode_frames()
+            failed = False
+        except Exception as error:
+            with self._condition:
+                self._error = error
+        finally:
+            if failed:
+                # The job ended without going through _finish, so it must not be left as running.
+                with self._condition:
+                    self.finished = True
+                    self._job = None
+                    self._condition.notify_all()
+
+    def _decode_frames(self):
+        while True:
+            with self._condition:
+                if self._stopped or not self._has_room():
+                    self._job = None
+                    return
+                generation = self._generation
+                seek_target = self._seek_target
+                self._seek_target = None
+
+            if seek_target is not None:
+                self._cap.set(cv2.CAP_PROP_POS_MSEC, seek_target * 1000.0)
+                self._next_index = int(self._cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+            timestamp = self._next_index * self._frame_duration
+            self._next_index += 1
+            late_time = self._clock() if seek_target is None else seek_target
+            if timestamp + self._frame_duration <= late_time:
+                ret = self._cap.grab()
+                with self._condition:
+                    if seek_target is None:
+                        self.dropped_frames += 1
+                    if not ret:
+                        self._finish(generation)
+                        return
+                continue
+
+            ret, frame = self._cap.read()
+            if not ret:
+                with self._condition:
+                    self._finish(generation)
+                return
+
+            with self._condition:
+                buffer = self._free_buffers.pop() if len(self._free_buffers) > 0 else None
+                if buffer is None:
+                    self._buffer_count += 1
+            if buffer is None:
+                frame_data = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
+            else:
+                frame_data = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=buffer)
+
+            with self._condition:
+                if generation == self._generation:
+                    self._frames.append((timestamp, frame_data))
+                else:
+                    self._free_buffers.append(frame_data)
+                self._condition.notify_all()
+
+    def _finish(self, generation: int):
+        if generation == self._generation:
+            self.finished = True
+        self._job = None
+        self._condition.notify_all()
+        if self._seek_target is not None and not self._stopped:
+            self._job = self._pool.submit(self._decode)
 
-        self._window = window
-        self.mute = mute
+class VideoPlayer:
+    """
+    Non-blocking video player.
+
+    It is updated and drawn by the game loop like other components, so video could be composited into a live scene.
+    Several players could run at the same time, their frames are decoded on a shared thread pool.
+    """
+
+    _decode_pool: Optional[ThreadPoolExecutor] = None
+    _decode_workers: int = min(4, os.cpu_count() or 1)
+
+    def __init__(self, video_path: str, mute: bool = False, looping: bool = False, buffer_size: int = 8):
+        """
+        Constructor.
 
+        Parameters:
+        - video_path: Path to the video file.
+        - mute: Judge whether to mute the video.
+        - looping: Whether to restart the video when it is finished.
+        - buffer_size: Count of frames decoded ahead.
+        """
+
+        if not _require():
+            raise ImportError('opencv-python and av are required for video playback.')
+
+        self.cap = cv2.VideoCapture(video_path)
+        self.cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
         if not self.cap.isOpened():
             raise ValueError('Error opening video file')
 
-        self.target_frame_index = 0
-        self._image: Texture = None
-        self._sprite: Sprite = None
+        self._sound_buffer: Optional[SoundBuffer] = None
+        try:
+            self._sound = self._open_audio(video_path)
+        except BaseException:
+            self.cap.release()
+            raise
 
         self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.mute = mute
+        self.looping = looping
         self.finished = False
 
+        frame_count = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        self._duration = frame_count / self.fps if frame_count > 0 else 0.0
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._image = Texture(Vector2u(width, height))
+        self._sprite = Sprite(self._image)
+
+        self._time = 0.0
+        self._playing = False
+        self._decoder = _FrameDecoder(self.cap, self.fps, self.get_playing_time, VideoPlayer._get_decode_pool(), buffer_size)
+
+    @classmethod
+    def set_decode_workers(cls, workers: int):
+        """
+        Set the count of threads decoding the frames of all players. It must be called before the first player is created.
+
+        Parameters:
+        - workers: Count of decoding threads.
+        """
+
+        if cls._decode_pool is not None:
+            raise ValueError('Decode pool has already been created.')
+
+        cls._decode_workers = workers
+
+    @classmethod
+    def _get_decode_pool(cls) -> ThreadPoolExecutor:
+        if cls._decode_pool is None:
+            cls._decode_pool = ThreadPoolExecutor(max_workers=cls._decode_workers, thread_name_prefix='VideoDecode')
+        return cls._decode_pool
+
     def play(self):
         """
-        Play the video.
+        Start or resume playing the video.
+        """
 
-        This method plays the video in a loop until the video is finished.
+        if self._playing:
+            return
+
+        self._playing = True
+        self.finished = False
+        if self._sound is not None:
+            self._sound.set_volume(0 if self.mute else 100)
+            self._sound.play()
+            if self._time > 0:
+                self._sound.set_playing_offset(Time.FromSeconds(self._time))
+        self._decoder.schedule()
+
+    def pause(self):
+        """
+        Pause the video.
+        """
+
+        self._playing = False
+        if self._sound is not None:
+            self._sound.pause()
+
+    def stop(self):
+        """
+        Stop the video and rewind it to the beginning.
+        """
+
+        self._playing = False
+        if self._sound is not None:
+            self._sound.stop()
+        self.seek(0)
+
+    def is_playing(self) -> bool:
+        """
+        Check if the video is playing.
+
+        Returns:
+        - True if the video is playing, False otherwise.
+        """
+
+        return self._playing
+
+    def seek(self, seconds: float):
+        """
+        Seek to the given time.
+
+        Decoding restarts from the keyframe before the target, and the frames before the target are skipped without being converted.
+
+        Parameters:
+        - seconds: Target time in seconds.
+        """
+
+        self._time = max(0.0, seconds)
+        self.finished = False
+        self._decoder.seek(self._time)
+        if self._sound is not None and self._sound.get_status() != SoundSource.Status.Stopped:
+            self._sound.set_playing_offset(Time.FromSeconds(self._time))
+
+    def get_playing_time(self) -> float:
+        """
+        Get the current playing time.
+
+        Returns:
+        - Current playing time in seconds.
         """
 
-        if not have_require:
+        return self._time
+
+    def get_duration(self) -> float:
+        """
+        Get the duration of the video.
+
+        Returns:
+        - Duration in seconds, 0 if it is unknown.
+        """
+
+        return self._duration
+
+    def get_dropped_frames(self) -> int:
+        """
+        Get the count of frames dropped because they were late.
+
+        Returns:
+        - Count of dropped frames.
+        """
+
+        return self._decoder.dropped_frames
+
+    def get_sprite(self) -> Sprite:
+        """
+        Get the sprite showing the video, it could be moved, scaled or rotated.
+
+        Returns:
+        - The sprite of the video.
+        """
+
+        return self._sprite
+
+    def fit(self, size: Vector2u):
+        """
+        Scale the video to fit in the given area and center it, keeping its aspect ratio.
+
+        Parameters:
+        - size: Size of the area, such as the size of the window.
+        """
+
+        texture_size = self._image.get_size()
+        scale = min(float(size.x) / texture_size.x, float(size.y) / texture_size.y)
+        self._sprite.set_scale(Vector2f(scale, scale))
+        self._sprite.set_origin((texture_size / 2).to_float())
+        self._sprite.set_position((size / 2).to_float())
+
+    def update(self, delta_time: Time):
+        """
+        Update the video, the frame matching the playing time is uploaded.
+        If decoding failed, playback stops and the error is raised once.
+
+        Parameters:
+        - delta_time: Time elapsed since last update.
+        """
+
+        if not self._playing:
             return
 
-        self._sound.set_volume(0 if self.mute else 100)
-        self._sound.play()
-        while self._window.is_open():
-            while True:
-                event = self._window.poll_event()
-                if event is None:
-                    break
-                if event.isClosed():
-                    self._window.close()
-                    break
-            TimeMgr.update()
-            self._window.clear(Color.transparent())
-            self._update()
-            if self._sprite is not None:
-                self._window.draw(self._sprite)
-            self._window.display()
-            if self.finished:
-                break
-        self._sound.stop()
+        error = self._decoder.take_error()
+        if error is not None:
+            self._playing = False
+            if self._sound is not None:
+                self._sound.stop()
+            raise ValueError('Fail to decode video frames.') from error
+
+        if self._sound is not None and self._sound.get_status() == SoundSource.Status.Playing:
+            self._time = self._sound.get_playing_offset().as_seconds()
+        else:
+            self._time += delta_time.as_seconds()
+
+        frame = self._decoder.pop_frame(self._time)
+        if frame is not None:
+            _, frame_data = frame
+            self._image.update(frame_data)
+            self._decoder.recycle(frame_data)
+
+        if self._decoder.is_exhausted():
+            if self.looping:
+                self.seek(0)
+                if self._sound is not None:
+                    self._sound.play()
+            else:
+                self._playing = False
+                self.finished = True
+                if self._sound is not None:
+                    self._sound.stop()
+
+    def draw(self, target: RenderTarget, states: RenderStates = None):
+        """
+        Draw the current frame.
+
+        Parameters:
+        - target: Render target.
+        - states: Render states.
+        """
+
+        if states is None:
+            target.draw(self._sprite)
+        else:
+            target.draw(self._sprite, states)
+
+    def close(self):
+        """
+        Stop decoding and release the video file.
+        """
+
+        self._playing = False
+        self._decoder.stop()
+        if self._sound is not None:
+            self._sound.stop()
+            self._sound = None
+        self._sound_buffer = None
+        self.cap.release()
 
-    def _extract_audio_with_av(self, video_path):
+    def _open_audio(self, video_path: str):
         container = av.open(video_path)
+        try:
+            has_audio = any(s.type == 'audio' for s in container.streams)
+        finally:
+            container.close()
+        if not has_audio:
+            return None
 
-        audio_stream = next((s for s in container.streams if s.type == 'audio'), None)
-        if not audio_stream:
-            raise ValueError('No audio stream found in the video')
+        self._sound_buffer = SoundBuffer()
+        if not self._sound_buffer.load_from_memory(self._extract_audio_with_av(video_path)):
+            raise ValueError('Failed to load the audio of the video')
+        return Sound(self._sound_buffer)
 
+    @staticmethod
+    def _extract_audio_with_av(video_path: str) -> bytes:
+        container = av.open(video_path)
+        audio_stream = next(s for s in container.streams if s.type == 'audio')
         sample_rate = audio_stream.codec_context.sample_rate
-        channels = audio_stream.codec_context.channels
+        channels = 1 if audio_stream.codec_context.channels == 1 else 2
 
         output = BytesIO()
-
         output_container = av.open(output, 'w', format='wav')
-
         output_stream = output_container.add_stream(
             codec_name='pcm_s16le',
             rate=sample_rate,
@@ -108,58 +537,106 @@ class Video:
         )
 
         layout = 'mono' if channels == 1 else 'stereo'
-
         resampler = av.AudioResampler(
             format='s16',
             layout=layout,
             rate=sample_rate
         )
 
-        for packet in container.demux(audio_stream):
-            for frame in packet.decode():
-                resampled_frames = resampler.resample(frame)
-                for resampled_frame in resampled_frames:
-                    for p in output_stream.encode(resampled_frame):
-                        output_container.mux(p)
-
-        for p in output_stream.encode(None):
-            output_container.mux(p)
-
-        output_container.close()
+        try:
+            for packet in container.demux(audio_stream):
+                for frame in packet.decode():
+                    for resampled_frame in resampler.resample(frame):
+                        for p in output_stream.encode(resampled_frame):
+                            output_container.mux(p)
+
+            for p in output_stream.encode(None):
+                output_container.mux(p)
+        finally:
+            output_container.close()
+            container.close()
 
         wav_data = output.getvalue()
         output.close()
+        return wav_data
 
-        return wav_data, sample_rate, channels
+    def __del__(self):
+        if hasattr(self, '_decoder') and self.cap.isOpened():
+            self.close()
 
-    def _get_frame(self) -> None:
-        if not have_require:
-            self._sprite = None
-            return None
+class Video:
+    """
+    Video class for playing videos in a loop.
 
-        ret, frame = self.cap.read()
-        if not ret:
-            self._sprite = None
-            return None
+    This class allows you to play a video in a loop using OpenCV, av and SFML.
+    It owns the window loop until the video is finished, use VideoPlayer to play videos inside a game loop.
+    """
 
-        frame_data = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
-        if self._image is None:
-            h, w, _ = frame_data.shape
-            self._image = Texture(Vector2u(w, h))
-            self._sprite = Sprite(self._image)
-            scale = min(float(self._window.get_size().x) / w, float(self._window.get_size().y) / h)
-            self._sprite.set_scale(Vector2f(scale, scale))
-            self._sprite.set_origin((self._image.get_size() / 2).to_float())
-            self._sprite.set_position((self._window.get_size() / 2).to_float())
-        self._image.update(frame_data)
-        return self.cap.get(cv2.CAP_PROP_POS_FRAMES) - 1
-
-    def _update(self):
-        expected_frame = int(self._sound.get_playing_offset().as_seconds() * self.fps)
-        while self.target_frame_index is not None and (expected_frame > self.target_frame_index or (expected_frame == 0 and self._sprite is None)):
-            self.target_frame_index = self._get_frame()
-        if self._sprite is None:
-            self.finished = True
+    def __init__(self, video_path: str, window: RenderWindow, mute: bool = False, buffer_size: int = 8):
+        """
+        Initialize a Video object.
 
-    def __del__(self):
-        self.cap.release()
+        Parameters:
+        - video_path: Path to the video file.
+        - window: RenderWindow object.
+        - mute:  Judge whether to mute the video.
+        - buffer_size: Count of frames decoded ahead by the background decoder.
+        """
+
+        if not _require():
+            print('Require not found. Video playback will not be available.')
+            return
+
+        self._window = window
+        self._player = VideoPlayer(video_path, mute, False, buffer_size)
+        self._player.fit(window.get_size())
+        self.mute = mute
+        self.fps = self._player.fps
+        self.finished = False
+
+    def play(self):
+        """
+        Play the video.
+
+        This method plays the video in a loop until the video is finished.
+        """
+
+        if not _require():
+            return
+
+        clock = Clock()
+        self._player.mute = self.mute
+        self._player.play()
+        while self._window.is_open():
+            # The events are drained here, so the handlers, recording and replay of InputMgr are left untouched.
+            while True:
+                event = self._window.poll_event()
+                if event is None:
+                    break
+                if event.isClosed():
+                    self._window.close()
+                    break
+            TimeMgr.update()
+            self._window.clear(Color.transparent())
+            delta_time = clock.get_elapsed_time()
+            clock.restart()
+            self._player.update(delta_time)
+            self._player.draw(self._window)
+            self._window.display()
+            if self._player.finished:
+                self.finished = True
+                break
+        self._player.stop()
+
+    def get_dropped_frames(self) -> int:
+        """
+        Get the count of frames dropped because they were late.
+
+        Returns:
+        - Count of dropped frames.
+        """
+
+        if not _require():
+            return 0
+
+        return self._player.get_dropped_frames()
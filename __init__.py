@@ -1,18 +1,66 @@
 """
 SFML provides a simple interface to the various components of your PC, to ease the development of games and multimedia applications. It is composed of five modules: system, window, graphics, audio and network.
+
+The binding modules are imported eagerly. The other submodules, and their optional dependencies such as opencv-python and av, are imported on first access, so tools which never play a video do not pay for them.
 """
 
+import importlib
+import time
+from typing import Dict
+
 from . import sfSystem
 from . import sfWindow
 from . import sfGraphics
 from . import sfAudio
 from . import sfNetwork
-from . import Particle
-from . import ResourceMgr
-from . import Time
-from . import Animation
-from . import TextEnhance
-from . import Video
+
+_lazy_modules = (
+    "Particle",
+    "ResourceMgr",
+    "Time",
+    "Animation",
+    "TextEnhance",
+    "Video",
+    "Scheduler",
+    "SpriteBatch",
+    "TileMap",
+    "Compositor",
+    "Network",
+    "Codec",
+    "Replication",
+    "Download",
+    "VectorArray",
+    "SceneGraph",
+    "RenderStateMgr",
+    "AudioEffect",
+    "AudioTool",
+    "Input"
+)
+
+_import_times: Dict[str, float] = {}
+
+def __getattr__(name: str):
+    if name in _lazy_modules:
+        start = time.perf_counter()
+        module = importlib.import_module(f".{name}", __name__)
+        _import_times.setdefault(name, time.perf_counter() - start)
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_modules))
+
+def get_import_report() -> Dict[str, float]:
+    """
+    Get the import time of the lazily imported submodules.
+
+    Submodules imported by other submodules are included in the time of the first one that needed them.
+
+    Returns:
+    - Dict of submodule names and import times in seconds, in loading order.
+    """
+
+    return dict(_import_times)
 
 __all__ = [
     "sfSystem",
@@ -25,5 +73,19 @@ __all__ = [
     "Time",
     "Animation",
     "TextEnhance",
-    "Video"
+    "Video",
+    "Scheduler",
+    "SpriteBatch",
+    "TileMap",
+    "Compositor",
+    "Network",
+    "Codec",
+    "Replication",
+    "Download",
+    "VectorArray",
+    "SceneGraph",
+    "RenderStateMgr",
+    "AudioEffect",
+    "AudioTool",
+    "Input"
 ]
@@ -0,0 +1,564 @@
+"""
+Headless benchmark suite for the Python layer of PySFBoost.
+
+Run it from anywhere with `python benchmarks/bench.py`. The compiled pysf module is used when it is available, otherwise the pure Python stand-in in pysf_stub.py is loaded, which is also forced by `--stub`.
+Results are written as JSON (throughput and allocations per scenario) so that runs of different commits could be compared with `--compare`.
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+_BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+_PACKAGE_DIR = os.path.dirname(_BENCH_DIR)
+
+def load_package(use_stub: bool):
+    """
+    Import PySFBoost, with the stub backend if required.
+
+    Parameters:
+    - use_stub: Whether to force the pure Python stand-in of pysf.
+
+    Returns:
+    - Tuple of the package module and the name of the backend.
+    """
+
+    parent, name = os.path.split(_PACKAGE_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+
+    backend = 'pysf'
+    if use_stub or importlib.util.find_spec(f'{name}.pysf') is None:
+        spec = importlib.util.spec_from_file_location(f'{name}.pysf', os.path.join(_BENCH_DIR, 'pysf_stub.py'))
+        stub = importlib.util.module_from_spec(spec)
+        sys.modules[f'{name}.pysf'] = stub
+        spec.loader.exec_module(stub)
+        backend = 'stub'
+
+    return importlib.import_module(name), backend
+
+class Scenario:
+    """
+    A benchmark scenario.
+
+    setup() builds the state which is not measured, run(state) is measured and returns the count of processed items.
+    """
+
+    def __init__(self, name: str, unit: str, setup: Callable[[], object], run: Callable[[object], int]):
+        """
+        Constructor.
+
+        Parameters:
+        - name: Name of the scenario.
+        - unit: Unit of the processed items, such as 'particles'.
+        - setup: Function building the state of one measurement.
+        - run: Function running the measured work and returning the count of processed items.
+        """
+
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+        self.run = run
+
+def make_scenarios(pkg, scale: float) -> List[Scenario]:
+    """
+    Make all scenarios.
+
+    Parameters:
+    - pkg: The PySFBoost package.
+    - scale: Factor applied to the size of every scenario.
+
+    Returns:
+    - List of scenarios.
+    """
+
+    sfSystem = pkg.sfSystem
+    sfGraphics = pkg.sfGraphics
+    sfWindow = pkg.sfWindow
+    sfAudio = pkg.sfAudio
+    Particle = pkg.Particle
+    Animation = pkg.Animation
+    TextEnhance = pkg.TextEnhance
+    ResourceMgr = pkg.ResourceMgr
+
+    delta = sfSystem.Time.FromSeconds(1 / 60)
+    frames = 10
+
+    def particles(count: int) -> Scenario:
+        def setup():
+            texture = sfGraphics.Texture(sfSystem.Vector2u(8, 8))
+            mgr = Particle.ParticleMgr()
+            for i in range(count):
+                mgr.add_particle(Particle.Particle(texture, sfSystem.Vector2f(i % 7, i % 11), None), i % 4)
+            return mgr, sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            mgr, target = state
+            for _ in range(frames):
+                mgr.update(delta)
+                mgr.display(target)
+            return count * frames
+
+        return Scenario(f'particles_{count}', 'particles', setup, run)
+
+    def animation_timeline(count: int) -> Scenario:
+        def setup():
+            texture = sfGraphics.Texture(sfSystem.Vector2u(16, 16))
+            events = [(Animation.Event(sfGraphics.Sprite(texture), sfSystem.Time.FromSeconds(0.5)), sfSystem.Time.FromSeconds(i * 0.01))
+                      for i in range(count)]
+            mgr = Animation.AnimationMgr()
+            mgr.add_animation(Animation.Animation(sfSystem.Time.FromSeconds(count * 0.01 + 1), events))
+            return mgr, sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            mgr, target = state
+            updates = 0
+            while len(mgr.get_z_list()) > 0:
+                mgr.update(delta)
+                mgr.display(target)
+                updates += 1
+            return updates
+
+        return Scenario(f'animation_timeline_{count}', 'updates', setup, run)
+
+    def etext_parse(paragraphs: int) -> Scenario:
+        paragraph = r'**Bold** *italic* __under__ _strike_ \c[red]red\c[white] \s[24]big\s[16] normal text with some words. '
+        text = '\n'.join(paragraph * 4 for _ in range(paragraphs))
+
+        def setup():
+            return sfGraphics.Font()
+
+        def run(font):
+            config = TextEnhance.EText.StyleConfig(sfGraphics.Color.white(), 16, 1.0, 1.2)
+            TextEnhance.EText(font, text, sfSystem.Vector2u(100000, 100000), config)
+            return len(text)
+
+        return Scenario(f'etext_parse_{paragraphs}', 'chars', setup, run)
+
+    def texture_churn(count: int) -> Scenario:
+        def setup():
+            ResourceMgr.TextureMgr.clear()
+            ResourceMgr.TextureMgr.add_pak_ref({'pak': {f'{i}.png': b'png' for i in range(count)}})
+
+        def run(_):
+            for round_ in range(4):
+                for i in range(count):
+                    ResourceMgr.TextureMgr.get_texture(f'assets/pak/{i}.png')
+                for i in range(round_ % 2, count, 2):
+                    ResourceMgr.TextureMgr.release_texture(f'assets/pak/{i}.png')
+            ResourceMgr.TextureMgr.clear()
+            return count * 4
+
+        return Scenario(f'texture_churn_{count}', 'lookups', setup, run)
+
+    def audio_update(count: int) -> Scenario:
+        def setup():
+            ResourceMgr.AudioMgr.clear()
+            buffers = [sfAudio.SoundBuffer() for _ in range(16)]
+            for buffer in buffers:
+                ResourceMgr.AudioMgr.preload_sound(buffer, count // len(buffers) + 1)
+            return buffers
+
+        def run(buffers):
+            for i in range(count):
+                ResourceMgr.AudioMgr.play_sound(buffers[i % len(buffers)])
+            updates = 0
+            while ResourceMgr.AudioMgr.get_playing_count() > 0:
+                ResourceMgr.AudioMgr.update()
+                updates += 1
+            return updates * count
+
+        return Scenario(f'audio_update_{count}', 'sound polls', setup, run)
+
+    def sprite_batch(count: int) -> Scenario:
+        def setup():
+            textures = [sfGraphics.Texture(sfSystem.Vector2u(32, 32)) for _ in range(4)]
+            sprites = []
+            for i in range(count):
+                sprite = sfGraphics.Sprite(textures[i % len(textures)])
+                sprite.set_position(sfSystem.Vector2f(i % 800, i % 600))
+                sprites.append(sprite)
+            return pkg.SpriteBatch.SpriteBatch(), sprites, sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            batch, sprites, target = state
+            for _ in range(frames):
+                batch.clear()
+                batch.add_all(sprites)
+                batch.draw(target)
+            return count * frames
+
+        return Scenario(f'sprite_batch_{count}', 'sprites', setup, run)
+
+    def tilemap(map_size: int) -> Scenario:
+        def setup():
+            tileset = sfGraphics.Texture(sfSystem.Vector2u(256, 256))
+            tilemap = pkg.TileMap.TileMap(tileset, sfSystem.Vector2u(16, 16), sfSystem.Vector2u(map_size, map_size))
+            tilemap.set_layer(0, [i % 256 for i in range(map_size * map_size)])
+            target = sfGraphics.RenderTexture(sfSystem.Vector2u(1280, 720))
+            tilemap.draw(target)
+            return tilemap, target
+
+        def run(state):
+            tilemap, target = state
+            view = target.get_view()
+            for i in range(frames * 10):
+                tilemap.set_tile(0, (i * 7) % map_size, (i * 13) % map_size, i % 256)
+                view.move(sfSystem.Vector2f(8, 4))
+                tilemap.draw(target)
+            return frames * 10
+
+        return Scenario(f'tilemap_{map_size}', 'frames', setup, run)
+
+    def cached_layer(count: int) -> Scenario:
+        def setup():
+            texture = sfGraphics.Texture(sfSystem.Vector2u(32, 32))
+            compositor = pkg.Compositor.LayerCompositor(sfSystem.Vector2u(800, 600))
+            compositor.create_layer(0, cached=True)
+            for i in range(count):
+                sprite = sfGraphics.Sprite(texture)
+                sprite.set_position(sfSystem.Vector2f(i % 800, i % 600))
+                compositor.add(sprite, 0)
+            player = sfGraphics.Sprite(texture)
+            compositor.add(player, 1)
+            return compositor, player, sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            compositor, player, target = state
+            for i in range(frames):
+                player.move(sfSystem.Vector2f(1, 0))
+                compositor.display(target)
+            return frames
+
+        return Scenario(f'cached_layer_{count}', 'frames', setup, run)
+
+    def render_queue(count: int) -> Scenario:
+        def setup():
+            textures = [sfGraphics.Texture(sfSystem.Vector2u(32, 32)) for _ in range(8)]
+            blend_modes = [pkg.RenderStateMgr.RenderStateMgr.alpha(), pkg.RenderStateMgr.RenderStateMgr.additive()]
+            sprites = []
+            for i in range(count):
+                texture = textures[i * 7 % len(textures)]
+                sprites.append((sfGraphics.Sprite(texture), texture, blend_modes[i % len(blend_modes)]))
+            return sprites, pkg.RenderStateMgr.RenderQueue(), sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            sprites, queue, target = state
+            get_states = pkg.RenderStateMgr.RenderStateMgr.get_states
+            for _ in range(frames):
+                for sprite, texture, blend_mode in sprites:
+                    queue.submit(sprite, get_states(texture, blend_mode))
+                queue.flush(target)
+            return frames * len(sprites)
+
+        return Scenario(f'render_queue_{count}', 'draws', setup, run)
+
+    def input_poll(count: int) -> Scenario:
+        def setup():
+            Event = sfWindow.Event
+            Key = sfWindow.Keyboard.Key
+            events = []
+            for i in range(count):
+                if i % 50 == 0:
+                    events.append(Event(Event.KeyPressed(code=Key.W, scancode=sfWindow.Keyboard.Scan.A, alt=False, control=False, shift=False, system=False)))
+                elif i % 10 == 0:
+                    events.append(Event(Event.JoystickMoved(joystick_id=0, axis=sfWindow.Joystick.Axis.X, position=i % 100)))
+                else:
+                    events.append(Event(Event.MouseMoved(position=sfSystem.Vector2i(i % 800, i % 600))))
+            pkg.Input.InputMgr.clear()
+            pkg.Input.InputMgr.add_handler(pkg.Input.EventType.KeyPressed, lambda event: None)
+            return sfGraphics.RenderWindow(), events
+
+        def run(state):
+            window, events = state
+            polled = 0
+            for _ in range(frames):
+                for event in events:
+                    window.push_event(event)
+                polled += pkg.Input.InputMgr.poll(window)
+            return polled
+
+        return Scenario(f'input_poll_{count}', 'events', setup, run)
+
+    def net_echo(count: int) -> Scenario:
+        class Client(pkg.Network.NetClient):
+            received = 0
+
+            def on_message(self, connection, message):
+                self.received += 1
+
+        def setup():
+            server = pkg.Network.LoopbackServer()
+            client = Client()
+            client.connect('127.0.0.1', server.start())
+            return server, client
+
+        def run(state):
+            server, client = state
+            message = bytes(64)
+            timeout = sfSystem.Time.FromMilliseconds(1)
+            for _ in range(frames):
+                client.received = 0
+                for _ in range(count):
+                    client.send(message)
+                while client.received < count:
+                    client.poll(timeout)
+            client.close()
+            server.stop()
+            return count * frames
+
+        return Scenario(f'net_echo_{count}', 'messages', setup, run)
+
+    def codec_snapshot(count: int) -> Scenario:
+        def setup():
+            codec = pkg.Codec.MessageCodec()
+            codec.register(pkg.Codec.Schema('entity', 1, [('id', 'u32'), ('position', 'vec2f'), ('animation', 'u16'), ('health', 'f32')]))
+            codec.register(pkg.Codec.Schema('positions', 2, [('tick', 'u32'), ('ids', 'u32[]'), ('positions', 'vec2f[]')]))
+            entities = [{'id': i, 'position': sfSystem.Vector2f(i, i * 0.5), 'animation': i % 16, 'health': 100.0} for i in range(count)]
+            ids = array('I', range(count))
+            positions = array('f', [float(i) for i in range(count * 2)])
+            return codec, entities, ids, positions
+
+        def run(state):
+            codec, entities, ids, positions = state
+            for tick in range(frames):
+                codec.begin()
+                for entity in entities:
+                    codec.write('entity', entity)
+                codec.write('positions', {'tick': tick, 'ids': ids, 'positions': positions})
+                for _ in codec.decode_all(codec.get_view()):
+                    pass
+            return count * frames
+
+        return Scenario(f'codec_snapshot_{count}', 'entities', setup, run)
+
+    def download_assets(count: int) -> Scenario:
+        def setup():
+            source = tempfile.mkdtemp()
+            for i in range(count):
+                with open(os.path.join(source, f'{i}.png'), 'wb') as file:
+                    file.write(bytes(2048))
+            server = pkg.Download.LocalHttpServer(source)
+            server.start()
+            return server, source
+
+        def run(state):
+            server, source = state
+            destination = tempfile.mkdtemp()
+            with pkg.Download.Downloader(destination) as downloader:
+                tasks = downloader.download_all([server.get_url(f'{i}.png') for i in range(count)])
+                downloader.wait_all(tasks)
+            server.stop()
+            shutil.rmtree(source)
+            shutil.rmtree(destination)
+            return count
+
+        return Scenario(f'download_assets_{count}', 'files', setup, run)
+
+    def vector_array(count: int) -> Scenario:
+        def setup():
+            vectors = pkg.VectorArray.Vector2fArray
+            positions = vectors([sfSystem.Vector2f(i % 800, i % 600) for i in range(count)])
+            velocities = vectors([sfSystem.Vector2f(1, -1) for _ in range(count)])
+            return positions, velocities
+
+        def run(state):
+            positions, velocities = state
+            center = sfSystem.Vector2f(400, 300)
+            for _ in range(frames):
+                positions.add_scaled(velocities, 1 / 60)
+                positions.rotate(1, center)
+            return count * frames
+
+        return Scenario(f'vector_array_{count}', 'vectors', setup, run)
+
+    def audio_effects(frame_count: int) -> Scenario:
+        def setup():
+            effects = pkg.AudioEffect
+            chain = effects.EffectChain([effects.LowPass(4000), effects.Reverb(), effects.Ducking()], frame_count, 44100)
+            samples = array('f', [((i * 7919) % 2000 - 1000) / 1000 for i in range(frame_count * 2)])
+            return chain, memoryview(samples), memoryview(array('f', bytes(len(samples) * 4)))
+
+        def run(state):
+            chain, samples, output = state
+            blocks = 0
+            for i in range(frames):
+                chain.get_effects()[2].set_ducked(i % 20 < 10)
+                chain(samples, frame_count, output, frame_count, 2)
+                blocks += 1
+            return blocks * frame_count
+
+        return Scenario(f'audio_effects_{frame_count}', 'frames', setup, run)
+
+    def scene_graph(rigs: int) -> Scenario:
+        def setup():
+            graph = pkg.SceneGraph.SceneGraph()
+            texture = sfGraphics.Texture(sfSystem.Vector2u(32, 32))
+            roots = []
+            for _ in range(rigs):
+                node = graph.create_node()
+                roots.append(node)
+                for _ in range(19):
+                    node = graph.create_node(node, sfGraphics.Sprite(texture))
+                    node.set_position(sfSystem.Vector2f(5, 0))
+            graph.update()
+            return graph, roots, pkg.SpriteBatch.SpriteBatch(), sfGraphics.RenderTexture(sfSystem.Vector2u(800, 600))
+
+        def run(state):
+            graph, roots, batch, target = state
+            for _ in range(frames):
+                for root in roots[::10]:
+                    root.rotate(1)
+                graph.update()
+                batch.clear()
+                graph.submit(batch)
+                batch.draw(target)
+            return rigs * 20 * frames
+
+        return Scenario(f'scene_graph_{rigs}', 'nodes', setup, run)
+
+    def size(value: int) -> int:
+        return max(1, int(value * scale))
+
+    return [
+        particles(size(10000)),
+        particles(size(100000)),
+        animation_timeline(size(2000)),
+        etext_parse(size(50)),
+        texture_churn(size(2000)),
+        audio_update(size(2000)),
+        sprite_batch(size(10000)),
+        tilemap(size(512)),
+        cached_layer(size(1000)),
+        render_queue(size(5000)),
+        input_poll(size(500)),
+        net_echo(size(1000)),
+        codec_snapshot(size(1000)),
+        download_assets(size(400)),
+    ] + ([vector_array(size(100000)), scene_graph(size(200)), audio_effects(1024)] if importlib.util.find_spec('numpy') is not None else [])
+
+def measure(scenario: Scenario, repeat: int) -> Dict[str, float]:
+    """
+    Measure a scenario.
+
+    Parameters:
+    - scenario: The scenario to measure.
+    - repeat: Count of timed runs, the best one is used for throughput.
+
+    Returns:
+    - Dict of results.
+    """
+
+    scenario.run(scenario.setup())
+
+    timings: List[float] = []
+    items = 0
+    for _ in range(repeat):
+        state = scenario.setup()
+        start = time.perf_counter()
+        items = scenario.run(state)
+        timings.append(time.perf_counter() - start)
+
+    state = scenario.setup()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    scenario.run(state)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = [stat for stat in after.compare_to(before, 'filename') if stat.size_diff > 0]
+
+    best = min(timings)
+    return {
+        'unit': scenario.unit,
+        'items': items,
+        'best_s': best,
+        'median_s': statistics.median(timings),
+        'throughput': items / best if best > 0 else 0.0,
+        'alloc_peak_bytes': peak,
+        'alloc_retained_bytes': sum(stat.size_diff for stat in allocated),
+        'alloc_retained_blocks': sum(stat.count_diff for stat in allocated),
+    }
+
+def get_commit() -> Optional[str]:
+    """
+    Get the current git commit of the package.
+
+    Returns:
+    - Commit hash, None if it is not a git checkout.
+    """
+
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=_PACKAGE_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, previous: Dict) -> List[Tuple[str, float]]:
+    """
+    Compare the throughput of two runs.
+
+    Parameters:
+    - current: Current results.
+    - previous: Previous results.
+
+    Returns:
+    - List of scenario names and throughput ratios (current / previous).
+    """
+
+    ratios = []
+    for name, result in current['results'].items():
+        old = previous['results'].get(name)
+        if old is not None and old['throughput'] > 0:
+            ratios.append((name, result['throughput'] / old['throughput']))
+    return ratios
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Headless benchmarks of the PySFBoost Python layer.')
+    parser.add_argument('--stub', action='store_true', help='force the pure Python pysf stand-in')
+    parser.add_argument('--repeat', type=int, default=5, help='count of timed runs per scenario')
+    parser.add_argument('--scale', type=float, default=1.0, help='factor applied to scenario sizes')
+    parser.add_argument('--filter', default='', help='only run scenarios containing this text')
+    parser.add_argument('--output', default='bench_output.json', help='path of the JSON report')
+    parser.add_argument('--compare', help='path of a previous JSON report to compare with')
+    args = parser.parse_args(argv)
+
+    pkg, backend = load_package(args.stub)
+    report = {
+        'commit': get_commit(),
+        'backend': backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+
+    for scenario in make_scenarios(pkg, args.scale):
+        if args.filter not in scenario.name:
+            continue
+        result = measure(scenario, args.repeat)
+        report['results'][scenario.name] = result
+        print(f"{scenario.name:<28} {result['throughput']:>14,.0f} {scenario.unit}/s  "
+              f"peak {result['alloc_peak_bytes'] / 1024:>10,.1f} KiB")
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            previous = json.load(file)
+        for name, ratio in compare(report, previous):
+            print(f'{name:<28} {ratio:>6.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,857 @@
+"""
+Pure Python stand-in for the compiled pysf module, used to run the benchmarks headless.
+
+It implements only what the Python layer of PySFBoost needs to run its hot paths: vectors, time, transformable sprites, textures, text and fonts, render targets which count draw calls, and sounds which stop after a few status polls.
+Every other name resolves to an inert placeholder class, so that the binding modules can be imported.
+Absolute timings measured against it are only meaningful for the Python layer, not for rendering.
+"""
+
+import ctypes
+import enum
+import math
+import time
+import wave
+from typing import Dict, Optional
+
+class _Placeholder:
+    def __init__(self, *args, **kwargs):
+        pass
+
+_placeholders: Dict[str, type] = {}
+
+def __getattr__(name: str):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    if name not in _placeholders:
+        _placeholders[name] = type(name, (_Placeholder,), {})
+    return _placeholders[name]
+
+class Vector2f:
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=0.0):
+        if isinstance(x, tuple):
+            x, y = x
+        self.x = x
+        self.y = y
+
+    def to_int(self):
+        return Vector2i(int(self.x), int(self.y))
+
+    def to_float(self):
+        return Vector2f(float(self.x), float(self.y))
+
+    def to_uint(self):
+        return Vector2u(int(self.x), int(self.y))
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, scalar):
+        return type(self)(self.x * scalar, self.y * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return type(self)(self.x / scalar, self.y / scalar)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+class Vector2i(Vector2f):
+    __slots__ = ()
+
+    def __truediv__(self, scalar):
+        return type(self)(int(self.x / scalar), int(self.y / scalar))
+
+class Vector2u(Vector2i):
+    __slots__ = ()
+
+class Vector3f:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, tuple):
+            x, y, z = x
+        self.x = x
+        self.y = y
+        self.z = z
+
+class Vector3i(Vector3f):
+    __slots__ = ()
+
+class Vector3u(Vector3f):
+    __slots__ = ()
+
+class Angle:
+    def __init__(self, radians: float = 0.0):
+        self._radians = radians
+
+    @staticmethod
+    def degrees(degrees: float):
+        return Angle(math.radians(degrees))
+
+    @staticmethod
+    def radians(radians: float):
+        return Angle(radians)
+
+    def as_degrees(self) -> float:
+        return math.degrees(self._radians)
+
+    def as_radians(self) -> float:
+        return self._radians
+
+class Time:
+    __slots__ = ('_us',)
+
+    def __init__(self, microseconds: int = 0):
+        self._us = int(microseconds)
+
+    @staticmethod
+    def FromSeconds(seconds: float):
+        return Time(seconds * 1000000)
+
+    @staticmethod
+    def FromMilliseconds(milliseconds: int):
+        return Time(milliseconds * 1000)
+
+    @staticmethod
+    def FromMicroSeconds(microseconds: int):
+        return Time(microseconds)
+
+    @staticmethod
+    def Zero():
+        return Time(0)
+
+    def as_seconds(self) -> float:
+        return self._us / 1000000.0
+
+    def as_milliseconds(self) -> int:
+        return self._us // 1000
+
+    def as_microseconds(self) -> int:
+        return self._us
+
+    def __add__(self, other):
+        return Time(self._us + other._us)
+
+    def __sub__(self, other):
+        return Time(self._us - other._us)
+
+    def __mul__(self, scalar):
+        return Time(self._us * scalar)
+
+    def __truediv__(self, scalar):
+        return Time(self._us / scalar)
+
+    def __lt__(self, other):
+        return self._us < other._us
+
+    def __le__(self, other):
+        return self._us <= other._us
+
+    def __gt__(self, other):
+        return self._us > other._us
+
+    def __ge__(self, other):
+        return self._us >= other._us
+
+    def __eq__(self, other):
+        return isinstance(other, Time) and self._us == other._us
+
+    def __hash__(self):
+        return hash(self._us)
+
+class Clock:
+    def __init__(self):
+        self._start = time.perf_counter()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def restart(self):
+        elapsed = self.get_elapsed_time()
+        self._start = time.perf_counter()
+        return elapsed
+
+    def reset(self):
+        return self.restart()
+
+    def get_elapsed_time(self):
+        return Time.FromSeconds(time.perf_counter() - self._start)
+
+class IntRect:
+    def __init__(self, position=None, size=None):
+        self.position = position if position is not None else Vector2i()
+        self.size = size if size is not None else Vector2i()
+
+    def find_intersection(self, rectangle):
+        left = max(self.position.x, rectangle.position.x)
+        top = max(self.position.y, rectangle.position.y)
+        right = min(self.position.x + self.size.x, rectangle.position.x + rectangle.size.x)
+        bottom = min(self.position.y + self.size.y, rectangle.position.y + rectangle.size.y)
+        if left >= right or top >= bottom:
+            return None
+        return type(self)(Vector2f(left, top), Vector2f(right - left, bottom - top))
+
+class FloatRect(IntRect):
+    pass
+
+class Color:
+    __slots__ = ('r', 'g', 'b', 'a')
+
+    def __init__(self, red=0, green=0, blue=0, alpha=255):
+        self.r = red
+        self.g = green
+        self.b = blue
+        self.a = alpha
+
+    def to_integer(self) -> int:
+        return (self.r << 24) | (self.g << 16) | (self.b << 8) | self.a
+
+    @staticmethod
+    def black():
+        return Color(0, 0, 0)
+
+    @staticmethod
+    def white():
+        return Color(255, 255, 255)
+
+    @staticmethod
+    def red():
+        return Color(255, 0, 0)
+
+    @staticmethod
+    def green():
+        return Color(0, 255, 0)
+
+    @staticmethod
+    def blue():
+        return Color(0, 0, 255)
+
+    @staticmethod
+    def yellow():
+        return Color(255, 255, 0)
+
+    @staticmethod
+    def transparent():
+        return Color(0, 0, 0, 0)
+
+class BlendMode:
+    class Factor(enum.IntEnum):
+        Zero = 0
+        One = 1
+        SrcColor = 2
+        OneMinusSrcColor = 3
+        DstColor = 4
+        OneMinusDstColor = 5
+        SrcAlpha = 6
+        OneMinusSrcAlpha = 7
+        DstAlpha = 8
+        OneMinusDstAlpha = 9
+
+    class Equation(enum.IntEnum):
+        Add = 0
+        Subtract = 1
+        ReverseSubtract = 2
+        Min = 3
+        Max = 4
+
+    def __init__(self, *factors):
+        self.factors = factors
+
+    @staticmethod
+    def BlendAlpha():
+        return BlendMode(BlendMode.Factor.SrcAlpha, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add,
+                         BlendMode.Factor.One, BlendMode.Factor.OneMinusSrcAlpha, BlendMode.Equation.Add)
+
+    @staticmethod
+    def BlendAdd():
+        return BlendMode(BlendMode.Factor.SrcAlpha, BlendMode.Factor.One, BlendMode.Equation.Add,
+                         BlendMode.Factor.One, BlendMode.Factor.One, BlendMode.Equation.Add)
+
+    @staticmethod
+    def BlendNone():
+        return BlendMode(BlendMode.Factor.One, BlendMode.Factor.Zero, BlendMode.Equation.Add,
+                         BlendMode.Factor.One, BlendMode.Factor.Zero, BlendMode.Equation.Add)
+
+class Transform:
+    def __init__(self, *matrix):
+        self._matrix = list(matrix) if len(matrix) == 9 else [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+
+    def get_matrix(self):
+        a = self._matrix
+        return [a[0], a[3], 0.0, a[6], a[1], a[4], 0.0, a[7], 0.0, 0.0, 1.0, 0.0, a[2], a[5], 0.0, a[8]]
+
+    def get_inverse(self):
+        a = self._matrix
+        det = a[0] * a[4] - a[1] * a[3]
+        if det == 0:
+            return Transform()
+        return Transform(a[4] / det, -a[1] / det, (a[1] * a[5] - a[4] * a[2]) / det,
+                         -a[3] / det, a[0] / det, (a[3] * a[2] - a[0] * a[5]) / det,
+                         0.0, 0.0, 1.0)
+
+    def transform_rect(self, rectangle):
+        corners = [self.transform_point(Vector2f(rectangle.position.x + dx, rectangle.position.y + dy))
+                   for dx in (0, rectangle.size.x) for dy in (0, rectangle.size.y)]
+        left = min(p.x for p in corners)
+        top = min(p.y for p in corners)
+        return FloatRect(Vector2f(left, top), Vector2f(max(p.x for p in corners) - left, max(p.y for p in corners) - top))
+
+    def transform_point(self, point):
+        a = self._matrix
+        return Vector2f(a[0] * point.x + a[1] * point.y + a[2], a[3] * point.x + a[4] * point.y + a[5])
+
+    def combine(self, transform):
+        a = self._matrix
+        b = transform._matrix
+        self._matrix = [sum(a[r * 3 + k] * b[k * 3 + c] for k in range(3)) for r in range(3) for c in range(3)]
+        return self
+
+    def translate(self, offset):
+        return self.combine(Transform(1.0, 0.0, offset.x, 0.0, 1.0, offset.y, 0.0, 0.0, 1.0))
+
+    def scale(self, factors, center=None):
+        return self.combine(Transform(factors.x, 0.0, 0.0, 0.0, factors.y, 0.0, 0.0, 0.0, 1.0))
+
+    def rotate(self, angle, center=None):
+        radians = angle.as_radians() if isinstance(angle, Angle) else math.radians(angle)
+        cos, sin = math.cos(radians), math.sin(radians)
+        return self.combine(Transform(cos, -sin, 0.0, sin, cos, 0.0, 0.0, 0.0, 1.0))
+
+    @staticmethod
+    def identity():
+        return Transform()
+
+class Transformable:
+    def __init__(self):
+        self._position = Vector2f()
+        self._origin = Vector2f()
+        self._scale = Vector2f(1.0, 1.0)
+        self._rotation = 0.0
+
+    def set_position(self, position):
+        self._position = Vector2f(position.x, position.y)
+
+    def get_position(self):
+        return Vector2f(self._position.x, self._position.y)
+
+    def move(self, offset):
+        self._position = Vector2f(self._position.x + offset.x, self._position.y + offset.y)
+
+    def set_origin(self, origin):
+        self._origin = origin
+
+    def get_origin(self):
+        return self._origin
+
+    def set_scale(self, factors):
+        self._scale = factors
+
+    def get_scale(self):
+        return self._scale
+
+    def set_rotation(self, angle):
+        self._rotation = angle
+
+    def get_rotation(self):
+        return self._rotation
+
+    def get_transform(self):
+        return Transform().translate(self._position).rotate(self._rotation).scale(self._scale).translate(Vector2f(-self._origin.x, -self._origin.y))
+
+class Drawable:
+    pass
+
+class Texture:
+    def __init__(self, size=None, *args):
+        self._size = size if isinstance(size, Vector2u) else Vector2u(1, 1)
+
+    def load_from_file(self, filename, *args) -> bool:
+        return True
+
+    def load_from_memory(self, data, *args) -> bool:
+        self._size = Vector2u(32, 32)
+        return len(data) > 0
+
+    def get_size(self):
+        return self._size
+
+    def update(self, *args):
+        pass
+
+class Sprite(Transformable, Drawable):
+    def __init__(self, texture, rectangle=None):
+        super().__init__()
+        self._texture = texture
+        self._color = Color.white()
+        size = texture.get_size()
+        self._rect = rectangle if rectangle is not None else IntRect(Vector2i(0, 0), Vector2i(size.x, size.y))
+
+    def set_texture(self, texture, reset_rect=False):
+        self._texture = texture
+
+    def get_texture(self):
+        return self._texture
+
+    def set_texture_rect(self, rectangle):
+        self._rect = rectangle
+
+    def get_texture_rect(self):
+        return self._rect
+
+    def set_color(self, color):
+        self._color = color
+
+    def get_color(self):
+        return self._color
+
+    def get_local_bounds(self):
+        return FloatRect(Vector2f(0, 0), Vector2f(self._rect.size.x, self._rect.size.y))
+
+    def get_global_bounds(self):
+        return FloatRect(self._position - self._origin, Vector2f(self._rect.size.x, self._rect.size.y))
+
+class RenderStates:
+    def __init__(self, *args):
+        self.blend_mode = BlendMode.BlendAlpha()
+        self.transform = Transform()
+        self.texture = None
+        self.shader = None
+        self.coordinate_type = 0
+        self.stencil_mode = None
+
+    @staticmethod
+    def default():
+        return RenderStates()
+
+class View:
+    def __init__(self, center=None, size=None):
+        if isinstance(center, FloatRect):
+            center, size = center.position + center.size / 2, center.size
+        self._center = center if center is not None else Vector2f()
+        self._size = size if size is not None else Vector2f(1000, 1000)
+
+    def set_center(self, center):
+        self._center = center
+
+    def get_center(self):
+        return self._center
+
+    def set_size(self, size):
+        self._size = size
+
+    def get_size(self):
+        return self._size
+
+    def move(self, offset):
+        self._center = self._center + offset
+
+class RenderTarget:
+    def __init__(self, size=None):
+        self._size = size if size is not None else Vector2u(800, 600)
+        self.draw_calls = 0
+        self._view = View(Vector2f(self._size.x / 2, self._size.y / 2), Vector2f(self._size.x, self._size.y))
+
+    def set_view(self, view):
+        self._view = view
+
+    def get_view(self):
+        return self._view
+
+    def clear(self, *args):
+        pass
+
+    def draw(self, *args):
+        self.draw_calls += 1
+
+    def display(self):
+        pass
+
+    def get_size(self):
+        return self._size
+
+class RenderTexture(RenderTarget):
+    def __init__(self, size=None, *args):
+        super().__init__(size)
+        self._texture = Texture(self._size)
+
+    def get_texture(self):
+        return self._texture
+
+class RenderWindow(RenderTarget):
+    """
+    Window which returns the events pushed with push_event.
+    """
+
+    def __init__(self, *args):
+        super().__init__()
+        self._events = []
+        self._next_event = 0
+        self._open = True
+
+    def push_event(self, event):
+        self._events.append(event)
+
+    def poll_event(self):
+        if self._next_event >= len(self._events):
+            self._events.clear()
+            self._next_event = 0
+            return None
+        event = self._events[self._next_event]
+        self._next_event += 1
+        return event
+
+    def is_open(self):
+        return self._open
+
+    def close(self):
+        self._open = False
+
+class PrimitiveType(enum.IntEnum):
+    Points = 0
+    Lines = 1
+    LineStrip = 2
+    Triangles = 3
+    TriangleStrip = 4
+    TriangleFan = 5
+
+class Vertex:
+    __slots__ = ('position', 'color', 'texCoords')
+
+    def __init__(self, position=None, color=None, texCoords=None):
+        self.position = position if position is not None else Vector2f()
+        self.color = color if color is not None else Color.white()
+        self.texCoords = texCoords if texCoords is not None else Vector2f()
+
+class VertexArray(Drawable):
+    def __init__(self, type_=PrimitiveType.Points, vertex_count=0):
+        self._type = type_
+        self._vertices = [Vertex() for _ in range(vertex_count)]
+
+    def __getitem__(self, index):
+        return self._vertices[index]
+
+    def __setitem__(self, index, value):
+        # The binding copies the vertex and its vectors.
+        self._vertices[index] = Vertex(Vector2f(value.position.x, value.position.y), value.color, Vector2f(value.texCoords.x, value.texCoords.y))
+
+    def get_vertex_count(self):
+        return len(self._vertices)
+
+    def resize(self, vertex_count):
+        if vertex_count < len(self._vertices):
+            del self._vertices[vertex_count:]
+        else:
+            self._vertices.extend(Vertex() for _ in range(vertex_count - len(self._vertices)))
+
+    def clear(self):
+        self._vertices.clear()
+
+    def append(self, vertex):
+        self._vertices.append(vertex)
+
+    def set_primitive_type(self, type_):
+        self._type = type_
+
+    def get_primitive_type(self):
+        return self._type
+
+class VertexBuffer(Drawable):
+    class Usage(enum.IntEnum):
+        Stream = 0
+        Dynamic = 1
+        Static = 2
+
+    def __init__(self, *args):
+        self._vertices = []
+
+    def create(self, vertex_count):
+        self._vertices = [Vertex() for _ in range(vertex_count)]
+        return True
+
+    def get_vertex_count(self):
+        return len(self._vertices)
+
+    def update(self, vertices, *args):
+        self._vertices = [Vertex(vertex.position, vertex.color, vertex.texCoords) for vertex in vertices]
+        return True
+
+    @staticmethod
+    def is_available():
+        return True
+
+class Glyph:
+    def __init__(self, advance: float, bounds: FloatRect):
+        self.advance = advance
+        self.bounds = bounds
+
+class Font:
+    class Info:
+        def __init__(self, family: str = 'Stub'):
+            self.family = family
+
+    def __init__(self, *args):
+        self._glyphs: Dict[tuple, Glyph] = {}
+
+    def open_from_file(self, filename) -> bool:
+        return True
+
+    def get_info(self):
+        return Font.Info()
+
+    def get_glyph(self, code_point, character_size, bold=False, outline_thickness=0):
+        key = (code_point, character_size, bold)
+        if key not in self._glyphs:
+            width = character_size * (0.6 if bold else 0.55)
+            self._glyphs[key] = Glyph(width, FloatRect(Vector2f(0, -character_size * 0.8), Vector2f(width, character_size)))
+        return self._glyphs[key]
+
+class Text(Transformable, Drawable):
+    class Style(enum.IntFlag):
+        Regular = 0
+        Bold = 1
+        Italic = 2
+        Underlined = 4
+        StrikeThrough = 8
+
+    def __init__(self, font, string='', character_size=30):
+        super().__init__()
+        self._font = font
+        self._string = string
+        self._character_size = character_size
+        self._style = Text.Style.Regular
+        self._fill_color = Color.white()
+        self._line_spacing = 1.0
+
+    def set_string(self, string):
+        self._string = string
+
+    def get_string(self):
+        return self._string
+
+    def set_character_size(self, size):
+        self._character_size = size
+
+    def get_character_size(self):
+        return self._character_size
+
+    def set_line_spacing(self, spacing_factor):
+        self._line_spacing = spacing_factor
+
+    def set_style(self, style):
+        self._style = style
+
+    def set_fill_color(self, color):
+        self._fill_color = color
+
+    def get_global_bounds(self):
+        return FloatRect(self._position, Vector2f(len(self._string) * self._character_size * 0.55, self._character_size))
+
+class SoundChannel(enum.IntEnum):
+    Unspecified = 0
+    Mono = 1
+    FrontLeft = 2
+    FrontRight = 3
+
+class SoundSource:
+    class Status(enum.IntEnum):
+        Stopped = 0
+        Paused = 1
+        Playing = 2
+
+#: Decoded samples per byte of encoded sound, about the ratio of 16 bit PCM to OGG/Vorbis.
+_samples_per_byte = 5
+
+class SoundBuffer:
+    def __init__(self, *args):
+        self._sample_count = 0
+
+    def load_from_file(self, filename) -> bool:
+        return True
+
+    def load_from_memory(self, data) -> bool:
+        self._sample_count = len(data) * _samples_per_byte
+        return len(data) > 0
+
+    def get_sample_count(self):
+        return self._sample_count
+
+class InputSoundFile:
+    """
+    Reads 16 bit WAV files with the wave module, memory is only measured.
+    """
+
+    def __init__(self, *args):
+        self._sample_count = 0
+        self._channel_count = 2
+        self._sample_rate = 44100
+        self._file = None
+
+    def open_from_file(self, filename) -> bool:
+        try:
+            self._file = wave.open(filename, 'rb')
+        except (OSError, EOFError, wave.Error):
+            return False
+        self._channel_count = self._file.getnchannels()
+        self._sample_rate = self._file.getframerate()
+        self._sample_count = self._file.getnframes() * self._channel_count
+        return self._file.getsampwidth() == 2
+
+    def open_from_memory(self, data) -> bool:
+        self._sample_count = len(data) * _samples_per_byte
+        return len(data) > 0
+
+    def read(self, samples, max_count):
+        data = self._file.readframes(max_count // self._channel_count)
+        ctypes.memmove(samples, data, len(data))
+        return len(data) // 2
+
+    def get_sample_count(self):
+        return self._sample_count
+
+    def get_channel_count(self):
+        return self._channel_count
+
+    def get_sample_rate(self):
+        return self._sample_rate
+
+    def get_channel_map(self):
+        return []
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class OutputSoundFile:
+    """
+    Writes 16 bit WAV files with the wave module, whatever the extension.
+    """
+
+    def __init__(self, *args):
+        self._file = None
+        if args:
+            if not self.open_from_file(*args):
+                raise RuntimeError('Failed to open sound file for writing')
+
+    def open_from_file(self, filename, sample_rate, channel_count, channel_map) -> bool:
+        try:
+            self._file = wave.open(filename, 'wb')
+        except OSError:
+            return False
+        self._file.setnchannels(channel_count)
+        self._file.setsampwidth(2)
+        self._file.setframerate(sample_rate)
+        return True
+
+    def write(self, samples, count):
+        self._file.writeframesraw(bytes(samples)[:count * 2])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class Sound(SoundSource):
+    #: Count of status polls after which a playing sound reports Stopped.
+    play_polls = 8
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._polls: Optional[int] = None
+
+    def play(self):
+        self._polls = Sound.play_polls
+
+    def stop(self):
+        self._polls = None
+
+    def get_status(self):
+        if self._polls is None:
+            return SoundSource.Status.Stopped
+        self._polls -= 1
+        if self._polls <= 0:
+            self._polls = None
+            return SoundSource.Status.Stopped
+        return SoundSource.Status.Playing
+
+    def get_buffer(self):
+        return self._buffer
+
+    def set_spatialization_enabled(self, enabled):
+        pass
+
+    def set_position(self, position):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+class Keyboard:
+    class Key(enum.IntEnum):
+        Unknown = -1
+        A = 0
+        D = 3
+        S = 18
+        W = 22
+        Space = 57
+
+    class Scan(enum.IntEnum):
+        Unknown = -1
+        A = 0
+
+class Mouse:
+    class Button(enum.IntEnum):
+        Left = 0
+        Right = 1
+        Middle = 2
+
+    class Wheel(enum.IntEnum):
+        Vertical = 0
+        Horizontal = 1
+
+class Joystick:
+    class Axis(enum.IntEnum):
+        X = 0
+        Y = 1
+
+class Sensor:
+    class Type(enum.IntEnum):
+        Accelerometer = 0
+
+class _EventSubtype:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+class Event:
+    """
+    Event holding one subtype instance, with the isX and getIfX accessors of the binding.
+    """
+
+    def __init__(self, subtype):
+        self._subtype = subtype
+
+_event_names = ('Closed', 'Resized', 'FocusLost', 'FocusGained', 'TextEntered', 'KeyPressed', 'KeyReleased',
+                'MouseWheelScrolled', 'MouseButtonPressed', 'MouseButtonReleased', 'MouseMoved', 'MouseMovedRaw',
+                'MouseEntered', 'MouseLeft', 'JoystickButtonPressed', 'JoystickButtonReleased', 'JoystickMoved',
+                'JoystickConnected', 'JoystickDisconnected', 'TouchBegan', 'TouchMoved', 'TouchEnded', 'SensorChanged')
+
+def _add_event_subtype(name):
+    subtype = type(name, (_EventSubtype,), {})
+    setattr(Event, name, subtype)
+    setattr(Event, f'is{name}', lambda self: type(self._subtype) is subtype)
+    setattr(Event, f'getIf{name}', lambda self: self._subtype if type(self._subtype) is subtype else None)
+
+for _name in _event_names:
+    _add_event_subtype(_name)